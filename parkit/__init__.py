@@ -7,7 +7,9 @@ from parkit.adapters.asyncable import (
     asyncable,
     Asyncable
 )
+from parkit.adapters.consumer import Consumer
 from parkit.adapters.dict import Dict
+from parkit.adapters.expiringdict import ExpiringDict
 from parkit.adapters.file import File
 from parkit.adapters.fileio import FileIO
 from parkit.adapters.object import Object
@@ -21,6 +23,7 @@ from parkit.adapters.task import (
     task,
     Task
 )
+from parkit.adapters.vector import Vector
 
 from parkit.bind import (
     bind_symbol,
@@ -58,10 +61,18 @@ from parkit.system.pidtable import pidtable
 from parkit.system.syslog import syslog
 
 from parkit.system.cluster import (
+    disable_autoscaling,
+    disable_placement,
+    get_autoscaling,
+    get_autoscaling_log,
     get_concurrency,
+    get_placement,
+    get_workers,
     disable_tasks,
     enable_tasks,
+    set_autoscaling,
     set_concurrency,
+    set_placement,
     tasks
 )
 
@@ -11,13 +11,16 @@ from typing import (
 
 import parkit.storage.threadlocal as thread
 
+from parkit.adapters.consumer import Consumer
 from parkit.adapters.sized import Sized
+from parkit.compression import Codec
 from parkit.storage.context import transaction_context
 from parkit.storage.entitymeta import (
     ClassBuilder,
     Missing
 )
 
+from parkit.typeddicts import LMDBProperties
 from parkit.utility import compile_function
 
 logger = logging.getLogger(__name__)
@@ -116,6 +119,8 @@ class Array(Sized, metaclass = ArrayMeta):
 
     _maxsize_cached = math.inf
 
+    _codec: Optional[Codec] = None
+
     get_metadata: Optional[Callable[..., Any]] = None
 
     decode_value: Optional[Callable[..., Any]] = \
@@ -130,30 +135,51 @@ class Array(Sized, metaclass = ArrayMeta):
         /, *,
         metadata: Optional[Dict[str, Any]] = None,
         site_uuid: Optional[str] = None,
+        db_properties: Optional[List[LMDBProperties]] = None,
         on_init: Optional[Callable[[bool], None]] = None,
         create: bool = False,
         bind: bool = True,
-        maxsize: int = 0
+        maxsize: int = 0,
+        compression: Optional[Union[str, Codec]] = None
     ):
         self.__maxsize: float
+        self.__compression: Optional[Tuple[str, Optional[int], Optional[bytes], int]]
+
+        codec = Codec.from_settings(compression) if compression else None
 
         def _on_init(created: bool):
             if created:
                 self.__maxsize = maxsize if maxsize > 0 else math.inf
+                self.__compression = codec.settings if codec else None
             if on_init:
                 on_init(create)
 
         super().__init__(
-            path, db_properties = [{'integerkey': True}, {'integerkey': True}],
+            path, db_properties = db_properties if db_properties else \
+            [{'integerkey': True}, {'integerkey': True}],
             on_init = _on_init, metadata = metadata, site_uuid = site_uuid,
             create = create, bind = bind
         )
 
         self._maxsize_cached = self.__maxsize
+        self.__load_codec()
 
     def __setstate__(self, from_wire: Any):
         super().__setstate__(from_wire)
         self._maxsize_cached = self.__maxsize
+        self.__load_codec()
+
+    def __load_codec(self):
+        settings = getattr(self, '_Array__compression', None)
+        if settings is not None:
+            self._codec = Codec.from_settings(settings)
+            self.encode_value, self.decode_value = self._codec.wrap(
+                type(self).encode_value, type(self).decode_value
+            )
+
+    @property
+    def compression(self) -> Optional[str]:
+        return self._codec.codec if self._codec else None
 
     @property
     def maxsize(self) -> Optional[int]:
@@ -387,6 +413,66 @@ class Array(Sized, metaclass = ArrayMeta):
         except BaseException as exc:
             self._abort(exc, txn, implicit)
 
+    def _extent(self) -> Tuple[int, int]:
+        try:
+            txn, cursors, _, implicit = \
+            thread.local.context.get(self._env, write = False, internal = True)
+            cursor = cursors[self._userdb[0]]
+            if cursor.last():
+                tail = struct.unpack('@N', cursor.key())[0] + 1
+                assert cursor.first()
+                head = struct.unpack('@N', cursor.key())[0]
+            else:
+                head = tail = 0
+            if implicit:
+                txn.commit()
+        except BaseException as exc:
+            self._abort(exc, txn, implicit)
+        return (head, tail)
+
+    def _scan(
+        self,
+        offset: int,
+        limit: int
+    ) -> List[Tuple[int, Any]]:
+        entries = []
+        try:
+            txn, cursors, _, implicit = \
+            thread.local.context.get(self._env, write = False, internal = True)
+            cursor = cursors[self._userdb[0]]
+            if limit > 0 and cursor.set_range(struct.pack('@N', max(offset, 0))):
+                while True:
+                    data = cursor.value()
+                    entries.append((
+                        struct.unpack('@N', cursor.key())[0],
+                        (
+                            self.decode_value(
+                                data, pickle.loads(txn.get(key = cursor.key(), db = self._userdb[1]))
+                            ) if self.get_metadata else self.decode_value(data)
+                        ) if self.decode_value else bytes(data)
+                    ))
+                    if len(entries) == limit or not cursor.next():
+                        break
+            if implicit:
+                txn.commit()
+        except BaseException as exc:
+            self._abort(exc, txn, implicit)
+        return entries
+
+    def consumer(
+        self,
+        group: str,
+        name: str,
+        /, *,
+        auto_commit: bool = True,
+        batch_size: int = 100,
+        lease: float = 30.0
+    ) -> Consumer:
+        return Consumer(
+            self, group, name, auto_commit = auto_commit,
+            batch_size = batch_size, lease = lease
+        )
+
     def __bool__(self) -> bool:
         return len(self) > 0
 
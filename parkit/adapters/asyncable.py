@@ -9,7 +9,7 @@ import os
 import types
 
 from typing import (
-    Any, Dict, Callable, Iterator, Optional, Tuple, Union
+    Any, cast, Dict, Callable, Iterator, Optional, Tuple, Union
 )
 
 import cloudpickle
@@ -18,11 +18,21 @@ import parkit.constants as constants
 
 from parkit.adapters.object import Object
 from parkit.adapters.fileobserver import FileObserver
-from parkit.adapters.task import Task
+from parkit.adapters.task import (
+    clear_metrics,
+    get_metrics_database,
+    get_task_status,
+    load_metrics,
+    summarize_histogram,
+    Task
+)
 from parkit.exceptions import ObjectNotFoundError
 from parkit.storage.context import transaction_context
+from parkit.storage.entities import (
+    LazyEntity,
+    load_lazy_entity
+)
 from parkit.storage.environment import get_environment_threadsafe
-from parkit.storage.namespace import Namespace
 from parkit.utility import (
     create_string_digest,
     resolve_path
@@ -32,6 +42,8 @@ logger = logging.getLogger(__name__)
 
 file_observer = FileObserver()
 
+executors = ['process', 'thread']
+
 class Asyncable(Object):
 
     _target_function: Optional[Callable[..., Any]] = None
@@ -45,6 +57,8 @@ class Asyncable(Object):
         async_limit: Optional[int] = None,
         metadata: Optional[Dict[str, Any]] = None,
         disable_sync: Optional[bool] = None,
+        executor: Optional[str] = None,
+        max_threads: Optional[int] = None,
         site_uuid: Optional[str] = None,
         create: bool = True,
         bind: bool = True
@@ -53,6 +67,13 @@ class Asyncable(Object):
         self.__default_sync: bool
         self.__async_limit: Optional[int]
         self.__disable_sync: bool
+        self.__executor: str
+        self.__max_threads: int
+
+        if executor is not None and executor not in executors:
+            raise ValueError()
+        if max_threads is not None and max_threads < 1:
+            raise ValueError()
 
         if target:
             module = inspect.getmodule(target)
@@ -90,6 +111,9 @@ class Asyncable(Object):
                 self.__async_limit = async_limit if async_limit is not None else None
                 self.__latest = None
                 self.__disable_sync = disable_sync if disable_sync is not None else False
+                self.__executor = executor if executor is not None else 'process'
+                self.__max_threads = max_threads if max_threads is not None else \
+                constants.DEFAULT_ASYNCABLE_MAX_THREADS
                 load_target()
             else:
                 with transaction_context(self._env, write = True):
@@ -99,6 +123,10 @@ class Asyncable(Object):
                         self.__disable_sync = disable_sync
                     if async_limit is not None:
                         self.__async_limit = async_limit
+                    if executor is not None:
+                        self.__executor = executor
+                    if max_threads is not None:
+                        self.__max_threads = max_threads
                     load_target()
 
         super().__init__(
@@ -130,36 +158,75 @@ class Asyncable(Object):
             return getattr(module, function_name).function
         return getattr(module, function_name)
 
+    def resolve(self) -> Callable[..., Any]:
+        assert self.__latest is not None
+        with transaction_context(self._env, write = False):
+            target_digest, _ = self.__latest
+            if target_digest.startswith('bytecode'):
+                return self.__bytecode_cache(target_digest)
+            return self.__module_cache(target_digest)
+
     def invoke(
         self,
         /, *,
         args: Optional[Tuple[Any, ...]] = None,
         kwargs: Optional[Dict[str, Any]] = None
     ) -> Any:
-        assert self.__latest is not None
-        with transaction_context(self._env, write = False):
-            target_digest, _ = self.__latest
-            if target_digest.startswith('bytecode'):
-                target = self.__bytecode_cache(target_digest)
-            else:
-                target = self.__module_cache(target_digest)
+        target = self.resolve()
         args = () if args is None else args
         kwargs = {} if kwargs is None else kwargs
         return target(*args, **kwargs)
 
     @property
-    def function(self) -> Optional[Callable[..., Any]]:
-        return self._target_function
+    def executor(self) -> str:
+        return getattr(self, '_Asyncable__executor', 'process')
 
-    def tasks(self) -> Iterator[Task]:
+    @property
+    def max_threads(self) -> int:
+        return getattr(self, '_Asyncable__max_threads', constants.DEFAULT_ASYNCABLE_MAX_THREADS)
+
+    def metrics(
+        self,
+        /, *,
+        percentiles: Tuple[float, ...] = (50., 90., 99.)
+    ) -> Optional[Dict[str, Dict[str, Any]]]:
         _, env, _, _, _, _ = get_environment_threadsafe(
             self.storage_path,
             constants.TASK_NAMESPACE,
             create = True
         )
+        database = get_metrics_database(env, self.site_uuid)
         with transaction_context(env, write = False) as (txn, _, _):
+            histograms = load_metrics(txn, database, self.uuid)
+        if not histograms:
+            return None
+        return {
+            name: summarize_histogram(histogram, percentiles = percentiles)
+            for name, histogram in histograms.items()
+        }
+
+    def clear_metrics(self):
+        _, env, _, _, _, _ = get_environment_threadsafe(
+            self.storage_path,
+            constants.TASK_NAMESPACE,
+            create = True
+        )
+        database = get_metrics_database(env, self.site_uuid)
+        with transaction_context(env, write = True) as (txn, _, _):
+            clear_metrics(txn, database, self.uuid)
+
+    @property
+    def function(self) -> Optional[Callable[..., Any]]:
+        return self._target_function
+
+    def _task_handles(self) -> Iterator[LazyEntity]:
+        _, env, name_db, _, _, descriptor_db = get_environment_threadsafe(
+            self.storage_path,
+            constants.TASK_NAMESPACE,
+            create = True
+        )
+        with transaction_context(env, write = False) as (txn, cursors, _):
             cursor = txn.cursor()
-            namespace = Namespace(constants.TASK_NAMESPACE, site_uuid = self.site_uuid)
             if cursor.set_range(self.uuid.encode('utf-8')):
                 while True:
                     key_bytes = cursor.key()
@@ -167,16 +234,23 @@ class Asyncable(Object):
                     key = key_bytes.decode('utf-8')
                     if key.startswith(self.uuid):
                         name = key.split(':')[1]
-                        try:
-                            entity = namespace.get(name)
-                            if isinstance(entity, Task):
-                                yield entity
-                        except (KeyError, ObjectNotFoundError):
-                            pass
+                        handle = load_lazy_entity(
+                            name_db, descriptor_db, cursors, self.site_uuid,
+                            constants.TASK_NAMESPACE, name
+                        )
+                        if handle is not None and issubclass(handle.type, Task):
+                            yield handle
                         if cursor.next():
                             continue
                     break
 
+    def tasks(self) -> Iterator[Task]:
+        for handle in self._task_handles():
+            try:
+                yield cast(Task, handle.bind())
+            except ObjectNotFoundError:
+                pass
+
     def __call__(
         self,
         *args,
@@ -196,8 +270,8 @@ class Asyncable(Object):
                 )
                 count = 0
                 with transaction_context(env, write = True):
-                    for task in self.tasks():
-                        if task.status in ['submitted', 'running']:
+                    for task in self._task_handles():
+                        if get_task_status(task) in ['submitted', 'running']:
                             count += 1
                             if count == self.__async_limit:
                                 return None
@@ -228,6 +302,8 @@ def asyncable(
     default_sync: Optional[bool] = None,
     async_limit: Optional[int] = None,
     disable_sync: Optional[bool] = None,
+    executor: Optional[str] = None,
+    max_threads: Optional[int] = None,
     site_uuid: Optional[str] = None
 ) -> Any:
 
@@ -247,7 +323,8 @@ def asyncable(
             path, target = target,
             default_sync = default_sync, metadata = metadata,
             site_uuid = site_uuid, async_limit = async_limit,
-            disable_sync = disable_sync
+            disable_sync = disable_sync, executor = executor,
+            max_threads = max_threads
         )
 
     target = None
@@ -0,0 +1,167 @@
+# pylint: disable = protected-access
+import logging
+import time
+
+from typing import (
+    Any, Dict, Iterator, List, Optional, Set, Tuple
+)
+
+import parkit.constants as constants
+
+from parkit.adapters.dict import Dict as StateDict
+from parkit.storage.context import transaction_context
+from parkit.utility import (
+    getenv,
+    polling_loop
+)
+
+logger = logging.getLogger(__name__)
+
+#
+# Group state is kept in a Dict in the same namespace as the Array, so claiming
+# a batch and committing an offset are transactional with the Array itself. For
+# each group it holds the committed offset, the next position to hand out and
+# the outstanding leases as start -> (consumer, stop, expiry). A lease that is
+# never committed is handed out again once it expires, or as soon as the same
+# consumer name reconnects. The Dict is named with constants.CONSUMER_PREFIX,
+# which compactify leaves alone.
+#
+class Consumer():
+
+    def __init__(
+        self,
+        source: Any,
+        group: str,
+        name: str,
+        /, *,
+        auto_commit: bool = True,
+        batch_size: int = 100,
+        lease: float = 30.0
+    ):
+        if batch_size <= 0 or lease <= 0:
+            raise ValueError()
+        self._source = source
+        self._group = group
+        self._name = name
+        self._auto_commit = auto_commit
+        self._batch_size = batch_size
+        self._lease = lease
+        self._delivered: Set[int] = set()
+        self._state = StateDict(
+            '/'.join([
+                source.namespace,
+                ''.join([constants.CONSUMER_PREFIX, source.uuid, '__'])
+            ]),
+            site_uuid = source.site_uuid, create = True
+        )
+
+    @property
+    def group(self) -> str:
+        return self._group
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def offset(self) -> int:
+        with transaction_context(self._source._env, write = False):
+            return self.__load()['offset']
+
+    @property
+    def lag(self) -> int:
+        with transaction_context(self._source._env, write = False):
+            _, tail = self._source._extent()
+            return max(tail - self.__load()['offset'], 0)
+
+    def __load(self) -> Dict[str, Any]:
+        state = self._state.get(self._group)
+        head, tail = self._source._extent()
+        if state is None or tail < state['next']:
+            state = dict(offset = head, next = head, leases = {})
+        return state
+
+    def __claim(self) -> List[Any]:
+        with transaction_context(self._source._env, write = True):
+            state = self.__load()
+            leases: Dict[int, Tuple[str, int, float]] = state['leases']
+            self._delivered.intersection_update([
+                start for start, (owner, _, _) in leases.items() if owner == self._name
+            ])
+            now = time.time()
+            while True:
+                start = next((
+                    start for start, (owner, _, expires) in sorted(leases.items())
+                    if expires <= now or owner == self._name and start not in self._delivered
+                ), None)
+                if start is None:
+                    entries = self._source._scan(state['next'], self._batch_size)
+                    if not entries:
+                        return []
+                    start = entries[0][0]
+                    stop = entries[-1][0] + 1
+                    state['next'] = stop
+                    break
+                stop = leases.pop(start)[1]
+                entries = [
+                    entry for entry in self._source._scan(start, stop - start)
+                    if entry[0] < stop
+                ]
+                if entries:
+                    break
+            leases[start] = (self._name, stop, now + self._lease)
+            state['offset'] = min(leases, default = state['next'])
+            self._state[self._group] = state
+            self._delivered.add(start)
+        return [value for _, value in entries]
+
+    def poll(
+        self,
+        timeout: Optional[float] = 0
+    ) -> List[Any]:
+        if self._auto_commit:
+            self.commit()
+        batch = self.__claim()
+        if batch or timeout == 0:
+            return batch
+        try:
+            for _ in polling_loop(
+                getenv(constants.ADAPTER_POLLING_INTERVAL_ENVNAME, float),
+                timeout = timeout
+            ):
+                batch = self.__claim()
+                if batch:
+                    return batch
+        except TimeoutError:
+            pass
+        return []
+
+    def commit(self):
+        if not self._delivered:
+            return
+        with transaction_context(self._source._env, write = True):
+            state = self.__load()
+            leases = state['leases']
+            for start in self._delivered:
+                if start in leases and leases[start][0] == self._name:
+                    del leases[start]
+            state['offset'] = min(leases, default = state['next'])
+            self._state[self._group] = state
+        self._delivered = set()
+
+    def seek(
+        self,
+        offset: int,
+        /
+    ):
+        with transaction_context(self._source._env, write = True):
+            self._state[self._group] = dict(offset = offset, next = offset, leases = {})
+        self._delivered = set()
+
+    def close(self):
+        if self._auto_commit:
+            self.commit()
+
+    def __iter__(self) -> Iterator[Any]:
+        while True:
+            yield from self.poll(timeout = None)
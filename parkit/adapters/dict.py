@@ -1,29 +1,147 @@
 # pylint: disable = broad-except, not-callable, no-self-use, unused-import
+import atexit
+import collections
 import collections.abc
+import itertools
 import logging
+import math
 import pickle
+import struct
+import threading
 import types
 import typing
+import uuid
 
 from typing import (
-    Any, ByteString, Callable, cast, Iterable, Iterator, MutableMapping,
+    Any, ByteString, Callable, cast, Iterable, Iterator, List, MutableMapping,
     Optional, Tuple, Union
 )
 
+import cloudpickle
+import lmdb
+import orjson
+
+import parkit.constants as constants
 import parkit.storage.threadlocal as thread
 
 from parkit.adapters.sized import Sized
+from parkit.compression import Codec
 from parkit.storage.context import transaction_context
+from parkit.storage.database import (
+    get_database_threadsafe,
+    open_database_threadsafe
+)
+from parkit.storage.entity import (
+    bump_schema_stamp,
+    evict_bind_cache,
+    get_schema_stamp
+)
 from parkit.storage.entitymeta import (
     ClassBuilder,
     Missing
 )
-from parkit.utility import compile_function
+from parkit.typeddicts import LMDBProperties
+from parkit.utility import (
+    compile_function,
+    create_string_digest
+)
 
 logger = logging.getLogger(__name__)
 
 unspecified_class = types.new_class('__unspecified__')
 
+index_properties: LMDBProperties = {'dupsort': True}
+
+#
+# Hits on bounded lru or lfu dicts are counted in memory while reading and
+# applied inside the next write transaction on the same dict, through any
+# handle in the process, or at exit. A read inside an explicit write
+# transaction ranks the key right away. Once a buffer is full, hits on keys
+# not already in it are dropped.
+#
+pending_touches: typing.Dict[
+    Tuple[str, bytes], Tuple['Dict', typing.Counter[bytes]]
+] = {}
+
+pending_touches_lock = threading.Lock()
+
+def flush_touches_atexit():
+    with pending_touches_lock:
+        objs = [obj for obj, _ in pending_touches.values()]
+    for obj in objs:
+        try:
+            with transaction_context(obj._env, write = True) as (txn, _, _):
+                obj._flush_touches(txn)
+        except Exception:
+            logger.exception('flush touches error')
+
+atexit.register(flush_touches_atexit)
+
+def encode_ordered_key(value: Any) -> bytes:
+    if isinstance(value, int) and -2**63 <= value < 2**63:
+        return b''.join([b'\x01', struct.pack('>Q', value + 2**63)])
+    if isinstance(value, float):
+        bits = struct.unpack('>Q', struct.pack('>d', value))[0]
+        bits = bits ^ 0xFFFFFFFFFFFFFFFF if bits & 2**63 else bits | 2**63
+        return b''.join([b'\x02', struct.pack('>Q', bits)])
+    if isinstance(value, str):
+        return b''.join([b'\x03', value.encode('utf-8')])
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return b''.join([b'\x04', bytes(value)])
+    return b''.join([b'\xff', pickle.dumps(value)])
+
+class DictIndex():
+
+    def __init__(
+        self,
+        owner: 'Dict',
+        name: str,
+        database: Any
+    ):
+        self._owner = owner
+        self._name = name
+        self._database = database
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def get(
+        self,
+        value: Any,
+        /
+    ) -> List[Any]:
+        owner = self._owner
+        index_key = owner.encode_index_key(value)
+        keys = []
+        with transaction_context(owner._env, write = False) as (_, cursors, _):
+            cursor = cursors[self._database]
+            if cursor.set_key(index_key):
+                for key_bytes in cursor.iternext_dup(keys = False, values = True):
+                    keys.append(owner.decode_key(key_bytes) if owner.decode_key else bytes(key_bytes))
+        return keys
+
+    def irange(
+        self,
+        lo: Any = None,
+        hi: Any = None,
+        /
+    ) -> Iterator[Any]:
+        owner = self._owner
+        lo_key = owner.encode_index_key(lo) if lo is not None else None
+        hi_key = owner.encode_index_key(hi) if hi is not None else None
+        with transaction_context(owner._env, write = False, iterator = True) as (_, cursors, _):
+            cursor = cursors[self._database]
+            if not (cursor.set_range(lo_key) if lo_key is not None else cursor.first()):
+                return
+            while True:
+                if hi_key is not None and bytes(cursor.key()) > hi_key:
+                    return
+                key_bytes = cursor.value()
+                yield owner.decode_key(key_bytes) if owner.decode_key else bytes(key_bytes)
+                if not cursor.next():
+                    return
+
 def mkiter(
     keys: bool = True,
     values: bool = False
@@ -81,8 +199,21 @@ class DictMeta(ClassBuilder):
 
 class Dict(Sized, metaclass = DictMeta):
 
+    _maxsize_cached = math.inf
+
+    _policy_cached = 'fifo'
+
+    _codec: Optional[Codec] = None
+
+    _index_stamp: Optional[bytes] = b''
+
+    _index_list: List[Tuple[str, Any, Callable[..., Any]]] = []
+
     get_metadata: Optional[Callable[..., Any]] = None
 
+    encode_index_key: Callable[..., bytes] = \
+    cast(Callable[..., bytes], staticmethod(encode_ordered_key))
+
     decode_key: Optional[Callable[..., Any]] = \
     cast(Callable[..., Any], staticmethod(pickle.loads))
 
@@ -101,17 +232,369 @@ class Dict(Sized, metaclass = DictMeta):
         /,*,
         metadata: Optional[typing.Dict[str, Any]] = None,
         site_uuid: Optional[str] = None,
+        db_properties: Optional[List[LMDBProperties]] = None,
         on_init: Optional[Callable[[bool], None]] = None,
         create: bool = False,
-        bind: bool = True
+        bind: bool = True,
+        maxsize: int = 0,
+        policy: str = 'lru',
+        compression: Optional[Union[str, Codec]] = None
     ):
+        if policy not in ('lru', 'lfu', 'fifo'):
+            raise ValueError()
+        if maxsize > 0 and db_properties and len(db_properties) < 3:
+            raise ValueError()
+
+        codec = Codec.from_settings(compression) if compression else None
+
+        def _on_init(created: bool):
+            if created and maxsize > 0:
+                self.__bounds = (maxsize, policy)
+            if created and codec:
+                self.__compression = codec.settings
+            if on_init:
+                on_init(created)
+
         super().__init__(
-            path, db_properties = [{}, {}],
-            on_init = on_init, metadata = metadata,
+            path, db_properties = db_properties if db_properties else (
+                [{}, {}, {}] if maxsize > 0 else [{}, {}]
+            ),
+            on_init = _on_init, metadata = metadata,
             site_uuid = site_uuid,
             create = create, bind = bind
         )
 
+        self.__load_settings()
+
+        if maxsize > 0 and (self._maxsize_cached, self._policy_cached) != (maxsize, policy):
+            raise ValueError()
+
+    def __setstate__(self, from_wire: Any):
+        super().__setstate__(from_wire)
+        self.__load_settings()
+
+    def __load_settings(self):
+        try:
+            txn, _, _, implicit = \
+            thread.local.context.get(self._env, write = False, internal = True)
+            bounds = txn.get(
+                key = b''.join([self._uuid_bytes, self.encode_attr_key('_Dict__bounds')]),
+                db = self._attrdb
+            )
+            if bounds is not None:
+                self._maxsize_cached, self._policy_cached = self.decode_attr_value(bounds)
+            compression = txn.get(
+                key = b''.join([self._uuid_bytes, self.encode_attr_key('_Dict__compression')]),
+                db = self._attrdb
+            )
+            if compression is not None:
+                self._codec = Codec.from_settings(self.decode_attr_value(compression))
+                self.encode_value, self.decode_value = self._codec.wrap(
+                    type(self).encode_value, type(self).decode_value
+                )
+            if implicit:
+                txn.commit()
+        except BaseException as exc:
+            self._abort(exc, txn, implicit)
+
+    @property
+    def compression(self) -> Optional[str]:
+        return self._codec.codec if self._codec else None
+
+    @property
+    def maxsize(self) -> Optional[int]:
+        return int(self._maxsize_cached) if self._maxsize_cached != math.inf else None
+
+    @property
+    def policy(self) -> Optional[str]:
+        return self._policy_cached if self._maxsize_cached != math.inf else None
+
+    def __next_rank(
+        self,
+        txn: lmdb.Transaction,
+        frequency: int
+    ) -> bytes:
+        counter = txn.get(key = b'c', db = self._userdb[2])
+        sequence = struct.unpack('>Q', counter)[0] + 1 if counter is not None else 0
+        assert txn.put(key = b'c', value = struct.pack('>Q', sequence), db = self._userdb[2])
+        return struct.pack('>QQ', frequency, sequence)
+
+    def _rank(
+        self,
+        txn: lmdb.Transaction,
+        key_bytes: ByteString,
+        inserted: bool,
+        hits: int = 1
+    ):
+        rank_key = b''.join([b'k', key_bytes])
+        if inserted:
+            rank = self.__next_rank(txn, 1 if self._policy_cached == 'lfu' else 0)
+        elif self._policy_cached == 'fifo':
+            return
+        else:
+            rank = txn.get(key = rank_key, db = self._userdb[2])
+            if rank is None:
+                return
+            rank = bytes(rank)
+            txn.delete(key = b''.join([b'r', rank, key_bytes]), db = self._userdb[2])
+            rank = self.__next_rank(
+                txn, struct.unpack('>Q', rank[:8])[0] + hits \
+                if self._policy_cached == 'lfu' else 0
+            )
+        assert txn.put(key = rank_key, value = rank, db = self._userdb[2])
+        assert txn.put(key = b''.join([b'r', rank, key_bytes]), value = b'', db = self._userdb[2])
+
+    def _unrank(
+        self,
+        txn: lmdb.Transaction,
+        key_bytes: ByteString
+    ):
+        rank_key = b''.join([b'k', key_bytes])
+        rank = txn.get(key = rank_key, db = self._userdb[2])
+        if rank is not None:
+            rank = bytes(rank)
+            txn.delete(key = rank_key, db = self._userdb[2])
+            txn.delete(key = b''.join([b'r', rank, key_bytes]), db = self._userdb[2])
+
+    def _evict(
+        self,
+        txn: lmdb.Transaction,
+        cursors: thread.CursorDict,
+        keep: Iterable[ByteString] = ()
+    ):
+        excess = txn.stat(self._userdb[0])['entries'] - self._maxsize_cached
+        if excess <= 0:
+            return
+        keep = set(bytes(key_bytes) for key_bytes in keep)
+        victims: List[bytes] = []
+        kept: List[bytes] = []
+        cursor = cursors[self._userdb[2]]
+        if cursor.set_range(b'r'):
+            while len(victims) < excess:
+                entry = bytes(cursor.key())
+                if not entry.startswith(b'r'):
+                    break
+                (kept if entry[17:] in keep else victims).append(entry)
+                if not cursor.next():
+                    break
+        victims.extend(kept[:max(0, int(excess) - len(victims))])
+        indexes = self._get_indexes(txn)
+        for entry in victims:
+            key_bytes = entry[17:]
+            txn.delete(key = entry, db = self._userdb[2])
+            txn.delete(key = b''.join([b'k', key_bytes]), db = self._userdb[2])
+            if indexes:
+                self._unindex(txn, indexes, key_bytes)
+            txn.delete(key = key_bytes, db = self._userdb[0])
+            if self.get_metadata:
+                txn.delete(key = key_bytes, db = self._userdb[1])
+
+    def _touch(self, key_bytes: ByteString):
+        stack = thread.local.context.stacks[self._env]
+        if stack and stack[-1].write and not stack[-1].iterator:
+            self._flush_touches(stack[-1].transaction)
+            self._rank(stack[-1].transaction, key_bytes, False)
+            return
+        key_bytes = bytes(key_bytes)
+        with pending_touches_lock:
+            entry = pending_touches.get((self._site_uuid, self._uuid_bytes))
+            if entry is None:
+                entry = pending_touches[(self._site_uuid, self._uuid_bytes)] = \
+                (self, collections.Counter())
+            touches = entry[1]
+            if key_bytes in touches or \
+            len(touches) < constants.DICT_ACCESS_BUFFER_SIZE:
+                touches[key_bytes] += 1
+
+    def _discard_touches(self) -> Optional[typing.Counter[bytes]]:
+        if not pending_touches:
+            return None
+        with pending_touches_lock:
+            entry = pending_touches.pop((self._site_uuid, self._uuid_bytes), None)
+        return entry[1] if entry is not None else None
+
+    def _flush_touches(self, txn: lmdb.Transaction):
+        touches = self._discard_touches()
+        if touches:
+            for key_bytes, hits in touches.items():
+                self._rank(txn, key_bytes, False, hits)
+
+    def __catalog_key(self) -> bytes:
+        return b''.join([
+            self._uuid_bytes,
+            self.encode_attr_key('_Dict__indexes_binary')
+        ])
+
+    def _get_indexes(
+        self,
+        txn: lmdb.Transaction
+    ) -> List[Tuple[str, Any, Callable[..., Any]]]:
+        #
+        # The catalog only changes with create_index and drop_index, which
+        # bump the schema stamp, so a write normally costs one small read.
+        #
+        stamp = get_schema_stamp(txn, self._namedb, self._encname)
+        if stamp != self._index_stamp:
+            catalog = txn.get(key = self.__catalog_key(), db = self._attrdb)
+            stale = [database for _, database, _ in self._index_list]
+            indexes = []
+            if catalog is not None:
+                for name, (dbuid, key_func) in cloudpickle.loads(catalog).items():
+                    database = get_database_threadsafe(dbuid)
+                    if database is None:
+                        database = open_database_threadsafe(
+                            txn, self._env, dbuid, index_properties, create = False
+                        )
+                    indexes.append((name, database, cloudpickle.loads(key_func)))
+            self._userdb = [database for database in self._userdb if database not in stale]
+            for _, database, _ in indexes:
+                if database not in self._userdb:
+                    self._userdb.append(database)
+            self._index_stamp = stamp
+            self._index_list = indexes
+        return self._index_list
+
+    def _decode_entry(
+        self,
+        txn: lmdb.Transaction,
+        key_bytes: ByteString,
+        data: ByteString
+    ) -> Any:
+        if not self.decode_value:
+            return bytes(data)
+        if self.get_metadata:
+            return self.decode_value(
+                data, pickle.loads(txn.get(key = key_bytes, db = self._userdb[1]))
+            )
+        return self.decode_value(data)
+
+    def _index(
+        self,
+        txn: lmdb.Transaction,
+        indexes: List[Tuple[str, Any, Callable[..., Any]]],
+        key_bytes: ByteString,
+        value: Any
+    ):
+        for _, database, key_func in indexes:
+            index_value = key_func(value)
+            if index_value is not None:
+                txn.put(
+                    key = self.encode_index_key(index_value), value = key_bytes,
+                    dupdata = True, db = database
+                )
+
+    def _unindex(
+        self,
+        txn: lmdb.Transaction,
+        indexes: List[Tuple[str, Any, Callable[..., Any]]],
+        key_bytes: ByteString
+    ):
+        data = txn.get(key = key_bytes, db = self._userdb[0])
+        if data is None:
+            return
+        value = self._decode_entry(txn, key_bytes, data)
+        for _, database, key_func in indexes:
+            index_value = key_func(value)
+            if index_value is not None:
+                txn.delete(
+                    key = self.encode_index_key(index_value), value = key_bytes,
+                    db = database
+                )
+
+    @property
+    def indexes(self) -> List[str]:
+        with transaction_context(self._env, write = False) as (txn, _, _):
+            catalog = txn.get(key = self.__catalog_key(), db = self._attrdb)
+            if catalog is None:
+                return []
+            return list(cloudpickle.loads(bytes(catalog)).keys())
+
+    def index(self, name: str, /) -> DictIndex:
+        with transaction_context(self._env, write = False) as (txn, _, _):
+            catalog = txn.get(key = self.__catalog_key(), db = self._attrdb)
+            catalog = cloudpickle.loads(bytes(catalog)) if catalog is not None else {}
+        if name not in catalog:
+            raise KeyError()
+        dbuid, _ = catalog[name]
+        database = get_database_threadsafe(dbuid)
+        if database is None:
+            with transaction_context(self._env, write = True) as (txn, _, _):
+                database = open_database_threadsafe(
+                    txn, self._env, dbuid, index_properties, create = False
+                )
+        return DictIndex(self, name, database)
+
+    def create_index(
+        self,
+        name: str,
+        key_func: Callable[[Any], Any],
+        /
+    ) -> DictIndex:
+        with transaction_context(self._env, write = True) as (txn, cursors, _):
+            catalog = txn.get(key = self.__catalog_key(), db = self._attrdb)
+            catalog = cloudpickle.loads(bytes(catalog)) if catalog is not None else {}
+            if name in catalog:
+                raise ValueError()
+            dbuid = create_string_digest(''.join([str(uuid.uuid4()), name]))
+            database = open_database_threadsafe(
+                txn, self._env, dbuid, index_properties, create = True
+            )
+            descriptor = self.descriptor
+            descriptor['databases'].append((dbuid, index_properties))
+            assert txn.put(key = self._uuid_bytes, value = orjson.dumps(descriptor), db = self._descdb)
+            bump_schema_stamp(txn, self._namedb, self._encname)
+            catalog[name] = (dbuid, cloudpickle.dumps(key_func))
+            self.__indexes_binary = cloudpickle.dumps(catalog)
+            evict_bind_cache(self._site_uuid, self._namespace, self._encname)
+            entries = []
+            data_cursor = cursors[self._userdb[0]]
+            for key_bytes, data in data_cursor.iternext(keys = True, values = True):
+                index_value = key_func(self._decode_entry(txn, key_bytes, data))
+                if index_value is not None:
+                    entries.append((self.encode_index_key(index_value), bytes(key_bytes)))
+            entries.sort()
+            cursors[database].putmulti(entries, dupdata = True)
+        return DictIndex(self, name, database)
+
+    def drop_index(self, name: str, /):
+        with transaction_context(self._env, write = True) as (txn, _, _):
+            catalog = txn.get(key = self.__catalog_key(), db = self._attrdb)
+            catalog = cloudpickle.loads(bytes(catalog)) if catalog is not None else {}
+            if name not in catalog:
+                raise KeyError()
+            dbuid, _ = catalog.pop(name)
+            database = get_database_threadsafe(dbuid)
+            if database is None:
+                database = open_database_threadsafe(
+                    txn, self._env, dbuid, index_properties, create = False
+                )
+            txn.drop(database, delete = True)
+            descriptor = self.descriptor
+            descriptor['databases'] = [
+                (uid, properties) for uid, properties in descriptor['databases']
+                if uid != dbuid
+            ]
+            assert txn.put(key = self._uuid_bytes, value = orjson.dumps(descriptor), db = self._descdb)
+            bump_schema_stamp(txn, self._namedb, self._encname)
+            if catalog:
+                self.__indexes_binary = cloudpickle.dumps(catalog)
+            else:
+                del self.__indexes_binary
+            evict_bind_cache(self._site_uuid, self._namespace, self._encname)
+            self._get_indexes(txn)
+
+    def clear(self):
+        with transaction_context(self._env, write = True) as (txn, _, _):
+            self._get_indexes(txn)
+            super().clear()
+        self._discard_touches()
+
+    def drop(self):
+        with transaction_context(self._env, write = True) as (txn, _, _):
+            self._get_indexes(txn)
+            super().drop()
+        self._discard_touches()
+
     def __getitem__(
         self,
         key: Any,
@@ -131,8 +614,11 @@ class Dict(Sized, metaclass = DictMeta):
             self._abort(exc, txn, implicit)
         if data is None:
             raise KeyError()
-        return (self.decode_value(data, meta) if self.get_metadata else self.decode_value(data)) \
+        value = (self.decode_value(data, meta) if self.get_metadata else self.decode_value(data)) \
         if self.decode_value else data
+        if self._maxsize_cached != math.inf and self._policy_cached != 'fifo':
+            self._touch(key_bytes)
+        return value
 
     def get(
         self,
@@ -154,8 +640,11 @@ class Dict(Sized, metaclass = DictMeta):
             self._abort(exc, txn, implicit)
         if data is None:
             return default
-        return (self.decode_value(data, meta) if self.get_metadata else self.decode_value(data)) \
+        value = (self.decode_value(data, meta) if self.get_metadata else self.decode_value(data)) \
         if self.decode_value else data
+        if self._maxsize_cached != math.inf and self._policy_cached != 'fifo':
+            self._touch(key_bytes)
+        return value
 
     def setdefault(
         self,
@@ -167,12 +656,16 @@ class Dict(Sized, metaclass = DictMeta):
         try:
             txn, cursors, changed, implicit = \
             thread.local.context.get(self._env, write = True, internal = True)
+            if self._maxsize_cached != math.inf:
+                self._flush_touches(txn)
             cursor = cursors[self._userdb[0]]
             result = cursor.set_key(key_bytes)
             if result:
                 data = cursor.value()
                 meta = pickle.loads(txn.get(key = key_bytes, db = self._userdb[1])) \
                 if self.get_metadata else None
+                if self._maxsize_cached != math.inf:
+                    self._rank(txn, key_bytes, False)
             else:
                 data = self.encode_value(default) if self.encode_value else default
                 meta = pickle.dumps(self.get_metadata(default)) if self.get_metadata else None
@@ -182,6 +675,12 @@ class Dict(Sized, metaclass = DictMeta):
                         key = key_bytes, value = meta, overwrite = True, append = False,
                         db = self._userdb[1]
                     )
+                indexes = self._get_indexes(txn)
+                if indexes:
+                    self._index(txn, indexes, key_bytes, default)
+                if self._maxsize_cached != math.inf:
+                    self._rank(txn, key_bytes, True)
+                    self._evict(txn, cursors, (key_bytes,))
                 if implicit:
                     self._increment_version(cursors)
                 else:
@@ -199,10 +698,19 @@ class Dict(Sized, metaclass = DictMeta):
         try:
             txn, cursors, changed, implicit = \
             thread.local.context.get(self._env, write = True, internal = True)
+            if self._maxsize_cached != math.inf:
+                self._flush_touches(txn)
             cursor = cursors[self._userdb[0]]
             result = cursor.last()
             if result:
                 key = cursor.key()
+                indexes = self._get_indexes(txn)
+                if indexes or self._maxsize_cached != math.inf:
+                    key = bytes(key)
+                if indexes:
+                    self._unindex(txn, indexes, key)
+                if self._maxsize_cached != math.inf:
+                    self._unrank(txn, key)
                 data = cursor.pop(key)
                 meta = pickle.loads(txn.pop(key = key, db = self._userdb[1])) \
                 if self.get_metadata else None
@@ -233,6 +741,12 @@ class Dict(Sized, metaclass = DictMeta):
             txn, cursors, changed, implicit = \
             thread.local.context.get(self._env, write = True, internal = True)
             cursor = cursors[self._userdb[0]]
+            indexes = self._get_indexes(txn)
+            if indexes:
+                self._unindex(txn, indexes, key_bytes)
+            if self._maxsize_cached != math.inf:
+                self._flush_touches(txn)
+                self._unrank(txn, key_bytes)
             data = cursor.pop(key_bytes)
             if data is not None:
                 meta = pickle.loads(txn.pop(key = key_bytes, db = self._userdb[1])) \
@@ -261,6 +775,12 @@ class Dict(Sized, metaclass = DictMeta):
         try:
             txn, cursors, changed, implicit = \
             thread.local.context.get(self._env, write = True, internal = True)
+            indexes = self._get_indexes(txn)
+            if indexes:
+                self._unindex(txn, indexes, key_bytes)
+            if self._maxsize_cached != math.inf:
+                self._flush_touches(txn)
+                self._unrank(txn, key_bytes)
             result = txn.delete(key = key_bytes, db = self._userdb[0])
             if result and self.get_metadata:
                 assert txn.delete(key = key_bytes, db = self._userdb[1])
@@ -295,6 +815,97 @@ class Dict(Sized, metaclass = DictMeta):
                 cursor.close()
         return result
 
+    def get_many(
+        self,
+        keys: Iterable[Any],
+        /,
+        default: Any = None
+    ) -> List[Any]:
+        keys_bytes = [self.encode_key(key) if self.encode_key else key for key in keys]
+        results = [default] * len(keys_bytes)
+        found = []
+        try:
+            txn, cursors, _, implicit = \
+            thread.local.context.get(self._env, write = False, internal = True)
+            cursor = cursors[self._userdb[0]]
+            for position in sorted(range(len(keys_bytes)), key = keys_bytes.__getitem__):
+                if cursor.set_key(keys_bytes[position]):
+                    results[position] = self._decode_entry(
+                        txn, keys_bytes[position], cursor.value()
+                    )
+                    found.append(keys_bytes[position])
+            if implicit:
+                txn.commit()
+        except BaseException as exc:
+            self._abort(exc, txn, implicit)
+        finally:
+            if implicit and cursor:
+                cursor.close()
+        if self._maxsize_cached != math.inf and self._policy_cached != 'fifo':
+            for key_bytes in found:
+                self._touch(key_bytes)
+        return results
+
+    def contains_many(
+        self,
+        keys: Iterable[Any],
+        /
+    ) -> List[bool]:
+        keys_bytes = [self.encode_key(key) if self.encode_key else key for key in keys]
+        results = [False] * len(keys_bytes)
+        try:
+            txn, cursors, _, implicit = \
+            thread.local.context.get(self._env, write = False, internal = True)
+            cursor = cursors[self._userdb[0]]
+            for position in sorted(range(len(keys_bytes)), key = keys_bytes.__getitem__):
+                results[position] = cursor.set_key(keys_bytes[position])
+            if implicit:
+                txn.commit()
+        except BaseException as exc:
+            self._abort(exc, txn, implicit)
+        finally:
+            if implicit and cursor:
+                cursor.close()
+        return results
+
+    def delete_many(
+        self,
+        keys: Iterable[Any],
+        /
+    ) -> int:
+        keys_bytes = sorted(set(self.encode_key(key) if self.encode_key else key for key in keys))
+        deleted = 0
+        try:
+            txn, cursors, changed, implicit = \
+            thread.local.context.get(self._env, write = True, internal = True)
+            indexes = self._get_indexes(txn)
+            if self._maxsize_cached != math.inf:
+                self._flush_touches(txn)
+            cursor = cursors[self._userdb[0]]
+            for key_bytes in keys_bytes:
+                if not cursor.set_key(key_bytes):
+                    continue
+                if indexes:
+                    self._unindex(txn, indexes, key_bytes)
+                if self._maxsize_cached != math.inf:
+                    self._unrank(txn, key_bytes)
+                if self.get_metadata:
+                    txn.delete(key = key_bytes, db = self._userdb[1])
+                assert cursor.delete()
+                deleted += 1
+            if implicit:
+                if deleted:
+                    self._increment_version(cursors)
+                txn.commit()
+            elif deleted:
+                changed.add(self)
+        except BaseException as exc:
+            self._abort(exc, txn, implicit)
+        finally:
+            if implicit and cursor:
+                cursor.close()
+        return deleted
+
     def __setitem__(
         self,
         key: Any,
@@ -307,6 +918,12 @@ class Dict(Sized, metaclass = DictMeta):
         try:
             txn, cursors, changed, implicit = \
             thread.local.context.get(self._env, write = True, internal = True)
+            indexes = self._get_indexes(txn)
+            if indexes:
+                self._unindex(txn, indexes, key_bytes)
+            if self._maxsize_cached != math.inf:
+                self._flush_touches(txn)
+                inserted = txn.get(key = key_bytes, db = self._userdb[0]) is None
             result = txn.put(
                 key = key_bytes, value = value_bytes, overwrite = True, append = False,
                 db = self._userdb[0]
@@ -316,6 +933,11 @@ class Dict(Sized, metaclass = DictMeta):
                     key = key_bytes, value = meta, overwrite = True, append = False,
                     db = self._userdb[1]
             )
+            if result and indexes:
+                self._index(txn, indexes, key_bytes, value)
+            if result and self._maxsize_cached != math.inf:
+                self._rank(txn, key_bytes, inserted)
+                self._evict(txn, cursors, (key_bytes,))
             if implicit:
                 if result:
                     self._increment_version(cursors)
@@ -325,75 +947,39 @@ class Dict(Sized, metaclass = DictMeta):
         except BaseException as exc:
             self._abort(exc, txn, implicit)
 
-    def update(
+    def _update_chunk(
         self,
-        *args: Union[
-            Tuple[()],
-            Tuple[Union[typing.Dict[Any, Any], MutableMapping[Any, Any], Iterable[Tuple[Any, Any]]]]
-        ],
-        **kwargs: typing.Dict[Any, Any]
+        entries: typing.Dict[Any, Tuple[Any, Optional[bytes], Any]]
     ):
-        dict_items = iter_items = None
-        consumed = added = 0
-        if args and isinstance(args[0], dict):
-            dict_items = [
-                (
-                    self.encode_key(key) if self.encode_key else key,
-                    (self.encode_value(value) if self.encode_value else value,
-                    pickle.dumps(self.get_metadata(value)) if self.get_metadata else None)
-                )
-                for key, value in args[0].items()
-            ]
-        elif args and isinstance(args[0], collections.abc.MutableMapping):
-            iter_items = [
-                (
-                    self.encode_key(key) if self.encode_key else key,
-                    (self.encode_value(value) if self.encode_value else value,
-                    pickle.dumps(self.get_metadata(value)) if self.get_metadata else None)
-                )
-                for key, value in args[0].items()
-            ]
-        elif args:
-            iter_items = [
-                (
-                    self.encode_key(key) if self.encode_key else key,
-                    (self.encode_value(value) if self.encode_value else value,
-                    pickle.dumps(self.get_metadata(value)) if self.get_metadata else None)
-                )
-                for key, value in args[0]
-            ]
-        kwargs_items = [
-            (
-                self.encode_key(key) if self.encode_key else key,
-                (self.encode_value(value) if self.encode_value else value,
-                pickle.dumps(self.get_metadata(value)) if self.get_metadata else None)
-            )
-            for key, value in kwargs.items()
-        ]
         try:
             txn, cursors, changed, implicit = \
             thread.local.context.get(self._env, write = True, internal = True)
-            cursor = cursors[self._userdb[0]]
-            if dict_items:
-                cons, add = cursor.putmulti([(key, value[0]) for key, value in dict_items])
-                consumed += cons
-                added += add
-            if kwargs_items:
-                cons, add = cursor.putmulti([(key, value[0]) for key, value in kwargs_items])
-                consumed += cons
-                added += add
-            if iter_items:
-                cons, add = cursor.putmulti([(key, value[0]) for key, value in iter_items])
-                consumed += cons
-                added += add
+            indexes = self._get_indexes(txn)
+            bounded = self._maxsize_cached != math.inf
+            if indexes:
+                for key_bytes in entries:
+                    self._unindex(txn, indexes, key_bytes)
+            if bounded:
+                self._flush_touches(txn)
+                inserted = {
+                    key_bytes: txn.get(key = key_bytes, db = self._userdb[0]) is None
+                    for key_bytes in entries
+                }
+            ordered = sorted(entries)
+            _, added = cursors[self._userdb[0]].putmulti(
+                [(key_bytes, entries[key_bytes][0]) for key_bytes in ordered]
+            )
             if self.get_metadata:
-                cursor = cursors[self._userdb[1]]
-                if dict_items:
-                    cursor.putmulti([(key, value[1]) for key, value in dict_items])
-                if kwargs_items:
-                    cursor.putmulti([(key, value[1]) for key, value in kwargs_items])
-                if iter_items:
-                    cursor.putmulti([(key, value[1]) for key, value in iter_items])
+                cursors[self._userdb[1]].putmulti(
+                    [(key_bytes, entries[key_bytes][1]) for key_bytes in ordered]
+                )
+            if indexes:
+                for key_bytes, (_, _, value) in entries.items():
+                    self._index(txn, indexes, key_bytes, value)
+            if bounded and entries:
+                for key_bytes in entries:
+                    self._rank(txn, key_bytes, inserted[key_bytes])
+                self._evict(txn, cursors, entries.keys())
             if implicit:
                 if added:
                     self._increment_version(cursors)
@@ -403,6 +989,48 @@ class Dict(Sized, metaclass = DictMeta):
         except BaseException as exc:
             self._abort(exc, txn, implicit)
 
+    def update(
+        self,
+        *args: Union[
+            Tuple[()],
+            Tuple[Union[typing.Dict[Any, Any], MutableMapping[Any, Any], Iterable[Tuple[Any, Any]]]]
+        ],
+        chunk_size: int = constants.DICT_UPDATE_CHUNK_SIZE,
+        atomic: bool = False,
+        **kwargs: typing.Dict[Any, Any]
+    ):
+        if chunk_size <= 0:
+            raise ValueError()
+        if args and isinstance(args[0], (dict, collections.abc.Mapping)):
+            items = itertools.chain(args[0].items(), kwargs.items())
+        else:
+            items = itertools.chain(args[0] if args else (), kwargs.items())
+        chunks = self.__encode_chunks(items, chunk_size)
+        if atomic:
+            with transaction_context(self._env, write = True):
+                for entries in chunks:
+                    self._update_chunk(entries)
+        else:
+            for entries in chunks:
+                self._update_chunk(entries)
+
+    def __encode_chunks(
+        self,
+        items: Iterator[Tuple[Any, Any]],
+        chunk_size: int
+    ) -> Iterator[typing.Dict[Any, Tuple[Any, Optional[bytes], Any]]]:
+        while True:
+            entries = {}
+            for key, value in itertools.islice(items, chunk_size):
+                entries[self.encode_key(key) if self.encode_key else key] = (
+                    self.encode_value(value) if self.encode_value else value,
+                    pickle.dumps(self.get_metadata(value)) if self.get_metadata else None,
+                    value
+                )
+            if not entries:
+                return
+            yield entries
+
     __iter__: Callable[..., Iterator[Any]] = Missing()
 
     keys: Callable[..., Iterator[Any]] = Missing()
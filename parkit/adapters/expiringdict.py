@@ -0,0 +1,351 @@
+# pylint: disable = broad-except
+import logging
+import math
+import struct
+import time
+import typing
+
+from typing import (
+    Any, ByteString, Callable, Iterable, Iterator, List, Optional, Tuple,
+    Union
+)
+
+import lmdb
+
+from parkit.adapters.dict import (
+    Dict,
+    unspecified_class
+)
+from parkit.compression import Codec
+from parkit.storage.context import transaction_context
+from parkit.storage.threadlocal import CursorDict
+
+logger = logging.getLogger(__name__)
+
+#
+# Expiry times live in an auxiliary database under two key spaces:
+# b'k' + key -> expiry, used to hide expired keys on read, and
+# b't' + expiry + key -> b'', a time-ordered index used to sweep in bulk.
+#
+class ExpiringDict(Dict):
+
+    _ttl_cached: Optional[float] = None
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        /, *,
+        metadata: Optional[typing.Dict[str, Any]] = None,
+        site_uuid: Optional[str] = None,
+        on_init: Optional[Callable[[bool], None]] = None,
+        create: bool = False,
+        bind: bool = True,
+        ttl: Optional[float] = None,
+        compression: Optional[Union[str, Codec]] = None
+    ):
+        self.__ttl: Optional[float]
+
+        def _on_init(created: bool):
+            if created:
+                self.__ttl = ttl if ttl is not None and 0 < ttl < math.inf else None
+            if on_init:
+                on_init(created)
+
+        super().__init__(
+            path, db_properties = [{}, {}, {}],
+            on_init = _on_init, metadata = metadata,
+            site_uuid = site_uuid,
+            create = create, bind = bind, compression = compression
+        )
+
+        self._ttl_cached = self.__ttl
+
+    def __setstate__(self, from_wire: Any):
+        super().__setstate__(from_wire)
+        self._ttl_cached = self.__ttl
+
+    @property
+    def ttl(self) -> Optional[float]:
+        return self._ttl_cached
+
+    def _expired(
+        self,
+        txn: lmdb.Transaction,
+        key_bytes: ByteString
+    ) -> bool:
+        expires = txn.get(key = b''.join([b'k', key_bytes]), db = self._userdb[2])
+        return expires is not None and struct.unpack('>Q', expires)[0] <= time.time_ns()
+
+    def _set_expiry(
+        self,
+        txn: lmdb.Transaction,
+        key_bytes: ByteString,
+        ttl: Optional[float]
+    ):
+        expiry_key = b''.join([b'k', key_bytes])
+        expires = txn.get(key = expiry_key, db = self._userdb[2])
+        if expires is not None:
+            expires = bytes(expires)
+            txn.delete(key = expiry_key, db = self._userdb[2])
+            txn.delete(key = b''.join([b't', expires, key_bytes]), db = self._userdb[2])
+        if ttl is not None and ttl != math.inf:
+            expires = struct.pack('>Q', time.time_ns() + int(ttl * 1e9))
+            assert txn.put(key = expiry_key, value = expires, db = self._userdb[2])
+            assert txn.put(
+                key = b''.join([b't', expires, key_bytes]), value = b'',
+                db = self._userdb[2]
+            )
+
+    def _scan_expired(
+        self,
+        cursors: CursorDict
+    ) -> List[bytes]:
+        now = struct.pack('>Q', time.time_ns())
+        cursor = cursors[self._userdb[2]]
+        expired = []
+        if cursor.set_range(b't'):
+            while True:
+                entry = bytes(cursor.key())
+                if not entry.startswith(b't') or entry[1:9] > now:
+                    break
+                expired.append(entry)
+                if not cursor.next():
+                    break
+        return expired
+
+    def _sweep(
+        self,
+        txn: lmdb.Transaction,
+        cursors: CursorDict
+    ) -> int:
+        expired = self._scan_expired(cursors)
+        if not expired:
+            return 0
+        indexes = self._get_indexes(txn)
+        for entry in expired:
+            key_bytes = entry[9:]
+            if indexes:
+                self._unindex(txn, indexes, key_bytes)
+            txn.delete(key = key_bytes, db = self._userdb[0])
+            if self.get_metadata:
+                txn.delete(key = key_bytes, db = self._userdb[1])
+            txn.delete(key = b''.join([b'k', key_bytes]), db = self._userdb[2])
+            txn.delete(key = entry, db = self._userdb[2])
+        return len(expired)
+
+    def sweep(self) -> int:
+        with transaction_context(self._env, write = True) as (txn, cursors, changed):
+            count = self._sweep(txn, cursors)
+            if count:
+                changed.add(self)
+        return count
+
+    def set(
+        self,
+        key: Any,
+        value: Any,
+        /, *,
+        ttl: Optional[float] = None
+    ):
+        key_bytes = self.encode_key(key) if self.encode_key else key
+        with transaction_context(self._env, write = True) as (txn, cursors, changed):
+            if self._sweep(txn, cursors):
+                changed.add(self)
+            super().__setitem__(key, value)
+            self._set_expiry(txn, key_bytes, self._ttl_cached if ttl is None else ttl)
+
+    def __setitem__(
+        self,
+        key: Any,
+        value: Any,
+        /
+    ):
+        self.set(key, value)
+
+    def __getitem__(
+        self,
+        key: Any,
+        /
+    ) -> Any:
+        key_bytes = self.encode_key(key) if self.encode_key else key
+        with transaction_context(self._env, write = False) as (txn, _, _):
+            if self._expired(txn, key_bytes):
+                raise KeyError()
+            return super().__getitem__(key)
+
+    def get(
+        self,
+        key: Any,
+        default: Any = None,
+        /
+    ) -> Any:
+        key_bytes = self.encode_key(key) if self.encode_key else key
+        with transaction_context(self._env, write = False) as (txn, _, _):
+            if self._expired(txn, key_bytes):
+                return default
+            return super().get(key, default)
+
+    def __contains__(
+        self,
+        key: Any,
+        /
+    ) -> bool:
+        key_bytes = self.encode_key(key) if self.encode_key else key
+        with transaction_context(self._env, write = False) as (txn, _, _):
+            return not self._expired(txn, key_bytes) and super().__contains__(key)
+
+    def _expired_many(
+        self,
+        cursors: CursorDict,
+        keys_bytes: List[ByteString]
+    ) -> List[bool]:
+        now = struct.pack('>Q', time.time_ns())
+        cursor = cursors[self._userdb[2]]
+        results = [False] * len(keys_bytes)
+        for position in sorted(range(len(keys_bytes)), key = keys_bytes.__getitem__):
+            if cursor.set_key(b''.join([b'k', keys_bytes[position]])):
+                results[position] = bytes(cursor.value()) <= now
+        return results
+
+    def get_many(
+        self,
+        keys: Iterable[Any],
+        /,
+        default: Any = None
+    ) -> List[Any]:
+        keys = list(keys)
+        keys_bytes = [self.encode_key(key) if self.encode_key else key for key in keys]
+        with transaction_context(self._env, write = False) as (_, cursors, _):
+            expired = self._expired_many(cursors, keys_bytes)
+            results = super().get_many(keys, default)
+        return [
+            default if expired[position] else result
+            for position, result in enumerate(results)
+        ]
+
+    def contains_many(
+        self,
+        keys: Iterable[Any],
+        /
+    ) -> List[bool]:
+        keys = list(keys)
+        keys_bytes = [self.encode_key(key) if self.encode_key else key for key in keys]
+        with transaction_context(self._env, write = False) as (_, cursors, _):
+            expired = self._expired_many(cursors, keys_bytes)
+            results = super().contains_many(keys)
+        return [
+            result and not expired[position]
+            for position, result in enumerate(results)
+        ]
+
+    def delete_many(
+        self,
+        keys: Iterable[Any],
+        /
+    ) -> int:
+        keys = list(keys)
+        with transaction_context(self._env, write = True) as (txn, cursors, changed):
+            if self._sweep(txn, cursors):
+                changed.add(self)
+            for key in keys:
+                self._set_expiry(txn, self.encode_key(key) if self.encode_key else key, None)
+            return super().delete_many(keys)
+
+    def setdefault(
+        self,
+        key: Any,
+        default: Any = None,
+        /
+    ) -> Any:
+        key_bytes = self.encode_key(key) if self.encode_key else key
+        with transaction_context(self._env, write = True) as (txn, cursors, changed):
+            if self._sweep(txn, cursors):
+                changed.add(self)
+            if txn.get(key = key_bytes, db = self._userdb[0]) is None:
+                self._set_expiry(txn, key_bytes, self._ttl_cached)
+            return super().setdefault(key, default)
+
+    def popitem(self) -> Any:
+        with transaction_context(self._env, write = True) as (txn, cursors, changed):
+            if self._sweep(txn, cursors):
+                changed.add(self)
+            key, value = super().popitem()
+            self._set_expiry(txn, self.encode_key(key) if self.encode_key else key, None)
+        return key, value
+
+    def pop(
+        self,
+        key: Any,
+        default: Any = unspecified_class(),
+        /
+    ) -> Any:
+        key_bytes = self.encode_key(key) if self.encode_key else key
+        with transaction_context(self._env, write = True) as (txn, cursors, changed):
+            if self._sweep(txn, cursors):
+                changed.add(self)
+            self._set_expiry(txn, key_bytes, None)
+            return super().pop(key, default)
+
+    def __delitem__(
+        self,
+        key: Any,
+        /
+    ):
+        key_bytes = self.encode_key(key) if self.encode_key else key
+        with transaction_context(self._env, write = True) as (txn, cursors, changed):
+            if self._sweep(txn, cursors):
+                changed.add(self)
+            self._set_expiry(txn, key_bytes, None)
+            super().__delitem__(key)
+
+    def _update_chunk(
+        self,
+        entries: typing.Dict[Any, Tuple[Any, Optional[bytes], Any]]
+    ):
+        with transaction_context(self._env, write = True) as (txn, cursors, changed):
+            if self._sweep(txn, cursors):
+                changed.add(self)
+            super()._update_chunk(entries)
+            for key_bytes in entries:
+                self._set_expiry(txn, key_bytes, self._ttl_cached)
+
+    def __len__(self) -> int:
+        with transaction_context(self._env, write = True) as (txn, cursors, changed):
+            if self._sweep(txn, cursors):
+                changed.add(self)
+            return txn.stat(self._userdb[0])['entries']
+
+    def __iterate(
+        self,
+        keys: bool = True,
+        values: bool = False
+    ) -> Iterator[Any]:
+        with transaction_context(self._env, write = False, iterator = True) as (txn, cursors, _):
+            data_cursor = cursors[self._userdb[0]]
+            if not data_cursor.first():
+                return
+            now = struct.pack('>Q', time.time_ns())
+            while True:
+                key_bytes = data_cursor.key()
+                expires = txn.get(key = b''.join([b'k', key_bytes]), db = self._userdb[2])
+                if expires is None or bytes(expires) > now:
+                    key = self.decode_key(key_bytes) if self.decode_key else key_bytes
+                    if keys and not values:
+                        yield key
+                    else:
+                        value = self._decode_entry(txn, key_bytes, data_cursor.value())
+                        yield value if not keys else (key, value)
+                if not data_cursor.next():
+                    return
+
+    def __iter__(self) -> Iterator[Any]:
+        return self.__iterate(keys = True, values = False)
+
+    def keys(self) -> Iterator[Any]:
+        return self.__iterate(keys = True, values = False)
+
+    def values(self) -> Iterator[Any]:
+        return self.__iterate(keys = False, values = True)
+
+    def items(self) -> Iterator[Any]:
+        return self.__iterate(keys = True, values = True)
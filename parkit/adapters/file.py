@@ -4,19 +4,32 @@
 #
 import codecs
 import datetime
+import io
 import logging
 import pickle
 
 from typing import (
-    Any, Dict, Optional, Union
+    Any, Dict, List, Optional, Tuple, Union
 )
 
 import numpy as np
 import pandas as pd
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
 import parkit.storage.threadlocal as thread
 
 from parkit.adapters.fileio import FileIO
+from parkit.compression import (
+    check_codec,
+    codecs as content_encodings,
+    compress,
+    decompress
+)
 from parkit.storage.context import transaction_context
 from parkit.utility import (
     create_class,
@@ -25,22 +38,88 @@ from parkit.utility import (
 
 logger = logging.getLogger(__name__)
 
+def check_pyarrow():
+    if pa is None:
+        raise ImportError('arrow and parquet content requires pyarrow, install parkit[pyarrow]')
+
 reserved_metadata_keys = [
     'last-modified', 'content-encoding', 'content-type',
     'content-properties'
 ]
 
+arrow_content_type = 'application/vnd.apache.arrow.file'
+
+parquet_content_type = 'application/vnd.apache.parquet'
+
 class File(FileIO):
 
-    def __get_pandas_dataframe(self) -> pd.DataFrame:
+    def __get_data(
+        self,
+        metadata: Dict[str, Any]
+    ) -> Union[memoryview, bytes]:
+        if metadata.get('content-encoding') in content_encodings:
+            return decompress(
+                self._read_content(), metadata['content-encoding']
+            )
+        return self._read_content()
+
+    def __set_data(
+        self,
+        data: Any,
+        metadata: Dict[str, Any],
+        encoding: Optional[str],
+        level: Optional[int]
+    ):
+        if encoding:
+            self._write_content(compress(data, encoding, level = level))
+            metadata['content-encoding'] = encoding
+        else:
+            self._write_content(data)
+
+    def __get_pandas_dataframe(
+        self,
+        metadata: Dict[str, Any],
+        columns: Optional[List[str]]
+    ) -> pd.DataFrame:
+        if metadata.get('content-encoding') in content_encodings:
+            return pd.read_feather(io.BytesIO(self.__get_data(metadata)), columns = columns)
         try:
             stash = self.mode
             self.mode = 'rb'
             with self:
-                return pd.read_feather(self)
+                return pd.read_feather(self, columns = columns)
         finally:
             self.mode = stash
 
+    def __get_arrow_table(
+        self,
+        metadata: Dict[str, Any],
+        columns: Optional[List[str]],
+        zero_copy: bool
+    ) -> Any:
+        check_pyarrow()
+        data = self.__get_data(metadata)
+        table = pa.ipc.open_file(
+            pa.py_buffer(data if zero_copy else bytearray(data))
+        ).read_all()
+        return table.select(columns) if columns is not None else table
+
+    def __get_parquet_table(
+        self,
+        metadata: Dict[str, Any],
+        columns: Optional[List[str]],
+        row_groups: Optional[List[int]],
+        zero_copy: bool
+    ) -> Any:
+        check_pyarrow()
+        data = self.__get_data(metadata)
+        parquet = pq.ParquetFile(
+            pa.BufferReader(pa.py_buffer(data if zero_copy else bytearray(data)))
+        )
+        if row_groups is not None:
+            return parquet.read_row_groups(row_groups, columns = columns)
+        return parquet.read(columns = columns)
+
     @staticmethod
     def __get_numpy_ndarray(
         data: memoryview,
@@ -58,9 +137,10 @@ class File(FileIO):
 
     def __get_octet_stream(
         self,
+        metadata: Dict[str, Any],
         zero_copy: bool
-    ) -> Union[memoryview, bytearray]:
-        data = self._content_binary
+    ) -> Union[memoryview, bytes, bytearray]:
+        data = self.__get_data(metadata)
         if zero_copy:
             return data
         return bytearray(data)
@@ -68,42 +148,163 @@ class File(FileIO):
     def get_content(
         self,
         *,
-        zero_copy: bool = True
+        zero_copy: bool = True,
+        columns: Optional[List[str]] = None,
+        row_groups: Optional[List[int]] = None
     ) -> Optional[Any]:
         if not self._closed:
             raise ValueError()
+        #
+        # Zero-copy results point into the transaction, so they are only
+        # returned while the caller holds one.
+        #
+        zero_copy = zero_copy and bool(thread.local.context.stacks[self._env])
         with transaction_context(self._env, write = False):
             try:
                 metadata = self.metadata
                 return {
                     'application/octet-stream': lambda: self.__get_octet_stream(
+                        metadata,
+                        zero_copy
+                    ),
+                    'application/python-pickle': lambda: pickle.loads(
+                        self.__get_data(metadata)
+                    ),
+                    'application/python-pandas-dataframe': lambda: self.__get_pandas_dataframe(
+                        metadata,
+                        columns
+                    ),
+                    arrow_content_type: lambda: self.__get_arrow_table(
+                        metadata,
+                        columns,
+                        zero_copy
+                    ),
+                    parquet_content_type: lambda: self.__get_parquet_table(
+                        metadata,
+                        columns,
+                        row_groups,
                         zero_copy
                     ),
-                    'application/python-pickle': lambda: pickle.loads(self._content_binary),
-                    'application/python-pandas-dataframe': lambda: self.__get_pandas_dataframe(),
                     'application/python-numpy-ndarray': lambda: self.__get_numpy_ndarray(
-                        self._content_binary,
+                        self.__get_data(metadata),
                         metadata,
                         zero_copy
                     ),
                     'text/plain': lambda: codecs.decode(
-                        self._content_binary, encoding = self.encoding
+                        self.__get_data(metadata), encoding = metadata.get(
+                            'content-properties', {}
+                        ).get('charset', self.encoding)
                     )
                 }[metadata['content-type']]()
             except KeyError:
                 return None
         raise ValueError()
 
+    def __array_rows(
+        self,
+        metadata: Dict[str, Any],
+        rows: Union[int, slice]
+    ) -> Tuple[Tuple[int, ...], np.dtype, int, int, Union[int, slice, None]]:
+        if metadata.get('content-type') != 'application/python-numpy-ndarray':
+            raise ValueError()
+        shape = tuple(metadata['content-properties']['shape'])
+        dtype = np.dtype(metadata['content-properties']['dtype'])
+        if not shape:
+            raise ValueError()
+        if isinstance(rows, slice):
+            indices = range(*rows.indices(shape[0]))
+            if not indices:
+                return (shape, dtype, 0, 0, None)
+            lower = min(indices[0], indices[-1])
+            return (
+                shape, dtype, lower, max(indices[0], indices[-1]) + 1,
+                slice(indices[0] - lower, None, indices.step)
+            )
+        index = rows + shape[0] if rows < 0 else rows
+        if not 0 <= index < shape[0]:
+            raise IndexError()
+        return (shape, dtype, index, index + 1, 0)
+
+    def get_array(
+        self,
+        rows: Union[int, slice, Tuple[Any, ...]] = slice(None),
+        /, *,
+        zero_copy: bool = True
+    ) -> np.ndarray:
+        if not self._closed:
+            raise ValueError()
+        zero_copy = zero_copy and bool(thread.local.context.stacks[self._env])
+        key = rows if isinstance(rows, tuple) else (rows,)
+        with transaction_context(self._env, write = False):
+            metadata = self.metadata
+            shape, dtype, lower, upper, selection = self.__array_rows(metadata, key[0])
+            row_bytes = int(np.prod(shape[1:], dtype = np.int64)) * dtype.itemsize
+            if metadata.get('content-encoding') in content_encodings:
+                data = memoryview(self.__get_data(metadata))[lower * row_bytes:upper * row_bytes]
+            else:
+                data = self._read_range(lower * row_bytes, upper * row_bytes)
+            array = np.frombuffer(
+                data if zero_copy else bytearray(data), dtype = dtype
+            ).reshape((upper - lower,) + shape[1:])
+        if selection is None:
+            return array
+        if len(key) > 1:
+            return array[selection][key[1:] if isinstance(selection, int) else (slice(None),) + key[1:]]
+        return array[selection]
+
+    def update_array(
+        self,
+        rows: Union[int, slice],
+        values: Any,
+        /
+    ):
+        if not self._closed:
+            raise ValueError()
+        with transaction_context(self._env, write = True):
+            metadata = self.metadata
+            shape, dtype, lower, upper, selection = self.__array_rows(metadata, rows)
+            if selection is None:
+                return
+            #
+            # Compressed content has no addressable rows, so it is decompressed,
+            # updated and rewritten in full. Only the data changes; the content
+            # metadata and user keys are kept as they are.
+            #
+            if metadata.get('content-encoding') in content_encodings:
+                array = self.get_array(zero_copy = False)
+                array[lower:upper][selection] = values
+                self.__set_data(array.data, metadata, metadata['content-encoding'], None)
+            else:
+                row_bytes = int(np.prod(shape[1:], dtype = np.int64)) * dtype.itemsize
+                if isinstance(selection, slice) and selection.step == 1:
+                    region = np.empty((upper - lower,) + shape[1:], dtype = dtype)
+                else:
+                    region = np.frombuffer(
+                        bytearray(self._read_range(lower * row_bytes, upper * row_bytes)),
+                        dtype = dtype
+                    ).reshape((upper - lower,) + shape[1:])
+                region[selection] = values
+                self._write_range(lower * row_bytes, region.data)
+            metadata['last-modified'] = str(datetime.datetime.now())
+            super(File, self.__class__).metadata.fset(self, metadata) # type: ignore
+
     def __set_pandas_dataframe(
         self,
         data: pd.DataFrame,
-        metadata: Dict[str, Any]
+        metadata: Dict[str, Any],
+        encoding: Optional[str],
+        level: Optional[int]
     ):
         try:
             stash = self.mode
-            self.mode = 'wb'
-            with self:
-                data.to_feather(self)
+            if encoding:
+                buffer = io.BytesIO()
+                data.to_feather(buffer)
+                self.__set_data(buffer.getbuffer(), metadata, encoding, level)
+            else:
+                self.mode = 'wb'
+                with self:
+                    data.to_feather(self)
             metadata['content-type'] = 'application/python-pandas-dataframe'
             metadata['content-properties'] = dict(
                 columns = data.columns.to_list(),
@@ -113,15 +314,40 @@ class File(FileIO):
         finally:
             self.mode = stash
 
+    def __set_arrow_table(
+        self,
+        data: Any,
+        metadata: Dict[str, Any],
+        content_type: str,
+        encoding: Optional[str],
+        level: Optional[int]
+    ):
+        if isinstance(data, pd.DataFrame):
+            data = pa.Table.from_pandas(data, preserve_index = False)
+        sink = pa.BufferOutputStream()
+        if content_type == parquet_content_type:
+            pq.write_table(data, sink)
+        else:
+            with pa.ipc.new_file(sink, data.schema) as writer:
+                writer.write_table(data)
+        self.__set_data(memoryview(sink.getvalue()), metadata, encoding, level)
+        metadata['content-type'] = content_type
+        metadata['content-properties'] = dict(
+            columns = data.column_names,
+            type = get_qualified_class_name(data),
+            nrows = data.num_rows
+        )
+
     def __set_numpy_ndarray(
         self,
         data: np.ndarray,
-        metadata: Dict[str, Any]
+        metadata: Dict[str, Any],
+        encoding: Optional[str],
+        level: Optional[int]
     ):
         if not data.flags.c_contiguous:
             data = np.ascontiguousarray(data)
-        self._content_binary = data.data
-        self._size = data.data.nbytes
+        self.__set_data(data.data, metadata, encoding, level)
         metadata['content-type'] = 'application/python-numpy-ndarray'
         metadata['content-properties'] = dict(
             shape = data.shape,
@@ -130,31 +356,48 @@ class File(FileIO):
             type = get_qualified_class_name(data)
         )
 
-    def set_content(self, value: Any):
+    def set_content(
+        self,
+        value: Any,
+        /, *,
+        content_type: Optional[str] = None,
+        compression: Optional[str] = None,
+        level: Optional[int] = None
+    ):
         if not self._closed:
             raise ValueError()
+        if content_type not in (None, arrow_content_type, parquet_content_type) or \
+        content_type and not isinstance(value, pd.DataFrame) and \
+        not (pa and isinstance(value, pa.Table)):
+            raise ValueError()
+        if compression:
+            check_codec(compression)
+        if content_type:
+            check_pyarrow()
         with transaction_context(self._env, write = True):
             metadata = self.metadata
             for key in reserved_metadata_keys:
                 if key in metadata:
                     del metadata[key]
             if isinstance(value, str):
-                self._size = len(value)
-                self._content_binary = memoryview(value.encode(self.encoding))
+                self.__set_data(value.encode(self.encoding), metadata, compression, level)
                 metadata['content-type'] = 'text/plain'
-                metadata['content-encoding'] = self.encoding
+                metadata['content-properties'] = dict(charset = self.encoding)
             elif isinstance(value, (memoryview, bytes, bytearray)):
-                self._size = len(value)
-                self._content_binary = memoryview(value)
+                self.__set_data(value, metadata, compression, level)
                 metadata['content-type'] = 'application/octet-stream'
+            elif content_type:
+                self.__set_arrow_table(value, metadata, content_type, compression, level)
+            elif pa and isinstance(value, pa.Table):
+                self.__set_arrow_table(
+                    value, metadata, arrow_content_type, compression, level
+                )
             elif isinstance(value, pd.DataFrame):
-                self.__set_pandas_dataframe(value, metadata)
+                self.__set_pandas_dataframe(value, metadata, compression, level)
             elif isinstance(value, np.ndarray):
-                self.__set_numpy_ndarray(value, metadata)
+                self.__set_numpy_ndarray(value, metadata, compression, level)
             else:
-                pickled = pickle.dumps(value)
-                self._size = len(pickled)
-                self._content_binary = memoryview(pickled)
+                self.__set_data(pickle.dumps(value), metadata, compression, level)
                 metadata['content-type'] = 'application/python-pickle'
                 metadata['content-properties'] = dict(
                     type = get_qualified_class_name(value)
@@ -2,19 +2,32 @@
 # reviewed:
 #
 import codecs
+import collections
+import hashlib
 import io
 import logging
 import mmap
+import re
+import struct
 
 from typing import (
-    Any, ByteString, Callable, Dict, Iterator, List,
+    Any, ByteString, Callable, Counter, Dict, Iterator, List,
     Optional, Tuple, Union
 )
 
+import lmdb
+
 import parkit.storage.threadlocal as thread
 
 from parkit.adapters.object import Object
 from parkit.storage.context import transaction_context
+from parkit.storage.database import (
+    get_database_threadsafe,
+    open_database_threadsafe
+)
+from parkit.storage.environment import get_environment_threadsafe
+from parkit.storage.namespace import Namespace
+from parkit.utility import create_string_digest
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +37,282 @@ valid_modes = [
     'rt', 'tw', 'at', '+rt', '+tw', '+at'
 ]
 
+#
+# Deduplicated files store a sha256 digest per chunk. The chunk data lives
+# once per namespace in a shared blob database, under b'd' + digest, with a
+# reference count under b'r' + digest that is maintained in the same
+# transaction as the file.
+#
+def get_blob_database(
+    env: lmdb.Environment,
+    site_uuid: str,
+    namespace: str
+) -> Any:
+    dbuid = create_string_digest(''.join([site_uuid, namespace, '__blobs__']))
+    database = get_database_threadsafe(dbuid)
+    if database is None:
+        with transaction_context(env, write = True) as (txn, _, _):
+            database = open_database_threadsafe(txn, env, dbuid, {}, create = True)
+    return database
+
+def retain_blob(
+    txn: lmdb.Transaction,
+    database: Any,
+    data: Any
+) -> bytes:
+    digest = hashlib.sha256(data).digest()
+    count_key = b''.join([b'r', digest])
+    count = txn.get(key = count_key, db = database)
+    if count is None:
+        assert txn.put(key = b''.join([b'd', digest]), value = data, db = database)
+        count = 0
+    else:
+        count = struct.unpack('>Q', count)[0]
+    assert txn.put(key = count_key, value = struct.pack('>Q', count + 1), db = database)
+    return digest
+
+def release_blob(
+    txn: lmdb.Transaction,
+    database: Any,
+    digest: ByteString
+):
+    count_key = b''.join([b'r', digest])
+    count = txn.get(key = count_key, db = database)
+    if count is None:
+        return
+    count = struct.unpack('>Q', count)[0]
+    if count > 1:
+        assert txn.put(key = count_key, value = struct.pack('>Q', count - 1), db = database)
+    else:
+        txn.delete(key = count_key, db = database)
+        txn.delete(key = b''.join([b'd', digest]), db = database)
+
+#
+# Blobs are released as files are dropped, so the blob database normally
+# holds only live chunks. compactify calls this to reclaim whatever is
+# left behind by files removed without FileIO.drop: references are counted
+# from the deduplicating files that remain, counts are corrected and
+# unreferenced blobs deleted. The database itself is emptied rather than
+# deleted, since open handles stay valid for the life of the process.
+#
+def sweep_blobs(directory: Namespace) -> int:
+    dbuid = create_string_digest(''.join([directory.site_uuid, directory.path, '__blobs__']))
+    _, env, _, _, _, _ = get_environment_threadsafe(
+        directory.storage_path, directory.path, create = False
+    )
+    with transaction_context(env, write = True) as (txn, _, _):
+        database = get_database_threadsafe(dbuid)
+        if database is None:
+            try:
+                database = open_database_threadsafe(txn, env, dbuid, {}, create = False)
+            except lmdb.NotFoundError:
+                return 0
+        references: Counter[bytes] = collections.Counter()
+        for obj in directory:
+            if issubclass(obj.type, FileIO):
+                file = obj.bind()
+                if file.deduplicate:
+                    cursor = txn.cursor(db = file._userdb[0])
+                    references.update(
+                        bytes(digest) for digest in cursor.iternext(keys = False, values = True)
+                    )
+                    cursor.close()
+        counts = {}
+        cursor = txn.cursor(db = database)
+        for key, value in cursor.iternext(keys = True, values = True):
+            if key[:1] == b'r':
+                counts[bytes(key[1:])] = struct.unpack('>Q', value)[0]
+        cursor.close()
+        swept = 0
+        for digest, count in counts.items():
+            if not references[digest]:
+                txn.delete(key = b''.join([b'r', digest]), db = database)
+                txn.delete(key = b''.join([b'd', digest]), db = database)
+                swept += 1
+            elif references[digest] != count:
+                assert txn.put(
+                    key = b''.join([b'r', digest]),
+                    value = struct.pack('>Q', references[digest]), db = database
+                )
+        if not txn.stat(database)['entries']:
+            txn.drop(database, delete = False)
+    return swept
+
+def clear_chunks(
+    txn: lmdb.Transaction,
+    database: Any,
+    blobs: Optional[Any],
+    delete: bool = False
+):
+    if blobs is not None:
+        cursor = txn.cursor(db = database)
+        if cursor.first():
+            while True:
+                release_blob(txn, blobs, bytes(cursor.value()))
+                if not cursor.next():
+                    break
+        cursor.close()
+    txn.drop(database, delete = delete)
+
+#
+# A chunked buffer reads and writes through short transactions, or through
+# the caller's transaction when one is open. Without one, reads return
+# bytes and each write commits the chunks it fills.
+#
+class ChunkedBuffer():
+
+    def __init__(
+        self,
+        env: lmdb.Environment,
+        database: Any,
+        chunk_size: int,
+        size: int,
+        writable: bool,
+        blobs: Optional[Any] = None
+    ):
+        self._env = env
+        self._database = database
+        self._chunk_size = chunk_size
+        self._size = size
+        self._writable = writable
+        self._blobs = blobs
+        self._pos = 0
+        self._index: Optional[int] = None
+        self._chunk = bytearray()
+        self._dirty = False
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        if whence == 0:
+            pos = offset
+        elif whence == 1:
+            pos = self._pos + offset
+        elif whence == 2:
+            pos = self._size + offset
+        else:
+            raise ValueError()
+        if pos < 0:
+            raise ValueError()
+        self._pos = pos
+        return pos
+
+    def _get(self, txn: lmdb.Transaction, index: int) -> Optional[Union[memoryview, bytes]]:
+        data = txn.get(key = struct.pack('@N', index), db = self._database)
+        if data is not None and self._blobs is not None:
+            return txn.get(key = b''.join([b'd', data]), db = self._blobs)
+        return data
+
+    def _put(self, txn: lmdb.Transaction, index: int, data: Any):
+        key = struct.pack('@N', index)
+        if self._blobs is not None:
+            previous = txn.get(key = key, db = self._database)
+            previous = bytes(previous) if previous is not None else None
+            data = retain_blob(txn, self._blobs, data)
+            if previous is not None:
+                release_blob(txn, self._blobs, previous)
+        assert txn.put(key = key, value = data, db = self._database)
+
+    def _view(self, txn: lmdb.Transaction, index: int) -> Union[memoryview, bytearray, bytes]:
+        if index == self._index:
+            return self._chunk
+        data = self._get(txn, index)
+        return data if data is not None else b''
+
+    def _load(self, txn: lmdb.Transaction, index: int):
+        if index != self._index:
+            self.flush()
+            data = self._get(txn, index)
+            self._chunk = bytearray(data) if data is not None else bytearray()
+            self._index = index
+
+    def flush(self):
+        if self._dirty:
+            with transaction_context(self._env, write = True) as (txn, _, _):
+                self._put(txn, self._index, self._chunk)
+            self._dirty = False
+
+    def read_range(self, start: int, stop: int) -> Union[memoryview, bytes]:
+        stop = min(stop, self._size)
+        if stop <= start:
+            return b''
+        copy = self._writable or not thread.local.context.stacks[self._env]
+        with transaction_context(self._env, write = False) as (txn, _, _):
+            parts = []
+            for index in range(start // self._chunk_size, (stop - 1) // self._chunk_size + 1):
+                base = index * self._chunk_size
+                lower = max(start - base, 0)
+                upper = min(stop - base, self._chunk_size)
+                part = self._view(txn, index)[lower:upper]
+                parts.append(bytes(part) if copy else part)
+                if len(part) < upper - lower:
+                    parts.append(bytes(upper - lower - len(part)))
+            return parts[0] if len(parts) == 1 else b''.join(parts)
+
+    def find(self, delimiter: bytes, start: int, stop: int) -> int:
+        pattern = re.compile(re.escape(delimiter))
+        pos = start
+        with transaction_context(self._env, write = False) as (txn, _, _):
+            while pos < stop:
+                index, offset = divmod(pos, self._chunk_size)
+                boundary = (index + 1) * self._chunk_size
+                match = pattern.search(
+                    self._view(txn, index), offset,
+                    min(self._chunk_size, stop - index * self._chunk_size)
+                )
+                if match:
+                    return index * self._chunk_size + match.start()
+                if len(delimiter) > 1 and boundary < stop:
+                    lower = max(pos, boundary - len(delimiter) + 1)
+                    match = pattern.search(
+                        self.read_range(lower, min(stop, boundary + len(delimiter) - 1))
+                    )
+                    if match:
+                        return lower + match.start()
+                pos = boundary
+        return -1
+
+    def read(self, size: int = -1) -> Union[memoryview, bytes]:
+        stop = self._size if size < 0 else min(self._size, self._pos + size)
+        data = self.read_range(self._pos, stop)
+        self._pos = max(self._pos, stop)
+        return data
+
+    def readline(self, size: int = -1) -> Union[memoryview, bytes]:
+        stop = self._size if size < 0 else min(self._size, self._pos + size)
+        found = self.find(b'\n', self._pos, stop)
+        return self.read((found + 1 if found >= 0 else stop) - self._pos)
+
+    def write(self, data: Any) -> int:
+        if not self._writable:
+            raise io.UnsupportedOperation()
+        data = memoryview(data).cast('B')
+        written = 0
+        with transaction_context(self._env, write = True) as (txn, _, _):
+            while written < len(data):
+                index, offset = divmod(self._pos, self._chunk_size)
+                n_bytes = min(self._chunk_size - offset, len(data) - written)
+                if n_bytes == self._chunk_size:
+                    if index == self._index:
+                        self._index = None
+                        self._dirty = False
+                    self._put(txn, index, data[written:written + n_bytes])
+                else:
+                    self._load(txn, index)
+                    if len(self._chunk) < offset:
+                        self._chunk.extend(bytes(offset - len(self._chunk)))
+                    self._chunk[offset:offset + n_bytes] = data[written:written + n_bytes]
+                    self._dirty = True
+                written += n_bytes
+                self._pos += n_bytes
+                self._size = max(self._size, self._pos)
+        return written
+
 class FileIO(Object):
 
     _encoding: str = 'utf-8'
@@ -33,6 +322,8 @@ class FileIO(Object):
     _closed: bool = True
     _sorted_mode: str = 'br'
     _bufsize: int = 2147483648
+    _chunk_size_cached: int = 0
+    _blobdb: Optional[Any] = None
 
     def __init__(
         self,
@@ -44,15 +335,27 @@ class FileIO(Object):
         metadata: Optional[Dict[str, Any]] = None,
         site_uuid: Optional[str] = None,
         on_init: Optional[Callable[[bool], None]] = None,
-        bufsize: Optional[int] = None
+        bufsize: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        deduplicate: bool = False
     ):
         self._size: int
         self._content_binary: memoryview
+        self.__chunk_size: int
+        self.__deduplicate: bool
+
+        if chunk_size is not None and chunk_size <= 0 or deduplicate and not chunk_size:
+            raise ValueError()
 
         def _on_init(created: bool):
             if created:
                 self._size = 0
-                self._content_binary = memoryview(b'')
+                if chunk_size:
+                    self.__chunk_size = chunk_size
+                    if deduplicate:
+                        self.__deduplicate = True
+                else:
+                    self._content_binary = memoryview(b'')
                 self._bufsize = bufsize if bufsize else 2147483648
             if mode:
                 sorted_mode = ''.join(sorted(mode))
@@ -66,9 +369,12 @@ class FileIO(Object):
 
         super().__init__(
             path, metadata = metadata, site_uuid = site_uuid,
+            db_properties = [{'integerkey': True}] if chunk_size else None,
             on_init = _on_init, create = create, bind = bind
         )
 
+        self.__load_chunking()
+
     def __getstate__(self) -> Any:
         return (super().__getstate__(), self._sorted_mode, self._bufsize)
 
@@ -76,6 +382,87 @@ class FileIO(Object):
         super().__setstate__(from_wire[0])
         self._sorted_mode = from_wire[1]
         self._bufsize = from_wire[2]
+        self.__load_chunking()
+
+    def __load_chunking(self):
+        if self._userdb:
+            self._chunk_size_cached = self.__chunk_size
+            if getattr(self, '_FileIO__deduplicate', False):
+                self._blobdb = get_blob_database(self._env, self._site_uuid, self._namespace)
+
+    @property
+    def chunk_size(self) -> Optional[int]:
+        return self._chunk_size_cached if self._chunk_size_cached else None
+
+    @property
+    def deduplicate(self) -> bool:
+        return self._blobdb is not None
+
+    def drop(self):
+        if self._blobdb is None:
+            super().drop()
+            return
+        with transaction_context(self._env, write = True) as (txn, _, _):
+            if self.exists:
+                clear_chunks(txn, self._userdb[0], self._blobdb)
+            super().drop()
+
+    def _read_range(self, start: int, stop: int) -> Union[memoryview, bytes]:
+        held = bool(thread.local.context.stacks[self._env])
+        with transaction_context(self._env, write = False):
+            if not self._chunk_size_cached:
+                data = self._content_binary[start:stop]
+            else:
+                data = ChunkedBuffer(
+                    self._env, self._userdb[0], self._chunk_size_cached, self._size, False,
+                    self._blobdb
+                ).read_range(start, stop)
+            return data if held else bytes(data)
+
+    def _read_content(self) -> Union[memoryview, bytes]:
+        held = bool(thread.local.context.stacks[self._env])
+        with transaction_context(self._env, write = False):
+            data = self._content_binary if not self._chunk_size_cached else \
+            self._read_range(0, self._size)
+            return data if held else bytes(data)
+
+    def _write_content(self, data: Any):
+        data = memoryview(data).cast('B')
+        if not self._chunk_size_cached:
+            self._size = len(data)
+            self._content_binary = data
+            return
+        with transaction_context(self._env, write = True) as (txn, cursors, _):
+            clear_chunks(txn, self._userdb[0], self._blobdb)
+            cursors[self._userdb[0]].putmulti([
+                (
+                    struct.pack('@N', index),
+                    data[offset:offset + self._chunk_size_cached] if self._blobdb is None else \
+                    retain_blob(txn, self._blobdb, data[offset:offset + self._chunk_size_cached])
+                )
+                for index, offset in enumerate(range(0, len(data), self._chunk_size_cached))
+            ], append = True)
+            self._size = len(data)
+
+    def _write_range(self, offset: int, data: Any):
+        data = memoryview(data).cast('B')
+        if not self._chunk_size_cached:
+            content = bytearray(self._content_binary)
+            if len(content) < offset:
+                content.extend(bytes(offset - len(content)))
+            content[offset:offset + len(data)] = data
+            self._size = len(content)
+            self._content_binary = content
+            return
+        with transaction_context(self._env, write = True):
+            buffer = ChunkedBuffer(
+                self._env, self._userdb[0], self._chunk_size_cached, self._size, True,
+                self._blobdb
+            )
+            buffer.seek(offset)
+            buffer.write(data)
+            buffer.flush()
+            self._size = buffer.size
 
     def __iter__(self) -> Iterator[Union[str, ByteString]]:
         while True:
@@ -84,6 +471,48 @@ class FileIO(Object):
                 return
             yield line
 
+    def __find(self, delimiter: bytes, start: int, stop: int) -> int:
+        if isinstance(self._buffer, memoryview):
+            match = re.compile(re.escape(delimiter)).search(self._buffer, start, stop)
+            return match.start() if match else -1
+        assert isinstance(self._buffer, (mmap.mmap, ChunkedBuffer))
+        return self._buffer.find(delimiter, start, stop)
+
+    def __extent(self) -> int:
+        if isinstance(self._buffer, memoryview):
+            return len(self._buffer)
+        if isinstance(self._buffer, ChunkedBuffer):
+            return self._buffer.size
+        return self._extent
+
+    def records(
+        self,
+        delimiter: bytes = b'\n',
+        /, *,
+        length_prefix: Optional[str] = None
+    ) -> Iterator[Union[memoryview, bytes]]:
+        if self._closed:
+            raise ValueError()
+        if not self.readable() or 'b' not in self._sorted_mode or not delimiter:
+            raise io.UnsupportedOperation()
+        if length_prefix:
+            header = struct.Struct(length_prefix)
+            while True:
+                prefix = self.read(header.size)
+                if len(prefix) < header.size:
+                    return
+                yield self.read(header.unpack(prefix)[0])
+        extent = self.__extent()
+        pos = self.tell()
+        while pos < extent:
+            found = self.__find(delimiter, pos, extent)
+            stop = found if found >= 0 else extent
+            self.seek(pos)
+            record = self.read(stop - pos)
+            pos = stop + len(delimiter) if found >= 0 else extent
+            self.seek(pos)
+            yield record
+
     @property
     def mode(self) -> str:
         return self._sorted_mode
@@ -111,7 +540,9 @@ class FileIO(Object):
             thread.local.context.push(self._env, True, False)
         try:
             self._closed = False
-            if 'w' not in self._sorted_mode:
+            if self._chunk_size_cached and 'b' in self._sorted_mode:
+                self._open_chunked()
+            elif 'w' not in self._sorted_mode:
                 self._load_buffer(binary = 'b' in self._sorted_mode)
             else:
                 self._buffer = mmap.mmap(-1, self._bufsize) \
@@ -129,7 +560,7 @@ class FileIO(Object):
     def __exit__(self, error_type: type, error: Optional[Any], traceback: Any):
         try:
             if self.writable():
-                assert isinstance(self._buffer, (mmap.mmap, io.StringIO))
+                assert isinstance(self._buffer, (mmap.mmap, io.StringIO, ChunkedBuffer))
                 self._save_buffer()
         finally:
             if self._buffer is not None:
@@ -141,6 +572,24 @@ class FileIO(Object):
             if 'x' in self._sorted_mode:
                 thread.local.context.pop(self._env, abort = error is not None)
 
+    #
+    # Outside a transaction, chunks are committed as they fill and the new
+    # size when the file closes, so a writer does not hold the write lock
+    # for the whole block. In 'w' mode the file reads as empty until then.
+    # Open with 'x' to write in one transaction.
+    #
+    def _open_chunked(self):
+        if 'w' in self._sorted_mode:
+            with transaction_context(self._env, write = True) as (txn, _, _):
+                clear_chunks(txn, self._userdb[0], self._blobdb)
+                self._size = 0
+        self._buffer = ChunkedBuffer(
+            self._env, self._userdb[0], self._chunk_size_cached, self._size,
+            self.writable(), self._blobdb
+        )
+        if 'a' in self._sorted_mode:
+            self._buffer.seek(0, 2)
+
     @property
     def encoding(self) -> str:
         return self._encoding
@@ -195,7 +644,7 @@ class FileIO(Object):
                         self._buffer.seek(self._extent, 0)
                         self._buffer.seek(offset, 1)
                         return
-                assert isinstance(self._buffer, (mmap.mmap, io.StringIO))
+                assert isinstance(self._buffer, (mmap.mmap, io.StringIO, ChunkedBuffer))
                 self._buffer.seek(offset, whence)
             return
         raise ValueError()
@@ -203,10 +652,18 @@ class FileIO(Object):
     def readline(self, size: int = -1) -> Union[str, bytes, memoryview]:
         if self.readable() and not self._closed:
             if isinstance(self._buffer, memoryview):
-                raise io.UnsupportedOperation()
+                stop = len(self._buffer) if size < 0 else min(len(self._buffer), self._pos + size)
+                found = self.__find(b'\n', self._pos, stop)
+                stop = found + 1 if found >= 0 else stop
+                line = self._buffer[self._pos:stop]
+                self._pos = max(self._pos, stop)
+                return line
             if isinstance(self._buffer, mmap.mmap):
-                return self._buffer.readline()
-            assert isinstance(self._buffer, io.StringIO)
+                pos = self._buffer.tell()
+                stop = self._extent if size < 0 else min(self._extent, pos + size)
+                found = self._buffer.find(b'\n', pos, stop)
+                return self._buffer.read(max((found + 1 if found >= 0 else stop) - pos, 0))
+            assert isinstance(self._buffer, (io.StringIO, ChunkedBuffer))
             return self._buffer.readline(size)
         if self._closed:
             raise ValueError()
@@ -215,15 +672,12 @@ class FileIO(Object):
     def readlines(self, hint: int = -1) -> Union[List[str], List[bytes]]:
         if self.readable() and not self._closed:
             if 'b' in self._sorted_mode:
-                if isinstance(self._buffer, memoryview):
-                    raise io.UnsupportedOperation()
-                assert isinstance(self._buffer, mmap.mmap)
                 lines: List[bytes] = []
                 while True:
-                    line = self._buffer.readline()
+                    line = self.readline()
                     if len(line) == 0:
                         return lines
-                    lines.append(line)
+                    lines.append(bytes(line))
             assert isinstance(self._buffer, io.StringIO)
             return self._buffer.readlines(hint)
         if self._closed:
@@ -242,7 +696,9 @@ class FileIO(Object):
                 data = self._buffer[self._pos:self._pos + size]
                 self._pos = min(self._pos + size, len(self._buffer))
                 return data
-            assert isinstance(self._buffer, (mmap.mmap, io.StringIO))
+            if isinstance(self._buffer, mmap.mmap) and size == -1:
+                return self._buffer.read(max(self._extent - self._buffer.tell(), 0))
+            assert isinstance(self._buffer, (mmap.mmap, io.StringIO, ChunkedBuffer))
             return self._buffer.read(size)
         if self._closed:
             raise ValueError()
@@ -250,10 +706,10 @@ class FileIO(Object):
 
     def write(self, data: Any) -> int:
         if self.writable() and not self._closed:
-            assert isinstance(self._buffer, (mmap.mmap, io.StringIO))
+            assert isinstance(self._buffer, (mmap.mmap, io.StringIO, ChunkedBuffer))
             if 'a' in self._sorted_mode:
                 self.seek(0, 2)
-            if isinstance(self._buffer, mmap.mmap):
+            if isinstance(self._buffer, (mmap.mmap, ChunkedBuffer)):
                 written = self._buffer.write(data)
                 self._extent = max(self._extent, self._buffer.tell())
             else:
@@ -274,13 +730,13 @@ class FileIO(Object):
 
     def _save_buffer(self):
         with transaction_context(self._env, write = True):
-            if isinstance(self._buffer, mmap.mmap):
-                self._size = self._extent
-                self._content_binary = memoryview(self._buffer)[0:self._extent]
+            if isinstance(self._buffer, ChunkedBuffer):
+                self._buffer.flush()
+                self._size = self._buffer.size
+            elif isinstance(self._buffer, mmap.mmap):
+                self._write_content(memoryview(self._buffer)[0:self._extent])
             else:
-                content = self._buffer.getvalue()
-                self._size = len(content)
-                self._content_binary = content.encode(self._encoding)
+                self._write_content(self._buffer.getvalue().encode(self._encoding))
 
     def _load_buffer(self, binary: bool):
         if binary:
@@ -299,7 +755,7 @@ class FileIO(Object):
                 self.seek(0, 0)
             return
         self._buffer = io.StringIO(
-            codecs.decode(self._content_binary, encoding = self._encoding),
+            codecs.decode(self._read_content(), encoding = self._encoding),
             newline = None
         )
         if 'a' in self._sorted_mode:
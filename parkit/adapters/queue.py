@@ -79,6 +79,30 @@ class QueueBase(Array):
         except BaseException as exc:
             self._abort(exc, txn, implicit)
 
+    #
+    # Queues have no index access, and their size is the entry count, so an
+    # entry can be taken out of order without disturbing the others. Used by
+    # workers to claim a task past ones they cannot run yet.
+    #
+    def _remove(self, position: int) -> bool:
+        try:
+            txn, cursors, changed, implicit = \
+            thread.local.context.get(self._env, write = True, internal = True)
+            key = struct.pack('@N', position)
+            result = txn.delete(key = key, db = self._userdb[0])
+            if result:
+                if self.get_metadata:
+                    txn.delete(key = key, db = self._userdb[1])
+                if implicit:
+                    self._increment_version(cursors)
+                else:
+                    changed.add(self)
+            if implicit:
+                txn.commit()
+        except BaseException as exc:
+            self._abort(exc, txn, implicit)
+        return result
+
     def qsize(self):
         return len(self)
 
@@ -1,24 +1,35 @@
+import calendar
 import datetime
 import enum
 import logging
+import struct
 import sys
 import time
 import uuid
 
 from typing import (
-    Any, ByteString, Callable, cast, Dict, Iterator, Optional, Tuple, Union
+    Any, ByteString, Callable, cast, Dict, Iterator, List, Optional, Tuple, Union
 )
 
 import cloudpickle
 import dateparser
+import lmdb
 
 import parkit.constants as constants
 
 from parkit.adapters.asyncable import Asyncable
 from parkit.adapters.object import Object
+from parkit.cron import CronExpression
 from parkit.storage.context import transaction_context
+from parkit.storage.database import (
+    get_database_threadsafe,
+    open_database_threadsafe
+)
 from parkit.storage.namespace import Namespace
-from parkit.utility import resolve_path
+from parkit.utility import (
+    create_string_digest,
+    resolve_path
+)
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +45,63 @@ class Frequency(enum.Enum):
     MONTH = 8
     YEAR = 9
 
+#
+# Schedules are indexed in a database shared by the scheduler namespace, keyed
+# by due time (ns, big-endian) followed by the schedule's uuid, with the
+# schedule's name as the value. The scheduler daemon reads only the entries
+# that are due and sleeps until the first remaining one.
+#
+def get_schedule_index(
+    env: lmdb.Environment,
+    site_uuid: str
+) -> Any:
+    dbuid = create_string_digest(
+        ''.join([site_uuid, constants.SCHEDULER_NAMESPACE, '__schedule__'])
+    )
+    database = get_database_threadsafe(dbuid)
+    if database is None:
+        with transaction_context(env, write = True) as (txn, _, _):
+            database = open_database_threadsafe(txn, env, dbuid, {}, create = True)
+    return database
+
+def get_due_schedules(
+    env: lmdb.Environment,
+    database: Any,
+    now_ns: int
+) -> Tuple[List[Tuple[int, str]], Optional[int]]:
+    due = []
+    with transaction_context(env, write = False) as (txn, _, _):
+        cursor = txn.cursor(db = database)
+        if cursor.first():
+            while True:
+                due_ns = struct.unpack('>Q', bytes(cursor.key())[:8])[0]
+                if due_ns > now_ns:
+                    cursor.close()
+                    return (due, due_ns)
+                due.append((due_ns, bytes(cursor.value()).decode('utf-8')))
+                if not cursor.next():
+                    break
+        cursor.close()
+    return (due, None)
+
+def remove_schedule(
+    env: lmdb.Environment,
+    database: Any,
+    name: str,
+    due_ns: int
+):
+    with transaction_context(env, write = True) as (txn, _, _):
+        cursor = txn.cursor(db = database)
+        prefix = struct.pack('>Q', due_ns)
+        if cursor.set_range(prefix):
+            while bytes(cursor.key()).startswith(prefix):
+                if bytes(cursor.value()) == name.encode('utf-8'):
+                    cursor.delete()
+                    break
+                if not cursor.next():
+                    break
+        cursor.close()
+
 class Scheduler(Object):
 
     encode_attr_value: Optional[Callable[..., ByteString]] = \
@@ -105,11 +173,13 @@ def schedule(
         period = kwargs['period'] if 'period' in kwargs else None,
         start = kwargs['start'] if 'start' in kwargs else None,
         max_times = kwargs['max_times'] if 'max_times' in kwargs else None,
+        cron = kwargs['cron'] if 'cron' in kwargs else None,
+        misfire = kwargs['misfire'] if 'misfire' in kwargs else 'coalesce',
         asyncable = asyncable,
         args = args,
         kwargs = {
             key: value for key, value in kwargs.items() \
-            if key not in ['frequency', 'period', 'start', 'max_times']
+            if key not in ['frequency', 'period', 'start', 'max_times', 'cron', 'misfire']
         },
         site_uuid = asyncable.site_uuid,
         create = True,
@@ -118,10 +188,13 @@ def schedule(
 
 def schedulers(site_uuid: Optional[str] = None) -> Iterator[Scheduler]:
     for scheduler in Namespace(constants.SCHEDULER_NAMESPACE, site_uuid = site_uuid):
-        if isinstance(scheduler, Scheduler):
-            yield scheduler
+        if issubclass(scheduler.type, Scheduler):
+            yield cast(Scheduler, scheduler.bind())
 
 frequency_ns = {
+    Frequency.NANOSECOND.value: 1,
+    Frequency.MICROSECOND.value: 1e3,
+    Frequency.MILLISECOND.value: 1e6,
     Frequency.SECOND.value: 1e9,
     Frequency.MINUTE.value: 1e9 * 60,
     Frequency.HOUR.value: 1e9 * 3600,
@@ -129,11 +202,26 @@ frequency_ns = {
     Frequency.WEEK.value: 1e9 * 604800
 }
 
+frequency_months = {
+    Frequency.MONTH.value: 1,
+    Frequency.YEAR.value: 12
+}
+
+misfire_policies = ['coalesce', 'fire_all', 'skip']
+
 def get_interval(frequency: Frequency, period: float):
     if frequency.value in frequency_ns:
-        return int(frequency_ns[frequency.value] * period)
+        return max(int(frequency_ns[frequency.value] * period), 1)
     raise ValueError()
 
+def add_months(moment: datetime.datetime, months: int) -> datetime.datetime:
+    year, month = divmod(moment.month - 1 + months, 12)
+    year += moment.year
+    return moment.replace(
+        year = year, month = month + 1,
+        day = min(moment.day, calendar.monthrange(year, month + 1)[1])
+    )
+
 class Periodic(Scheduler):
 
     def __init__(
@@ -147,11 +235,15 @@ class Periodic(Scheduler):
         period: Optional[float] = None,
         start: Optional[Union[str, datetime.datetime]] = None,
         max_times: Optional[int] = None,
+        cron: Optional[str] = None,
+        misfire: str = 'coalesce',
         site_uuid: Optional[str] = None,
         create: bool = True,
         bind: bool = False
     ):
         self.__count: int
+        self.__cron: Optional[str]
+        self.__misfire: str
         self.__last_run_ns: Optional[int]
         self.__next_run_ns: Optional[int]
         self.__start: Optional[datetime.datetime]
@@ -164,8 +256,12 @@ class Periodic(Scheduler):
         period = 1. if period is None else period
         if not (max_times is None or max_times > 0):
             raise ValueError()
-        if period <= 0:
+        if period <= 0 or misfire not in misfire_policies:
             raise ValueError()
+        if frequency.value in frequency_months and not float(period).is_integer():
+            raise ValueError()
+        if cron is not None:
+            CronExpression(cron)
         if start:
             parsed_start = start if isinstance(start, datetime.datetime) else \
             dateparser.parse(start)
@@ -186,6 +282,13 @@ class Periodic(Scheduler):
                 assert frequency is not None
                 self.__frequency = frequency
                 self.__max_times = max_times if max_times is not None else sys.maxsize
+                self.__cron = cron
+                self.__misfire = misfire
+                if cron is not None:
+                    self.__start_ns = self.__next_after(
+                        int((parsed_start or datetime.datetime.now()).timestamp() * 1e9) - 1
+                    )
+                self.reindex()
 
         super().__init__(
             path, asyncable = asyncable, args = args, kwargs = kwargs,
@@ -215,43 +318,107 @@ class Periodic(Scheduler):
     def start(self) -> Optional[datetime.datetime]:
         return self._start
 
+    @property
+    def cron(self) -> Optional[str]:
+        return getattr(self, '_Periodic__cron', None)
+
+    @property
+    def misfire(self) -> str:
+        return getattr(self, '_Periodic__misfire', 'coalesce')
+
+    def __next_after(self, after_ns: int) -> int:
+        cron = self.cron
+        if cron is not None:
+            return int(CronExpression(cron).next_after(
+                datetime.datetime.fromtimestamp(after_ns / 1e9)
+            ).timestamp() * 1e9)
+        assert self.__start_ns is not None
+        if self.__frequency.value in frequency_months:
+            step = int(self.__period) * frequency_months[self.__frequency.value]
+            start = datetime.datetime.fromtimestamp(self.__start_ns / 1e9)
+            after = datetime.datetime.fromtimestamp(after_ns / 1e9)
+            count = max(((after.year - start.year) * 12 + after.month - start.month) // step - 1, 0)
+            while add_months(start, count * step) <= after:
+                count += 1
+            return int(add_months(start, count * step).timestamp() * 1e9)
+        interval_ns = get_interval(self.__frequency, self.__period)
+        return self.__start_ns + ((after_ns - self.__start_ns) // interval_ns + 1) * interval_ns
+
+    def __due_ns(self) -> Optional[int]:
+        if self.__count == self.__max_times:
+            return None
+        if self.__next_run_ns is not None:
+            return self.__next_run_ns
+        if self.__last_run_ns is None:
+            return self.__start_ns if self.__start_ns is not None else 0
+        return None
+
+    def __index_key(self, due_ns: int) -> bytes:
+        return b''.join([struct.pack('>Q', due_ns), self._uuid_bytes])
+
+    def reindex(self, previous_ns: Optional[int] = None):
+        with transaction_context(self._env, write = True) as (txn, _, _):
+            index = get_schedule_index(self._env, self._site_uuid)
+            if previous_ns is not None:
+                txn.delete(key = self.__index_key(previous_ns), db = index)
+            due_ns = self.__due_ns()
+            if due_ns is not None:
+                assert txn.put(key = self.__index_key(due_ns), value = self._encname, db = index)
+
+    def drop(self):
+        with transaction_context(self._env, write = True) as (txn, _, _):
+            if self.exists:
+                due_ns = self.__due_ns()
+                if due_ns is not None:
+                    txn.delete(
+                        key = self.__index_key(due_ns),
+                        db = get_schedule_index(self._env, self._site_uuid)
+                    )
+            super().drop()
+
     def is_scheduled(self) -> bool:
 
         with transaction_context(self._env, write = True):
+            previous_ns = self.__due_ns()
+            result = self.__is_scheduled()
+            if self.__due_ns() != previous_ns:
+                self.reindex(previous_ns)
+            return result
+
+    #
+    # A schedule has misfired when the slot after the one that is due has
+    # also passed, e.g. because no scheduler was running. coalesce runs once
+    # and moves on, fire_all runs once per missed slot, and skip drops the
+    # missed slots and waits for the next one.
+    #
+    def __is_scheduled(self) -> bool:
+        now_ns = time.time_ns()
+
+        if self.__count == self.__max_times:
+            return False
 
-            now_ns = time.time_ns()
-
-            if self.__count == self.__max_times:
-                return False
-
-            assert self.__frequency is not None and self.__period is not None
-            interval_ns = get_interval(self.__frequency, self.__period)
-
-            def get_next_ns(start_ns):
-                relative_ns = now_ns - start_ns
-                offset_ns = relative_ns % interval_ns
-                return now_ns + (interval_ns - offset_ns)
-
-            if self.__last_run_ns is None:
-                if self.__start_ns is None or self.__start_ns <= now_ns:
-                    self.__count += 1
-                    self.__last_run_ns = now_ns
-                    if self.__count < self.__max_times:
-                        if self.__start_ns is None:
-                            self.__start_ns = now_ns
-                        else:
-                            self.__start_ns = self.__start_ns
-                        self.__next_run_ns = get_next_ns(self.__start_ns)
-                    return True
-                return False
-
-            assert isinstance(self.__next_run_ns, int)
-            if self.__next_run_ns <= now_ns:
-                self.__count += 1
-                self.__last_run_ns = now_ns
-                if self.__count < self.__max_times:
-                    self.__next_run_ns = get_next_ns(self.__start_ns)
-                else:
-                    self.__next_run_ns = None
-                return True
+        if self.__next_run_ns is not None:
+            due_ns = self.__next_run_ns
+        elif self.__last_run_ns is None:
+            if self.__start_ns is None:
+                self.__start_ns = now_ns
+            due_ns = self.__start_ns
+        else:
+            return False
+
+        if due_ns > now_ns:
             return False
+
+        following_ns = self.__next_after(due_ns)
+        if self.misfire == 'fire_all':
+            fire = True
+            next_ns = following_ns
+        else:
+            fire = self.misfire == 'coalesce' or following_ns > now_ns
+            next_ns = following_ns if following_ns > now_ns else self.__next_after(now_ns)
+
+        if fire:
+            self.__count += 1
+            self.__last_run_ns = now_ns
+        self.__next_run_ns = next_ns if self.__count < self.__max_times else None
+        return fire
@@ -2,31 +2,169 @@
 # reviewed: 6/14/21
 #
 import logging
+import operator
 import pickle
+import struct
 import time
 import uuid
 
 from typing import (
-    Any, ByteString, Callable, cast, Dict, Optional, Tuple
+    Any, ByteString, Callable, cast, Dict, List, Optional, Tuple, Union
 )
 
 import cloudpickle
+import lmdb
 
 from cacheout.lru import LRUCache
 
 import parkit.constants as constants
+import parkit.storage.threadlocal as thread
 
 from parkit.adapters.object import Object
 from parkit.adapters.queue import Queue
-from parkit.node import (
-    is_running,
-    terminate_node
-)
+from parkit.node import terminate_node
 from parkit.storage.context import transaction_context
-from parkit.utility import getenv
+from parkit.storage.database import (
+    get_database_threadsafe,
+    open_database_threadsafe
+)
+from parkit.storage.entities import LazyEntity
+from parkit.system.heartbeat import heartbeat
+from parkit.utility import (
+    create_string_digest,
+    getenv
+)
 
 logger = logging.getLogger(__name__)
 
+#
+# A task's metrics record holds the time in ns spent in each stage, from
+# submission to the write of its result, followed by the encoded sizes of
+# its arguments and result. The worker also adds each value to a log2
+# histogram per asyncable in a database in the task namespace, written in
+# the same transaction as the result. Every counter is a '>Q' value under
+# the asyncable uuid, the index of the stage and a field: b't' total,
+# b'n' min, b'x' max and b'b' plus the bucket index for bucket counts.
+#
+stages: List[str] = [
+    'queued', 'claimed', 'resolved', 'decoded', 'executed', 'encoded', 'committed'
+]
+
+sizes: List[str] = ['args_size', 'result_size']
+
+Metrics = Tuple[int, ...]
+
+histogram_buckets: int = 64
+
+def get_metrics_database(
+    env: lmdb.Environment,
+    site_uuid: str
+) -> Any:
+    dbuid = create_string_digest(''.join([site_uuid, constants.TASK_NAMESPACE, '__metrics__']))
+    database = get_database_threadsafe(dbuid)
+    if database is None:
+        with transaction_context(env, write = True) as (txn, _, _):
+            database = open_database_threadsafe(txn, env, dbuid, {}, create = True)
+    return database
+
+def record_metrics(
+    txn: lmdb.Transaction,
+    database: Any,
+    asyncable_uuid: str,
+    metrics: Metrics
+):
+    prefix = asyncable_uuid.encode('utf-8')
+    for index, value in enumerate(metrics):
+        stage = b''.join([prefix, struct.pack('>B', index)])
+        for field, combine, operand in [
+            (b't', operator.add, value),
+            (b'n', min, value),
+            (b'x', max, value),
+            (
+                b''.join([b'b', struct.pack('>B', min(value.bit_length(), histogram_buckets - 1))]),
+                operator.add, 1
+            )
+        ]:
+            key = b''.join([stage, field])
+            current = txn.get(key = key, db = database)
+            if current is not None:
+                operand = combine(struct.unpack('>Q', current)[0], operand)
+            assert txn.put(key = key, value = struct.pack('>Q', operand), db = database)
+
+def load_metrics(
+    txn: lmdb.Transaction,
+    database: Any,
+    asyncable_uuid: str
+) -> Dict[str, Dict[str, Any]]:
+    prefix = asyncable_uuid.encode('utf-8')
+    histograms: Dict[str, Dict[str, Any]] = {}
+    cursor = txn.cursor(db = database)
+    if cursor.set_range(prefix):
+        while True:
+            key = bytes(cursor.key())
+            if not key.startswith(prefix):
+                break
+            name = (stages + sizes)[key[len(prefix)]]
+            field = key[len(prefix) + 1:]
+            value = struct.unpack('>Q', cursor.value())[0]
+            histogram = histograms.setdefault(
+                name, dict(count = 0, total = 0, min = None, max = None, buckets = [0] * histogram_buckets)
+            )
+            if field == b't':
+                histogram['total'] = value
+            elif field == b'n':
+                histogram['min'] = value
+            elif field == b'x':
+                histogram['max'] = value
+            else:
+                histogram['buckets'][field[1]] = value
+                histogram['count'] += value
+            if not cursor.next():
+                break
+    cursor.close()
+    return histograms
+
+def clear_metrics(
+    txn: lmdb.Transaction,
+    database: Any,
+    asyncable_uuid: str
+):
+    prefix = asyncable_uuid.encode('utf-8')
+    cursor = txn.cursor(db = database)
+    if cursor.set_range(prefix):
+        while bytes(cursor.key()).startswith(prefix):
+            if not cursor.delete():
+                break
+    cursor.close()
+
+def summarize_histogram(
+    histogram: Dict[str, Any],
+    /, *,
+    percentiles: Tuple[float, ...] = (50., 90., 99.)
+) -> Dict[str, Any]:
+    count = histogram['count']
+    summary = dict(
+        count = count, total = histogram['total'],
+        min = histogram['min'], max = histogram['max'],
+        mean = histogram['total'] / count if count else None,
+        histogram = [
+            (2**index - 1, bucket_count)
+            for index, bucket_count in enumerate(histogram['buckets']) if bucket_count
+        ]
+    )
+    for percentile in percentiles:
+        value = None
+        if count:
+            rank = percentile / 100. * count
+            seen = 0
+            for index, bucket_count in enumerate(histogram['buckets']):
+                seen += bucket_count
+                if bucket_count and seen >= rank:
+                    value = min(2**index - 1, histogram['max'])
+                    break
+        summary['p{0:g}'.format(percentile)] = value
+    return summary
+
 class Task(Object):
 
     _running_cache: LRUCache = LRUCache(
@@ -60,10 +198,12 @@ class Task(Object):
         self._end_timestamp: Optional[int]
         self._pid: Optional[int]
         self._node_uid: Optional[str]
+        self._executor: Optional[str]
         self._asyncable: Object
         self._asyncable_uuid: str
-        self._args: Tuple[Any, ...]
-        self._kwargs: Dict[str, Any]
+        self._payload_binary: bytes
+        self._result_binary: bytes
+        self._metrics: Optional[Metrics]
 
         def on_init(created: bool):
             if created:
@@ -78,10 +218,14 @@ class Task(Object):
                     self._end_timestamp = None
                     self._pid = None
                     self._node_uid = None
+                    self._executor = None
                     self._asyncable = asyncable
                     self._asyncable_uuid = asyncable.uuid
-                    self._args = args if args is not None else ()
-                    self._kwargs = kwargs if kwargs is not None else {}
+                    self._payload_binary = cloudpickle.dumps((
+                        args if args is not None else (),
+                        kwargs if kwargs is not None else {}
+                    ))
+                    self._metrics = None
                     key1 = ':'.join([asyncable.uuid, self.name])
                     key2 = ':'.join([self.name, asyncable.uuid])
                     assert txn.put(key = key1.encode('utf-8'), value = b'', append = False)
@@ -116,18 +260,36 @@ class Task(Object):
     def end(self) -> Optional[int]:
         return self._end_timestamp
 
+    def _get_payload(self) -> Tuple[Tuple[Any, ...], Dict[str, Any], int]:
+        with transaction_context(self._env, write = False):
+            try:
+                payload = self._payload_binary
+                args, kwargs = cloudpickle.loads(payload)
+                return (args, kwargs, len(payload))
+            except AttributeError:
+                return (self._args, self._kwargs, 0)
+
     @property
     def args(self) -> Tuple[Any, ...]:
-        return self._args
+        return self._get_payload()[0]
 
     @property
     def kwargs(self) -> Dict[str, Any]:
-        return self._kwargs
+        return self._get_payload()[1]
+
+    @property
+    def metrics(self) -> Optional[Dict[str, int]]:
+        metrics = getattr(self, '_metrics', None)
+        return dict(zip(stages + sizes, metrics)) if metrics is not None else None
 
     @property
     def pid(self) -> Optional[int]:
         return self._pid
 
+    @property
+    def executor(self) -> Optional[str]:
+        return getattr(self, '_executor', None)
+
     @property
     def running(self) -> bool:
         return self.status == 'running'
@@ -138,7 +300,11 @@ class Task(Object):
 
     @property
     def result(self) -> Optional[Any]:
-        return self._result
+        with transaction_context(self._env, write = False):
+            try:
+                return cloudpickle.loads(self._result_binary)
+            except AttributeError:
+                return self._result
 
     @property
     def error(self) -> Optional[Any]:
@@ -155,7 +321,7 @@ class Task(Object):
                 status = self._running_cache.get(
                     (node_uid, pid),
                     default = \
-                    lambda key: 'running' if is_running(key[0], key[1]) else 'crashed'
+                    lambda key: 'running' if heartbeat.is_alive(key[0], key[1]) else 'crashed'
                 )
                 if status == 'crashed':
                     self._running_cache.set(
@@ -168,7 +334,7 @@ class Task(Object):
     def drop(self):
         node_uid = pid = None
         with transaction_context(self._env, write = True) as (txn, _, _):
-            if self._status == 'running':
+            if self._status == 'running' and self.executor != 'thread':
                 node_uid = self._node_uid
                 pid = self._pid
                 assert node_uid is not None and pid is not None
@@ -188,6 +354,12 @@ class Task(Object):
                 pid
             )
 
+    #
+    # Cancelling a running task terminates its worker process. Tasks of
+    # thread executor asyncables share the worker with other tasks, so they
+    # are only marked cancelled and the thread runs to completion. A thread
+    # task that should stop early can poll task().status for 'cancelled'.
+    #
     def cancel(self):
         if self._status not in ['running', 'submitted']:
             return
@@ -196,7 +368,7 @@ class Task(Object):
             status = self._status
             if status in ['submitted', 'running']:
                 self._status = 'cancelled'
-            if status == 'running':
+            if status == 'running' and self.executor != 'thread':
                 node_uid = self._node_uid
                 pid = self._pid
                 assert node_uid is not None and pid is not None
@@ -206,7 +378,17 @@ class Task(Object):
                 pid
             )
 
+def get_task_status(task: Union[Task, LazyEntity]) -> str:
+    if isinstance(task, LazyEntity):
+        status = task.peek('_status')
+        if status != 'running':
+            return status
+        task = cast(Task, task.bind())
+    return task.status
+
 def task() -> Optional[Task]:
+    if thread.local.task is not None:
+        return thread.local.task
     try:
         return pickle.loads(getenv(constants.SELF_ENVNAME, str).encode())
     except ValueError:
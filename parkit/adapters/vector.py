@@ -0,0 +1,290 @@
+# pylint: disable = broad-except
+import logging
+import math
+import struct
+
+from typing import (
+    Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+)
+
+import lmdb
+import numpy as np
+
+import parkit.storage.threadlocal as thread
+
+from parkit.adapters.sized import Sized
+from parkit.storage.context import transaction_context
+
+logger = logging.getLogger(__name__)
+
+#
+# Elements are stored in fixed-size blocks keyed by block number. The
+# absolute position of the oldest live element is kept in the state
+# database so the ring can drop whole blocks as it advances.
+#
+class Vector(Sized):
+
+    _dtype_cached: np.dtype = np.dtype('float64')
+
+    _block_size_cached: int = 4096
+
+    _maxsize_cached = math.inf
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        /, *,
+        metadata: Optional[Dict[str, Any]] = None,
+        site_uuid: Optional[str] = None,
+        on_init: Optional[Callable[[bool], None]] = None,
+        create: bool = False,
+        bind: bool = True,
+        dtype: Any = 'float64',
+        block_size: int = 4096,
+        maxsize: int = 0
+    ):
+        self.__layout: Tuple[str, int, float]
+
+        if block_size <= 0 or np.dtype(dtype).hasobject:
+            raise ValueError()
+
+        def _on_init(created: bool):
+            if created:
+                self.__layout = (
+                    np.dtype(dtype).str, block_size,
+                    maxsize if maxsize > 0 else math.inf
+                )
+            if on_init:
+                on_init(created)
+
+        super().__init__(
+            path, db_properties = [{'integerkey': True}, {}],
+            on_init = _on_init, metadata = metadata, site_uuid = site_uuid,
+            create = create, bind = bind
+        )
+
+        self.__load_layout()
+
+    def __setstate__(self, from_wire: Any):
+        super().__setstate__(from_wire)
+        self.__load_layout()
+
+    def __load_layout(self):
+        dtype, self._block_size_cached, self._maxsize_cached = self.__layout
+        self._dtype_cached = np.dtype(dtype)
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._dtype_cached
+
+    @property
+    def block_size(self) -> int:
+        return self._block_size_cached
+
+    @property
+    def maxsize(self) -> Optional[int]:
+        return int(self._maxsize_cached) if self._maxsize_cached != math.inf else None
+
+    def __extent(
+        self,
+        txn: lmdb.Transaction,
+        cursors: thread.CursorDict
+    ) -> Tuple[int, int]:
+        head = txn.get(key = b'head', db = self._userdb[1])
+        head = struct.unpack('@N', head)[0] if head is not None else 0
+        cursor = cursors[self._userdb[0]]
+        if not cursor.last():
+            return (head, head)
+        return (
+            head,
+            struct.unpack('@N', cursor.key())[0] * self._block_size_cached + \
+            len(cursor.value()) // self._dtype_cached.itemsize
+        )
+
+    def __read(
+        self,
+        cursors: thread.CursorDict,
+        start: int,
+        stop: int,
+        copy: bool
+    ) -> np.ndarray:
+        count = stop - start
+        if count <= 0:
+            return np.empty(0, dtype = self._dtype_cached)
+        block_size = self._block_size_cached
+        cursor = cursors[self._userdb[0]]
+        assert cursor.set_key(struct.pack('@N', start // block_size))
+        if not copy and start // block_size == (stop - 1) // block_size:
+            return np.frombuffer(
+                cursor.value(), dtype = self._dtype_cached, count = count,
+                offset = (start % block_size) * self._dtype_cached.itemsize
+            )
+        result = np.empty(count, dtype = self._dtype_cached)
+        filled = 0
+        while True:
+            block = np.frombuffer(cursor.value(), dtype = self._dtype_cached)
+            offset = max(start - struct.unpack('@N', cursor.key())[0] * block_size, 0)
+            n_items = min(count - filled, len(block) - offset)
+            result[filled:filled + n_items] = block[offset:offset + n_items]
+            filled += n_items
+            if filled == count:
+                return result
+            assert cursor.next()
+
+    def _extent(self) -> Tuple[int, int]:
+        try:
+            txn, cursors, _, implicit = \
+            thread.local.context.get(self._env, write = False, internal = True)
+            extent = self.__extent(txn, cursors)
+            if implicit:
+                txn.commit()
+        except BaseException as exc:
+            self._abort(exc, txn, implicit)
+        return extent
+
+    def _scan(
+        self,
+        offset: int,
+        limit: int
+    ) -> List[Tuple[int, Any]]:
+        try:
+            txn, cursors, _, implicit = \
+            thread.local.context.get(self._env, write = False, internal = True)
+            head, tail = self.__extent(txn, cursors)
+            start = max(offset, head)
+            stop = min(tail, start + limit)
+            entries = list(zip(range(start, stop), self.__read(cursors, start, stop, copy = True)))
+            if implicit:
+                txn.commit()
+        except BaseException as exc:
+            self._abort(exc, txn, implicit)
+        return entries
+
+    def __len__(self) -> int:
+        try:
+            txn, cursors, _, implicit = \
+            thread.local.context.get(self._env, write = False, internal = True)
+            head, tail = self.__extent(txn, cursors)
+            if implicit:
+                txn.commit()
+        except BaseException as exc:
+            self._abort(exc, txn, implicit)
+        return tail - head
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __getitem__(
+        self,
+        key: Union[int, slice],
+        /
+    ) -> Any:
+        try:
+            txn, cursors, _, implicit = \
+            thread.local.context.get(self._env, write = False, internal = True)
+            head, tail = self.__extent(txn, cursors)
+            if isinstance(key, slice):
+                indices = range(*key.indices(tail - head))
+                if indices:
+                    lower = min(indices[0], indices[-1])
+                    result = self.__read(
+                        cursors, head + lower, head + max(indices[0], indices[-1]) + 1,
+                        copy = implicit
+                    )[indices[0] - lower::indices.step]
+                else:
+                    result = np.empty(0, dtype = self._dtype_cached)
+            else:
+                if key < 0:
+                    key += tail - head
+                result = self.__read(cursors, head + key, head + key + 1, copy = True)[0] \
+                if 0 <= key < tail - head else None
+            if implicit:
+                txn.commit()
+        except BaseException as exc:
+            self._abort(exc, txn, implicit)
+        if result is None:
+            raise IndexError()
+        return result
+
+    def __iter__(self) -> Iterator[Any]:
+        with transaction_context(self._env, write = False, iterator = True) as (txn, cursors, _):
+            head, tail = self.__extent(txn, cursors)
+            if tail == head:
+                return
+            block_size = self._block_size_cached
+            cursor = cursors[self._userdb[0]]
+            if not cursor.set_key(struct.pack('@N', head // block_size)):
+                return
+            offset = head % block_size
+            while True:
+                yield from np.frombuffer(cursor.value(), dtype = self._dtype_cached)[offset:]
+                offset = 0
+                if not cursor.next():
+                    return
+
+    def append(
+        self,
+        values: Any,
+        /
+    ):
+        values = np.ascontiguousarray(values, dtype = self._dtype_cached).reshape(-1)
+        if not len(values):
+            return
+        itemsize = self._dtype_cached.itemsize
+        block_size = self._block_size_cached
+        raw = values.view(np.uint8)
+        try:
+            txn, cursors, _, implicit = \
+            thread.local.context.get(self._env, write = True, internal = True)
+
+            cursor = cursors[self._userdb[0]]
+
+            offset = block = 0
+            if cursor.last():
+                key_bytes = bytes(cursor.key())
+                block = struct.unpack('@N', key_bytes)[0] + 1
+                filled = len(cursor.value()) // itemsize
+                if filled < block_size:
+                    offset = min(block_size - filled, len(values))
+                    assert cursor.put(
+                        key = key_bytes,
+                        value = b''.join([cursor.value(), raw[:offset * itemsize]])
+                    )
+
+            blocks = []
+            while offset < len(values):
+                n_items = min(block_size, len(values) - offset)
+                blocks.append((
+                    struct.pack('@N', block),
+                    raw[offset * itemsize:(offset + n_items) * itemsize].tobytes()
+                ))
+                offset += n_items
+                block += 1
+            if blocks:
+                _, added = cursor.putmulti(blocks, append = True)
+                assert added == len(blocks)
+
+            if self._maxsize_cached != math.inf:
+                head, tail = self.__extent(txn, cursors)
+                if tail - head > self._maxsize_cached:
+                    head = int(tail - self._maxsize_cached)
+                    assert txn.put(
+                        key = b'head', value = struct.pack('@N', head),
+                        db = self._userdb[1]
+                    )
+                    assert cursor.first()
+                    while (struct.unpack('@N', cursor.key())[0] + 1) * block_size <= head:
+                        assert cursor.delete()
+
+            #
+            # The version advances by one per element, so stream() can treat a
+            # Vector like an Array. This happens immediately, even inside an
+            # explicit transaction, because the changed set only counts objects.
+            #
+            self._increment_version(cursors, len(values))
+            if implicit:
+                txn.commit()
+        except BaseException as exc:
+            self._abort(exc, txn, implicit)
+
+    extend = append
@@ -7,13 +7,17 @@ from typing import (
 
 from parkit.directory import directories
 from parkit.exceptions import ObjectNotFoundError
+from parkit.storage.entities import LazyEntity
 from parkit.storage.entity import Entity
 from parkit.storage.namespace import Namespace
 from parkit.utility import get_calling_modules
 
 logger = logging.getLogger(__name__)
 
-def bind_entity_to_symbol(entity: Entity, overwrite: bool = False) -> bool:
+def bind_entity_to_symbol(
+    entity: Union[Entity, LazyEntity],
+    overwrite: bool = False
+) -> bool:
     caller = get_calling_modules()[4]
     if caller == 'IPython.core.interactiveshell':
         module = sys.modules['__main__']
@@ -21,7 +25,10 @@ def bind_entity_to_symbol(entity: Entity, overwrite: bool = False) -> bool:
         module = sys.modules[caller]
     if not overwrite and hasattr(module, entity.name):
         return False
-    module.__setattr__(entity.name, entity)
+    module.__setattr__(
+        entity.name,
+        entity.bind() if isinstance(entity, LazyEntity) else entity
+    )
     return True
 
 def bind_symbol(
@@ -4,7 +4,11 @@ from typing import Optional
 
 import parkit.constants as constants
 
-from parkit.adapters.task import Task
+from parkit.adapters.fileio import sweep_blobs
+from parkit.adapters.task import (
+    get_task_status,
+    Task
+)
 from parkit.directory import directories
 from parkit.exceptions import StoragePathError
 
@@ -15,12 +19,14 @@ def compactify(site_uuid: Optional[str] = None):
         try:
             if directory.path not in [constants.TASK_NAMESPACE]:
                 for obj in directory:
-                    if obj.name.startswith('__') and obj.name.endswith('__'):
-                        obj.drop()
+                    if obj.name.startswith('__') and obj.name.endswith('__') and \
+                    not obj.name.startswith(constants.CONSUMER_PREFIX):
+                        obj.bind().drop()
             elif directory.path in [constants.TASK_NAMESPACE]:
                 for obj in directory:
-                    if isinstance(obj, Task):
-                        if obj.status in ['cancelled', 'finished', 'crashed', 'failed']:
-                            obj.drop()
+                    if issubclass(obj.type, Task):
+                        if get_task_status(obj) in ['cancelled', 'finished', 'crashed', 'failed']:
+                            obj.bind().drop()
+            sweep_blobs(directory)
         except StoragePathError:
             pass
@@ -0,0 +1,179 @@
+import logging
+
+from typing import (
+    Any, Callable, Dict, Iterable, Optional, Tuple, Union
+)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+logger = logging.getLogger(__name__)
+
+codecs = ['zstd', 'lz4']
+
+#
+# Values compressed by a Codec carry a one byte header so uncompressed,
+# zstd, dictionary zstd and lz4 payloads can be mixed and decoded without
+# consulting the entity settings.
+#
+HEADER_RAW = b'\x00'
+HEADER_ZSTD = b'\x01'
+HEADER_ZSTD_DICT = b'\x02'
+HEADER_LZ4 = b'\x03'
+
+def check_codec(codec: str):
+    if codec not in codecs:
+        raise ValueError()
+    if codec == 'zstd' and zstandard is None or codec == 'lz4' and lz4_frame is None:
+        raise ImportError()
+
+def compress(
+    data: Any,
+    codec: str,
+    /, *,
+    level: Optional[int] = None,
+    dictionary: Optional[bytes] = None
+) -> bytes:
+    check_codec(codec)
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(
+            level = level if level is not None else 3,
+            dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        ).compress(data)
+    if codec == 'lz4':
+        return lz4_frame.compress(
+            data, compression_level = level if level is not None else 0
+        )
+    raise ValueError()
+
+def decompress(
+    data: Any,
+    codec: str,
+    /, *,
+    dictionary: Optional[bytes] = None
+) -> bytes:
+    check_codec(codec)
+    if codec == 'zstd':
+        return zstandard.ZstdDecompressor(
+            dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        ).decompress(data)
+    if codec == 'lz4':
+        return lz4_frame.decompress(data)
+    raise ValueError()
+
+def train_dictionary(
+    samples: Iterable[bytes],
+    /, *,
+    size: int = 16384
+) -> bytes:
+    check_codec('zstd')
+    return zstandard.train_dictionary(size, list(samples)).as_bytes()
+
+class Codec():
+
+    def __init__(
+        self,
+        codec: str = 'zstd',
+        /, *,
+        level: Optional[int] = None,
+        dictionary: Optional[bytes] = None,
+        threshold: int = 64
+    ):
+        check_codec(codec)
+        if dictionary and codec != 'zstd':
+            raise ValueError()
+        self._codec = codec
+        self._level = level
+        self._dictionary = dictionary
+        self._threshold = threshold
+        self._compressor: Any = None
+        self._decompressors: Dict[bytes, Any] = {}
+        if codec == 'zstd':
+            self._compressor = zstandard.ZstdCompressor(
+                level = level if level is not None else 3,
+                dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+            )
+
+    @staticmethod
+    def from_settings(
+        settings: Union[str, 'Codec', Tuple[str, Optional[int], Optional[bytes], int]]
+    ) -> 'Codec':
+        if isinstance(settings, Codec):
+            return settings
+        if isinstance(settings, str):
+            return Codec(settings)
+        codec, level, dictionary, threshold = settings
+        return Codec(codec, level = level, dictionary = dictionary, threshold = threshold)
+
+    @property
+    def settings(self) -> Tuple[str, Optional[int], Optional[bytes], int]:
+        return (self._codec, self._level, self._dictionary, self._threshold)
+
+    def wrap(
+        self,
+        encode: Optional[Callable[..., Any]],
+        decode: Optional[Callable[..., Any]]
+    ) -> Tuple[Callable[..., bytes], Callable[..., Any]]:
+        if encode:
+            encoder = lambda value: self.compress(encode(value))
+        else:
+            encoder = self.compress
+        if decode:
+            decoder = lambda data, *args: decode(self.decompress(data), *args)
+        else:
+            decoder = self.decompress
+        return (encoder, decoder)
+
+    @property
+    def codec(self) -> str:
+        return self._codec
+
+    def compress(self, data: Any) -> bytes:
+        if len(data) < self._threshold:
+            return b''.join([HEADER_RAW, data])
+        if self._codec == 'zstd':
+            compressed = self._compressor.compress(data)
+            header = HEADER_ZSTD_DICT if self._dictionary else HEADER_ZSTD
+        else:
+            compressed = lz4_frame.compress(
+                data, compression_level = self._level if self._level is not None else 0
+            )
+            header = HEADER_LZ4
+        if len(compressed) >= len(data):
+            return b''.join([HEADER_RAW, data])
+        return b''.join([header, compressed])
+
+    #
+    # The decompressor follows the header, not the codec, so values written
+    # before the codec changed still decode.
+    #
+    def __get_decompressor(self, header: bytes) -> Any:
+        if header not in self._decompressors:
+            check_codec('zstd')
+            if header == HEADER_ZSTD_DICT:
+                if not self._dictionary:
+                    raise ValueError()
+                self._decompressors[header] = zstandard.ZstdDecompressor(
+                    dict_data = zstandard.ZstdCompressionDict(self._dictionary)
+                )
+            else:
+                self._decompressors[header] = zstandard.ZstdDecompressor()
+        return self._decompressors[header]
+
+    def decompress(self, data: Any) -> bytes:
+        header = bytes(data[:1])
+        if header == HEADER_RAW:
+            return bytes(data[1:])
+        if header in (HEADER_ZSTD, HEADER_ZSTD_DICT):
+            return self.__get_decompressor(header).decompress(data[1:])
+        if header == HEADER_LZ4:
+            check_codec('lz4')
+            return lz4_frame.decompress(data[1:])
+        raise ValueError()
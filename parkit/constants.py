@@ -4,6 +4,15 @@ from parkit.typeddicts import Profiles
 
 RUNNING_CACHE_MAXSIZE = 4096
 RUNNING_CACHE_TTL = 1.
+BIND_CACHE_MAXSIZE = 4096
+
+DICT_ACCESS_BUFFER_SIZE = 1024
+
+DICT_UPDATE_CHUNK_SIZE = 1024
+
+WORKER_CLAIM_SCAN_SIZE = 64
+
+MAX_AUTOSCALING_LOG_ENTRIES = 10000
 
 PROCESS_UID_ENVNAME: str = 'PARKIT_PROCESS_UID'
 
@@ -16,17 +25,35 @@ DEFAULT_PROCESS_TERMINATION_TIMEOUT: float = 1.
 DEFAULT_CLUSTER_CONCURRENCY: int = min(max(4, multiprocessing.cpu_count()), 8)
 DEFAULT_MONITOR_POLLING_INTERVAL: float = 5.
 DEFAULT_WORKER_POLLING_INTERVAL: float = 0.02
+DEFAULT_ASYNCABLE_MAX_THREADS: int = 8
+DEFAULT_WORKER_MAX_TASKS: int = 0
+DEFAULT_WORKER_MAX_RSS_BYTES: int = 0
+DEFAULT_WORKER_MAX_IDLE_SECONDS: float = 0.
 DEFAULT_ADAPTER_POLLING_INTERVAL: float = 0.05
 DEFAULT_SCHEDULER_HEARTBEAT_INTERVAL: float = 1.
+DEFAULT_NODE_HEARTBEAT_INTERVAL: float = 1.
+DEFAULT_NODE_HEARTBEAT_TIMEOUT: float = 5.
 DEFAULT_MAX_SYSLOG_ENTRIES: int = 100000
+DEFAULT_SYSLOG_BUFFER_SIZE: int = 10000
+DEFAULT_SYSLOG_FLUSH_INTERVAL: float = 0.1
+DEFAULT_SYSLOG_OVERFLOW_POLICY: str = 'drop'
 
 MAX_SYSLOG_ENTRIES_ENVNAME: str = 'PARKIT_MAX_SYSLOG_ENTRIES'
+SYSLOG_BUFFER_SIZE_ENVNAME: str = 'PARKIT_SYSLOG_BUFFER_SIZE'
+SYSLOG_FLUSH_INTERVAL_ENVNAME: str = 'PARKIT_SYSLOG_FLUSH_INTERVAL'
+SYSLOG_OVERFLOW_POLICY_ENVNAME: str = 'PARKIT_SYSLOG_OVERFLOW_POLICY'
 PROCESS_TERMINATION_TIMEOUT_ENVNAME: str = 'PARKIT_PROCESS_TERMINATION_TIMEOUT'
 CLUSTER_CONCURRENCY_ENVNAME: str = 'PARKIT_CLUSTER_CONCURRENCY'
 MONITOR_POLLING_INTERVAL_ENVNAME: str = 'PARKIT_MONITOR_POLLING_INTERVAL'
 WORKER_POLLING_INTERVAL_ENVNAME: str = 'PARKIT_WORKER_POLLING_INTERVAL'
+WORKER_MAX_TASKS_ENVNAME: str = 'PARKIT_WORKER_MAX_TASKS'
+WORKER_MAX_RSS_BYTES_ENVNAME: str = 'PARKIT_WORKER_MAX_RSS_BYTES'
+WORKER_MAX_IDLE_SECONDS_ENVNAME: str = 'PARKIT_WORKER_MAX_IDLE_SECONDS'
+WORKER_CPUS_ENVNAME: str = 'PARKIT_WORKER_CPUS'
 ADAPTER_POLLING_INTERVAL_ENVNAME: str = 'PARKIT_ADAPTER_POLLING_INTERVAL'
 SCHEDULER_HEARTBEAT_INTERVAL_ENVNAME: str = 'PARKIT_SCHEDULER_HEARTBEAT_INTERVAL'
+NODE_HEARTBEAT_INTERVAL_ENVNAME: str = 'PARKIT_NODE_HEARTBEAT_INTERVAL'
+NODE_HEARTBEAT_TIMEOUT_ENVNAME: str = 'PARKIT_NODE_HEARTBEAT_TIMEOUT'
 
 SELF_ENVNAME: str = 'PARKIT_SELF_REFERENCE'
 
@@ -82,8 +109,12 @@ MODULE_NAMESPACE: str = 'module'
 SUBMIT_QUEUE_PATH: str = '__task__/__submit_queue__'
 NODE_TERMINATION_QUEUE_PATH: str = '__task__/__node_termination_queue__'
 CLUSTER_STATE_DICT_PATH: str = '__task__/__cluster_state_dict__'
+AUTOSCALING_LOG_PATH: str = '__task__/__autoscaling_log__'
+WORKER_RETIREMENT_DICT_PATH: str = '__task__/__worker_retirement_dict__'
 SYSLOG_PATH: str = 'memory/syslog/__syslog__'
 PIDTABLE_DICT_PATH: str = 'memory/pidtable/__pidtable__'
+HEARTBEAT_DICT_PATH: str = 'memory/heartbeat/__heartbeat__'
+CONSUMER_PREFIX: str = '__consumer_'
 
 ATTRIBUTE_DATABASE: str = '__attribute__'
 VERSION_DATABASE: str = '__version__'
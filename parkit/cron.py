@@ -0,0 +1,111 @@
+import datetime
+import logging
+
+from typing import (
+    Dict, List, Set, Tuple
+)
+
+logger = logging.getLogger(__name__)
+
+aliases: Dict[str, str] = {
+    '@yearly': '0 0 1 1 *',
+    '@annually': '0 0 1 1 *',
+    '@monthly': '0 0 1 * *',
+    '@weekly': '0 0 * * 0',
+    '@daily': '0 0 * * *',
+    '@midnight': '0 0 * * *',
+    '@hourly': '0 * * * *'
+}
+
+month_names: List[str] = [
+    'jan', 'feb', 'mar', 'apr', 'may', 'jun',
+    'jul', 'aug', 'sep', 'oct', 'nov', 'dec'
+]
+
+day_names: List[str] = ['sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat']
+
+fields: List[Tuple[int, int, List[str], int]] = [
+    (0, 59, [], 0),
+    (0, 23, [], 0),
+    (1, 31, [], 0),
+    (1, 12, month_names, 1),
+    (0, 7, day_names, 0)
+]
+
+def parse_field(
+    text: str,
+    lower: int,
+    upper: int,
+    names: List[str],
+    base: int
+) -> Tuple[Set[int], bool]:
+    values: Set[int] = set()
+    for part in text.lower().split(','):
+        if '/' in part:
+            part, step_text = part.split('/', 1)
+            step = int(step_text)
+            if step <= 0:
+                raise ValueError()
+        else:
+            step = 1
+        if part == '*':
+            first, last = lower, upper
+        else:
+            bounds = [
+                names.index(bound) + base if bound in names else int(bound)
+                for bound in part.split('-', 1)
+            ]
+            first = bounds[0]
+            last = bounds[1] if len(bounds) == 2 else (upper if step > 1 else first)
+        if not lower <= first <= last <= upper:
+            raise ValueError()
+        values.update(range(first, last + 1, step))
+    return (values, text != '*')
+
+#
+# Standard five field expressions (minute, hour, day of month, month, day of
+# week) with lists, ranges, steps, month and day names and the usual @ aliases.
+# As in cron, when both day fields are restricted a day matches either one.
+#
+class CronExpression():
+
+    def __init__(self, expression: str):
+        self._expression = expression
+        parts = aliases.get(expression.strip().lower(), expression).split()
+        if len(parts) != 5:
+            raise ValueError()
+        parsed = [parse_field(part, *field) for part, field in zip(parts, fields)]
+        self._minutes, _ = parsed[0]
+        self._hours, _ = parsed[1]
+        self._days, self._days_restricted = parsed[2]
+        self._months, _ = parsed[3]
+        weekdays, self._weekdays_restricted = parsed[4]
+        self._weekdays = {day % 7 for day in weekdays}
+
+    @property
+    def expression(self) -> str:
+        return self._expression
+
+    def __day_matches(self, moment: datetime.datetime) -> bool:
+        day = moment.day in self._days
+        weekday = (moment.weekday() + 1) % 7 in self._weekdays
+        if self._days_restricted and self._weekdays_restricted:
+            return day or weekday
+        return day and weekday
+
+    def next_after(self, moment: datetime.datetime) -> datetime.datetime:
+        moment = moment.replace(second = 0, microsecond = 0) + datetime.timedelta(minutes = 1)
+        limit = moment + datetime.timedelta(days = 366 * 8)
+        while moment < limit:
+            if moment.month not in self._months:
+                moment = (moment.replace(day = 1, hour = 0, minute = 0) + \
+                datetime.timedelta(days = 32)).replace(day = 1)
+            elif not self.__day_matches(moment):
+                moment = moment.replace(hour = 0, minute = 0) + datetime.timedelta(days = 1)
+            elif moment.hour not in self._hours:
+                moment = moment.replace(minute = 0) + datetime.timedelta(hours = 1)
+            elif moment.minute not in self._minutes:
+                moment += datetime.timedelta(minutes = 1)
+            else:
+                return moment
+        raise ValueError()
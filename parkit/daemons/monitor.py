@@ -1,19 +1,38 @@
 # pylint: disable = broad-except, protected-access, invalid-name
 import logging
+import math
 import os
+import time
 import uuid
 
+from typing import (
+    Any, Dict, Optional, Tuple
+)
+
+import psutil
+
 import parkit.constants as constants
 
+from parkit.adapters.dict import Dict as StateDict
 from parkit.adapters.queue import Queue
+from parkit.exceptions import ObjectNotFoundError
 from parkit.node import (
-    is_running,
     launch_node,
     terminate_node
 )
+from parkit.storage.context import transaction_context
 from parkit.storage.site import get_default_site
-from parkit.system.cluster import get_concurrency
+from parkit.system.cluster import (
+    get_autoscaling_log,
+    get_concurrency
+)
+from parkit.system.heartbeat import heartbeat
 from parkit.system.pidtable import pidtable
+from parkit.system.placement import (
+    blas_envnames,
+    format_cpu_list,
+    get_cpu_sets
+)
 from parkit.utility import (
     getenv,
     polling_loop
@@ -21,6 +40,48 @@ from parkit.utility import (
 
 logger = logging.getLogger(__name__)
 
+def get_backlog(submit_queue: Queue) -> Tuple[int, float]:
+    with transaction_context(submit_queue._env, write = False):
+        depth = len(submit_queue)
+        if not depth:
+            return (0, 0.)
+        head, _ = submit_queue._extent()
+        entries = submit_queue._scan(head, 1)
+        try:
+            waited = (time.time_ns() - entries[0][1].created) / 1e9 if entries else 0.
+        except ObjectNotFoundError:
+            waited = 0.
+    return (depth, max(waited, 0.))
+
+def autoscale(
+    config: Dict[str, Any],
+    workers: int,
+    depth: int,
+    waited: float,
+    cpu: float,
+    idle: float
+) -> Tuple[int, Optional[str], str]:
+    if workers < config['min_workers']:
+        return (config['min_workers'], 'up', 'minimum')
+    if workers > config['max_workers']:
+        return (config['max_workers'], 'down', 'maximum')
+    if depth and (depth > config['queue_depth'] * workers or waited >= config['wait_time']):
+        reason = 'queue depth' if depth > config['queue_depth'] * workers else 'wait time'
+        if workers == config['max_workers']:
+            return (workers, 'hold', 'maximum')
+        if cpu >= config['cpu_limit']:
+            return (workers, 'hold', 'cpu limit')
+        return (
+            min(
+                config['max_workers'],
+                max(workers + 1, math.ceil(depth / config['queue_depth']))
+            ),
+            'up', reason
+        )
+    if not depth and idle >= config['idle_time'] and workers > config['min_workers']:
+        return (workers - 1, 'down', 'idle')
+    return (workers, None, '')
+
 if __name__ == '__main__':
 
     try:
@@ -33,6 +94,20 @@ if __name__ == '__main__':
 
         termination_queue = Queue(constants.NODE_TERMINATION_QUEUE_PATH, create = True)
 
+        submit_queue = Queue(constants.SUBMIT_QUEUE_PATH, create = True)
+
+        cluster_state = StateDict(constants.CLUSTER_STATE_DICT_PATH, create = True)
+
+        autoscaling_log = get_autoscaling_log()
+
+        worker_retirement = StateDict(constants.WORKER_RETIREMENT_DICT_PATH, create = True)
+
+        psutil.cpu_percent(interval = None)
+
+        last_busy = time.time()
+
+        last_decision: Optional[Tuple[str, str]] = None
+
         for i in polling_loop(polling_interval):
 
             try:
@@ -62,7 +137,7 @@ if __name__ == '__main__':
                     while True:
                         assert index < len(monitor_nodes)
                         if node_uid != monitor_nodes[index][2]:
-                            if is_running(monitor_nodes[index][2], monitor_nodes[index][0]):
+                            if heartbeat.is_alive(monitor_nodes[index][2], monitor_nodes[index][0]):
                                 logger.info('duplicate monitor (%s) terminating', node_uid)
                                 should_exit = True
                                 break
@@ -82,7 +157,65 @@ if __name__ == '__main__':
                     entry['cluster_uid'] == cluster_uid
                 ]
 
-                concurrency = get_concurrency()
+                #
+                # Retiring workers are left out of the count so replacements
+                # are started for them below. Each one is then given the node
+                # uid of its replacement, or an empty string if none was
+                # started, and exits once that worker is up.
+                #
+
+                retiring = dict(worker_retirement)
+
+                for uid in retiring:
+                    if uid not in worker_nodes:
+                        worker_retirement.pop(uid, None)
+
+                pending_retirement = [
+                    uid for uid, replacement in retiring.items() \
+                    if uid in worker_nodes and replacement is None
+                ]
+
+                worker_nodes = [uid for uid in worker_nodes if uid not in retiring]
+
+                replacements = []
+
+                #
+                # Pick the worker count, either the fixed concurrency or the
+                # autoscaling target. Every change, and the first of any run
+                # of held scale ups, is written to the autoscaling log.
+                #
+
+                config = cluster_state.get('autoscaling')
+
+                if config is None:
+                    concurrency = get_concurrency()
+                    last_decision = None
+                else:
+                    depth, waited = get_backlog(submit_queue)
+                    cpu = psutil.cpu_percent(interval = None)
+                    if depth:
+                        last_busy = time.time()
+                    current = cluster_state.get('workers', config['min_workers'])
+                    concurrency, action, reason = autoscale(
+                        config, current, depth, waited, cpu,
+                        time.time() - last_busy
+                    )
+                    if action is not None and \
+                    (action != 'hold' or last_decision != (action, reason)):
+                        if action == 'down':
+                            last_busy = time.time()
+                        cluster_state['workers'] = concurrency
+                        autoscaling_log.append(dict(
+                            timestamp = time.time_ns(), action = action,
+                            reason = reason, previous = current,
+                            workers = concurrency, queue_depth = depth,
+                            wait_time = waited, cpu_percent = cpu
+                        ))
+                        logger.info(
+                            'autoscaling %s from %i to %i workers (%s)',
+                            action, current, concurrency, reason
+                        )
+                    last_decision = (action, reason) if action is not None else None
 
                 pre_scan_delta = \
                 concurrency - (len(worker_nodes) - pre_scan_termination_count)
@@ -94,29 +227,68 @@ if __name__ == '__main__':
                     default_site = get_default_site()
                     assert default_site is not None
                     storage_path, _ = default_site
+                    #
+                    # New workers take the cpu set that the fewest live
+                    # workers overlap. The sets are cut for the largest
+                    # worker count, so they stay put while autoscaling moves
+                    # between the minimum and maximum.
+                    #
+                    placement = cluster_state.get('placement')
+                    if placement is not None:
+                        cpu_sets = placement['cpu_map'] if placement['cpu_map'] else \
+                        get_cpu_sets(
+                            max(config['max_workers'] if config else concurrency, 1),
+                            cpus_per_worker = placement['cpus_per_worker']
+                        )
+                        placed = [
+                            set(entry['cpus']) for entry in snapshot.values() \
+                            if entry.get('cpus') and (
+                                entry['node_uid'] in worker_nodes or \
+                                entry['node_uid'] in retiring
+                            )
+                        ]
+                        usage = [
+                            sum(1 for cpus in placed if cpus.intersection(cpu_set))
+                            for cpu_set in cpu_sets
+                        ]
                     for j in range(post_scan_delta):
                         worker_node_uid = '-'.join([
                             constants.WORKER_DAEMON_MODULE.split('.')[-1],
                             str(uuid.uuid4())
                         ])
                         process_uid = str(uuid.uuid4())
+                        environment = {
+                            constants.DEFAULT_SITE_PATH_ENVNAME: storage_path,
+                            constants.PROCESS_UID_ENVNAME: process_uid
+                        }
+                        cpus = None
+                        if placement is not None:
+                            index = usage.index(min(usage))
+                            usage[index] += 1
+                            cpus = cpu_sets[index]
+                            environment[constants.WORKER_CPUS_ENVNAME] = format_cpu_list(cpus)
+                            if placement['blas_threads'] is not None:
+                                for name in blas_envnames:
+                                    environment[name] = str(placement['blas_threads'])
                         pid = launch_node(
                             worker_node_uid,
                             constants.WORKER_DAEMON_MODULE,
                             cluster_uid,
-                            {
-                                constants.DEFAULT_SITE_PATH_ENVNAME: storage_path,
-                                constants.PROCESS_UID_ENVNAME: process_uid
-                            }
+                            environment
                         )
                         pidtable.set_pid_entry(
                             pid = pid, process_uid = process_uid,
-                            node_uid = worker_node_uid, cluster_uid = cluster_uid
+                            node_uid = worker_node_uid, cluster_uid = cluster_uid,
+                            cpus = cpus
                         )
+                        replacements.append(worker_node_uid)
                 elif pre_scan_delta < 0:
                     for j in range(abs(pre_scan_delta)):
                         termination_queue.put(True)
 
+                for uid in pending_retirement:
+                    worker_retirement[uid] = replacements.pop(0) if replacements else ''
+
                 scheduler_nodes = [
                     entry['node_uid'] for entry in snapshot.values() \
                     if isinstance(entry['node_uid'], str) and \
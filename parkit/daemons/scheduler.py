@@ -1,17 +1,23 @@
 # pylint: disable = broad-except
 import logging
 import os
+import time
+
+from typing import cast
 
 import parkit.constants as constants
 
-from parkit.adapters.scheduler import Scheduler
+from parkit.adapters.scheduler import (
+    get_due_schedules,
+    get_schedule_index,
+    Periodic,
+    remove_schedule
+)
 from parkit.exceptions import ObjectNotFoundError
+from parkit.storage.environment import get_environment_threadsafe
 from parkit.storage.namespace import Namespace
 from parkit.storage.site import get_default_site
-from parkit.utility import (
-    getenv,
-    polling_loop
-)
+from parkit.utility import getenv
 
 logger = logging.getLogger(__name__)
 
@@ -24,16 +30,60 @@ if __name__ == '__main__':
 
         logger.info('scheduler (%s) started for site %s', node_uid, get_default_site())
 
-        for i in polling_loop(getenv(constants.SCHEDULER_HEARTBEAT_INTERVAL_ENVNAME, float)):
-            for scheduler in Namespace(constants.SCHEDULER_NAMESPACE, create = True):
-                if isinstance(scheduler, Scheduler):
-                    try:
-                        if scheduler.is_scheduled():
-                            scheduler.asyncable(*scheduler.args, **scheduler.kwargs)
-                    except ObjectNotFoundError:
-                        pass
-                    except Exception:
-                        logger.exception('error scheduling asyncable')
+        namespace = Namespace(constants.SCHEDULER_NAMESPACE, create = True)
+        _, env, _, _, _, _ = get_environment_threadsafe(
+            namespace.storage_path, namespace.path, create = True
+        )
+        index = get_schedule_index(env, namespace.site_uuid)
+
+        #
+        # Schedules created before the index existed are indexed once here.
+        #
+        for scheduler in namespace:
+            try:
+                if issubclass(scheduler.type, Periodic):
+                    cast(Periodic, scheduler.bind()).reindex()
+            except Exception:
+                logger.exception('error indexing schedule %s', scheduler.name)
+
+        heartbeat_ns = int(getenv(constants.SCHEDULER_HEARTBEAT_INTERVAL_ENVNAME, float) * 1e9)
+        polling_interval = getenv(constants.ADAPTER_POLLING_INTERVAL_ENVNAME, float)
+
+        while True:
+            txnid = env.info()['last_txnid']
+            due, next_ns = get_due_schedules(env, index, time.time_ns())
+            failed = False
+            for due_ns, name in due:
+                try:
+                    scheduler = Periodic(
+                        '/'.join([constants.SCHEDULER_NAMESPACE, name]),
+                        create = False, bind = True
+                    )
+                    if scheduler.is_scheduled():
+                        scheduler.asyncable(*scheduler.args, **scheduler.kwargs)
+                    else:
+                        scheduler.reindex(due_ns)
+                except ObjectNotFoundError:
+                    remove_schedule(env, index, name, due_ns)
+                except Exception:
+                    failed = True
+                    logger.exception('error scheduling asyncable')
+            if due and not failed:
+                continue
+            #
+            # Sleep until the next schedule is due or the heartbeat, whichever
+            # is first. Any write to the scheduler namespace, such as a new
+            # schedule, ends the sleep early.
+            #
+            deadline_ns = time.time_ns() + (
+                heartbeat_ns if failed or next_ns is None else \
+                max(min(next_ns - time.time_ns(), heartbeat_ns), 0)
+            )
+            while env.info()['last_txnid'] == txnid:
+                remaining_ns = deadline_ns - time.time_ns()
+                if remaining_ns <= 0:
+                    break
+                time.sleep(min(remaining_ns / 1e9, polling_interval))
 
     except (SystemExit, KeyboardInterrupt, GeneratorExit):
         pass
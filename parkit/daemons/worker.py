@@ -1,4 +1,5 @@
 # pylint: disable = broad-except, invalid-name, protected-access
+import concurrent.futures
 import logging
 import os
 import queue
@@ -6,13 +7,37 @@ import pickle
 import sys
 import time
 
+from typing import (
+    Any, Dict, Optional, Set
+)
+
+import cloudpickle
+import lmdb
+import psutil
+
 import parkit.constants as constants
+import parkit.storage.threadlocal as thread
 
+from parkit.adapters.dict import Dict as StateDict
 from parkit.adapters.queue import Queue
+from parkit.adapters.task import (
+    get_metrics_database,
+    record_metrics
+)
 from parkit.storage.context import transaction_context
 from parkit.storage.environment import get_environment_threadsafe
-from parkit.storage.site import get_default_site
+from parkit.storage.site import (
+    get_default_site,
+    set_default_site
+)
+from parkit.system.heartbeat import heartbeat
+from parkit.system.pidtable import pidtable
+from parkit.system.placement import (
+    parse_cpu_list,
+    set_affinity
+)
 from parkit.utility import (
+    envexists,
     getenv,
     polling_loop,
     setenv
@@ -20,6 +45,79 @@ from parkit.utility import (
 
 logger = logging.getLogger(__name__)
 
+def run_task(
+    task: Any,
+    environment: lmdb.Environment,
+    threaded: bool,
+    claimed: int,
+    metrics_database: Any
+):
+    try:
+        result = error = None
+        resolved = decoded = executed = encoded = args_size = 0
+        result_binary = cloudpickle.dumps(None)
+        if threaded:
+            thread.local.task = task
+        else:
+            setenv(
+                constants.SELF_ENVNAME,
+                pickle.dumps(task, 0).decode()
+            )
+        logger.info('start task %s on pid %i', task.asyncable.path, os.getpid())
+        timestamp = time.perf_counter_ns()
+        target = task.asyncable.resolve()
+        resolved = time.perf_counter_ns() - timestamp
+        timestamp += resolved
+        args, kwargs, args_size = task._get_payload()
+        decoded = time.perf_counter_ns() - timestamp
+        timestamp += decoded
+        result = target(*args, **kwargs)
+        executed = time.perf_counter_ns() - timestamp
+        timestamp += executed
+        result_binary = cloudpickle.dumps(result)
+        encoded = time.perf_counter_ns() - timestamp
+    except Exception as exc:
+        logger.exception('error for task: %s', task.asyncable.path)
+        error = exc
+    finally:
+        if threaded:
+            thread.local.task = None
+        else:
+            setenv(
+                constants.SELF_ENVNAME,
+                None
+            )
+        timestamp = time.perf_counter_ns()
+        with transaction_context(environment, write = True) as (txn, _, _):
+            task._result_binary = result_binary
+            task._error = error
+            task._status = \
+            ('failed' if error is not None else 'finished') \
+            if task._status != 'cancelled' else 'cancelled'
+            task._end_timestamp = time.time_ns()
+            task._metrics = (
+                max(task._start_timestamp - task._created_timestamp, 0),
+                claimed, resolved, decoded, executed, encoded,
+                time.perf_counter_ns() - timestamp,
+                args_size, len(result_binary)
+            )
+            record_metrics(txn, metrics_database, task._asyncable_uuid, task._metrics)
+
+def get_retirement_reason(
+    claimed: int,
+    idle: Optional[float]
+) -> Optional[str]:
+    max_tasks = getenv(constants.WORKER_MAX_TASKS_ENVNAME, int)
+    max_rss_bytes = getenv(constants.WORKER_MAX_RSS_BYTES_ENVNAME, int)
+    max_idle_seconds = getenv(constants.WORKER_MAX_IDLE_SECONDS_ENVNAME, float)
+    if max_tasks > 0 and claimed >= max_tasks:
+        return 'task count'
+    if max_rss_bytes > 0 and psutil.Process().memory_info().rss >= max_rss_bytes:
+        return 'rss'
+    if max_idle_seconds > 0 and idle is not None and idle >= max_idle_seconds:
+        return 'idle time'
+    return None
+
 if __name__ == '__main__':
 
     try:
@@ -29,6 +127,16 @@ if __name__ == '__main__':
 
         logger.info('worker (%s) started for site %s', node_uid, get_default_site())
 
+        if envexists(constants.WORKER_CPUS_ENVNAME):
+            cpus = parse_cpu_list(getenv(constants.WORKER_CPUS_ENVNAME, str))
+            try:
+                set_affinity(cpus)
+                pidtable.set_pid_entry(cpus = cpus)
+                logger.info('worker (%s) pinned to cpus %s', node_uid, cpus)
+            except (NotImplementedError, OSError):
+                pidtable.set_pid_entry()
+                logger.exception('worker (%s) could not be pinned', node_uid)
+
         submit_queue = Queue(constants.SUBMIT_QUEUE_PATH, create = True)
 
         _, environment, _, _, _, _ = get_environment_threadsafe(
@@ -38,57 +146,123 @@ if __name__ == '__main__':
 
         termination_queue = Queue(constants.NODE_TERMINATION_QUEUE_PATH, create = True)
 
+        task_metrics = get_metrics_database(environment, submit_queue.site_uuid)
+
         polling_interval = getenv(constants.WORKER_POLLING_INTERVAL_ENVNAME, float)
 
+        #
+        # A worker that reaches its task count, rss or idle limit registers in
+        # the retirement dict and stops claiming tasks, letting the ones on its
+        # thread pools finish. The monitor starts a replacement and records its
+        # node uid, or an empty string when none is needed, and the worker
+        # exits once the replacement has a heartbeat. If the monitor does not
+        # respond the worker exits anyway after a grace period.
+        #
+        retirement = StateDict(constants.WORKER_RETIREMENT_DICT_PATH, create = True)
+
+        retirement_grace_period = \
+        2 * getenv(constants.MONITOR_POLLING_INTERVAL_ENVNAME, float) + \
+        getenv(constants.NODE_HEARTBEAT_TIMEOUT_ENVNAME, float)
+
+        claimed = 0
+        last_active = time.time()
+        retiring_since: Optional[float] = None
+
+        #
+        # Tasks of asyncables with the thread executor run on a pool per
+        # asyncable. A task is only claimed while its pool has a free thread,
+        # so waiting tasks stay in the submit queue where any worker can take
+        # them. The claim scans past them to the first task it can run.
+        #
+        pools: Dict[str, concurrent.futures.ThreadPoolExecutor] = {}
+        running: Dict[str, Set[concurrent.futures.Future]] = {}
+
         for i in polling_loop(polling_interval):
+            if retiring_since is None:
+                reason = get_retirement_reason(
+                    claimed,
+                    time.time() - last_active \
+                    if not any(running.values()) else None
+                )
+                if reason is not None:
+                    logger.info('worker (%s) retiring on %s', node_uid, reason)
+                    retirement[node_uid] = None
+                    retiring_since = time.time()
+            if retiring_since is not None:
+                replacement = retirement.get(node_uid)
+                if replacement == '' or \
+                replacement is not None and replacement in heartbeat or \
+                time.time() - retiring_since > retirement_grace_period:
+                    for pool in pools.values():
+                        pool.shutdown(wait = True)
+                    retirement.pop(node_uid, None)
+                    logger.info('worker (%s) retired', node_uid)
+                    sys.exit(0)
+                for futures in running.values():
+                    futures.difference_update([future for future in futures if future.done()])
+                continue
             while True:
                 try:
                     if len(termination_queue):
                         _ = termination_queue.get()
                         logger.info('worker (%s) terminating on request', node_uid)
+                        for pool in pools.values():
+                            pool.shutdown(wait = True)
                         sys.exit(0)
                 except queue.Empty:
                     pass
-                try:
-                    if len(submit_queue):
-                        with transaction_context(environment, write = True):
-                            task = submit_queue.get()
-                            if task._status == 'submitted':
-                                task._status = 'running'
-                                task._pid = os.getpid()
-                                task._node_uid = node_uid
-                                task._start_timestamp = time.time_ns()
-                            else:
-                                continue
-                    else:
-                        break
-                except queue.Empty:
+                for futures in running.values():
+                    futures.difference_update([future for future in futures if future.done()])
+                if any(running.values()):
+                    last_active = time.time()
+                if not len(submit_queue):
                     break
-                try:
-                    result = error = None
-                    setenv(
-                        constants.SELF_ENVNAME,
-                        pickle.dumps(task, 0).decode()
-                    )
-                    logger.info('start task %s on pid %i', task.asyncable.path, os.getpid())
-                    result = task.asyncable.invoke(
-                        args = task.args, kwargs = task.kwargs
-                    )
-                except Exception as exc:
-                    logger.exception('error for task: %s', task.asyncable.path)
-                    error = exc
-                finally:
-                    setenv(
-                        constants.SELF_ENVNAME,
-                        None
+                timestamp = time.perf_counter_ns()
+                with transaction_context(environment, write = True):
+                    head, _ = submit_queue._extent()
+                    task = None
+                    for position, entry in submit_queue._scan(
+                        head, constants.WORKER_CLAIM_SCAN_SIZE
+                    ):
+                        if entry._status != 'submitted':
+                            submit_queue._remove(position)
+                            continue
+                        asyncable = entry.asyncable
+                        threaded = asyncable.executor == 'thread'
+                        if threaded and \
+                        len(running.get(asyncable.uuid, ())) >= asyncable.max_threads:
+                            continue
+                        submit_queue._remove(position)
+                        task = entry
+                        break
+                    if task is None:
+                        break
+                    task._status = 'running'
+                    task._pid = os.getpid()
+                    task._node_uid = node_uid
+                    task._executor = asyncable.executor
+                    task._start_timestamp = time.time_ns()
+                claim_duration = time.perf_counter_ns() - timestamp
+                claimed += 1
+                last_active = time.time()
+                if threaded:
+                    if asyncable.uuid not in pools:
+                        default_site = get_default_site()
+                        assert default_site is not None
+                        pools[asyncable.uuid] = concurrent.futures.ThreadPoolExecutor(
+                            max_workers = asyncable.max_threads,
+                            initializer = set_default_site,
+                            initargs = (default_site[0],)
+                        )
+                        running[asyncable.uuid] = set()
+                    running[asyncable.uuid].add(
+                        pools[asyncable.uuid].submit(
+                            run_task, task, environment, True, claim_duration, task_metrics
+                        )
                     )
-                    with transaction_context(environment, write = True):
-                        task._result = result
-                        task._error = error
-                        task._status = \
-                        ('failed' if error is not None else 'finished') \
-                        if task._status != 'cancelled' else 'cancelled'
-                        task._end_timestamp = time.time_ns()
+                else:
+                    run_task(task, environment, False, claim_duration, task_metrics)
+                    last_active = time.time()
 
     except (SystemExit, KeyboardInterrupt, GeneratorExit):
         pass
@@ -24,7 +24,8 @@ class Directory(Namespace):
         /, *,
         include_hidden: Optional[bool] = None
     ) -> Iterator[Object]:
-        return cast(Iterator[Object], self.entities(include_hidden = include_hidden))
+        for entity in self.entities(include_hidden = include_hidden):
+            yield cast(Object, entity.bind())
 
 def directories(
     path: Optional[str] = None,
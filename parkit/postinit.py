@@ -3,6 +3,7 @@ import logging
 import parkit.constants as constants
 
 from parkit.storage.site import set_default_site
+from parkit.system.heartbeat import heartbeat
 from parkit.system.pidtable import pidtable
 from parkit.utility import (
     envexists,
@@ -18,3 +19,5 @@ if envexists(constants.DEFAULT_SITE_PATH_ENVNAME):
     )
 
 pidtable.set_pid_entry()
+
+heartbeat.start()
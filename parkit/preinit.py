@@ -53,6 +53,15 @@ if not envexists(constants.CLUSTER_CONCURRENCY_ENVNAME):
 if not envexists(constants.MAX_SYSLOG_ENTRIES_ENVNAME):
     setenv(constants.MAX_SYSLOG_ENTRIES_ENVNAME, str(constants.DEFAULT_MAX_SYSLOG_ENTRIES))
 
+if not envexists(constants.SYSLOG_BUFFER_SIZE_ENVNAME):
+    setenv(constants.SYSLOG_BUFFER_SIZE_ENVNAME, str(constants.DEFAULT_SYSLOG_BUFFER_SIZE))
+
+if not envexists(constants.SYSLOG_FLUSH_INTERVAL_ENVNAME):
+    setenv(constants.SYSLOG_FLUSH_INTERVAL_ENVNAME, str(constants.DEFAULT_SYSLOG_FLUSH_INTERVAL))
+
+if not envexists(constants.SYSLOG_OVERFLOW_POLICY_ENVNAME):
+    setenv(constants.SYSLOG_OVERFLOW_POLICY_ENVNAME, constants.DEFAULT_SYSLOG_OVERFLOW_POLICY)
+
 if not envexists(constants.PROCESS_TERMINATION_TIMEOUT_ENVNAME):
     setenv(
         constants.PROCESS_TERMINATION_TIMEOUT_ENVNAME,
@@ -71,12 +80,36 @@ if not envexists(constants.SCHEDULER_HEARTBEAT_INTERVAL_ENVNAME):
         str(constants.DEFAULT_SCHEDULER_HEARTBEAT_INTERVAL)
     )
 
+if not envexists(constants.NODE_HEARTBEAT_INTERVAL_ENVNAME):
+    setenv(
+        constants.NODE_HEARTBEAT_INTERVAL_ENVNAME,
+        str(constants.DEFAULT_NODE_HEARTBEAT_INTERVAL)
+    )
+
+if not envexists(constants.NODE_HEARTBEAT_TIMEOUT_ENVNAME):
+    setenv(
+        constants.NODE_HEARTBEAT_TIMEOUT_ENVNAME,
+        str(constants.DEFAULT_NODE_HEARTBEAT_TIMEOUT)
+    )
+
 if not envexists(constants.WORKER_POLLING_INTERVAL_ENVNAME):
     setenv(
         constants.WORKER_POLLING_INTERVAL_ENVNAME,
         str(constants.DEFAULT_WORKER_POLLING_INTERVAL)
     )
 
+if not envexists(constants.WORKER_MAX_TASKS_ENVNAME):
+    setenv(constants.WORKER_MAX_TASKS_ENVNAME, str(constants.DEFAULT_WORKER_MAX_TASKS))
+
+if not envexists(constants.WORKER_MAX_RSS_BYTES_ENVNAME):
+    setenv(constants.WORKER_MAX_RSS_BYTES_ENVNAME, str(constants.DEFAULT_WORKER_MAX_RSS_BYTES))
+
+if not envexists(constants.WORKER_MAX_IDLE_SECONDS_ENVNAME):
+    setenv(
+        constants.WORKER_MAX_IDLE_SECONDS_ENVNAME,
+        str(constants.DEFAULT_WORKER_MAX_IDLE_SECONDS)
+    )
+
 if not envexists(constants.ADAPTER_POLLING_INTERVAL_ENVNAME):
     setenv(
         constants.ADAPTER_POLLING_INTERVAL_ENVNAME,
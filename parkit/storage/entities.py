@@ -5,55 +5,170 @@
 import codecs
 import logging
 
+import uuid as uuid_module
+
 from typing import (
-    Any, Iterator, Optional, Tuple
+    Any, Dict, Iterator, Optional, Tuple
 )
 
 import orjson
 
-from parkit.storage.entity import Entity
+from parkit.exceptions import ObjectNotFoundError
+from parkit.storage.context import transaction_context
+from parkit.storage.entity import (
+    Entity,
+    split_name_value
+)
+from parkit.storage.environment import get_environment_threadsafe
+from parkit.storage.site import get_storage_path
 from parkit.storage.threadlocal import CursorDict
 from parkit.typeddicts import Descriptor
 from parkit.utility import create_class
 
 logger = logging.getLogger(__name__)
 
-def load_entity(
+#
+# A LazyEntity is a handle to an entity produced while iterating a
+# namespace. It carries the identity and descriptor read by the iterator,
+# so filtering on name, type or metadata never opens the entity. bind()
+# constructs the real entity, and peek() reads a persisted attribute
+# without binding.
+#
+
+class LazyEntity():
+
+    __slots__ = {
+        '_site_uuid', '_namespace', '_name', '_uuid_bytes',
+        '_descriptor', '_type', '_entity'
+    }
+
+    def __init__(
+        self,
+        site_uuid: str,
+        namespace: str,
+        name: str,
+        uuid_bytes: bytes,
+        descriptor: Descriptor
+    ):
+        self._site_uuid = site_uuid
+        self._namespace = namespace
+        self._name = name
+        self._uuid_bytes = uuid_bytes
+        self._descriptor = descriptor
+        self._type: Optional[type] = None
+        self._entity: Optional[Entity] = None
+
+    @property
+    def type(self) -> type:
+        if self._type is None:
+            try:
+                self._type = create_class(self._descriptor['type'])
+            except AttributeError:
+                self._type = Entity
+        return self._type
+
+    def bind(self) -> Entity:
+        if self._entity is None:
+            cls = self.type
+            if cls is Entity:
+                entity = Entity(
+                    self._namespace, self._name,
+                    site_uuid = self._site_uuid,
+                    create = False, bind = True
+                )
+            else:
+                entity = cls(
+                    '/'.join([self._namespace, self._name]),
+                    site_uuid = self._site_uuid,
+                    create = False, bind = True
+                )
+            if entity._uuid_bytes != self._uuid_bytes:
+                raise ObjectNotFoundError()
+            self._entity = entity
+        return self._entity
+
+    @property
+    def bound(self) -> bool:
+        return self._entity is not None
+
+    def peek(self, key: str) -> Any:
+        if self._entity is not None:
+            return getattr(self._entity, key)
+        cls = self.type
+        if not hasattr(cls, 'encode_attr_key'):
+            return getattr(self.bind(), key)
+        _, env, _, attrdb, _, _ = get_environment_threadsafe(
+            get_storage_path(self._site_uuid), self._namespace, create = False
+        )
+        with transaction_context(env, write = False) as (txn, _, _):
+            data = txn.get(
+                key = b''.join([self._uuid_bytes, cls.encode_attr_key(key)]),
+                db = attrdb
+            )
+            if data is None:
+                raise AttributeError()
+            return cls.decode_attr_value(data) if cls.decode_attr_value else bytes(data)
+
+    @property
+    def site_uuid(self) -> str:
+        return self._site_uuid
+
+    @property
+    def storage_path(self) -> str:
+        return get_storage_path(self._site_uuid)
+
+    @property
+    def namespace(self) -> str:
+        return self._namespace
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def path(self) -> str:
+        return '/'.join([self._namespace, self._name])
+
+    @property
+    def uuid(self) -> str:
+        return str(uuid_module.UUID(bytes = self._uuid_bytes))
+
+    @property
+    def descriptor(self) -> Dict[str, Any]:
+        return self._descriptor
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return self._descriptor['metadata']
+
+    def __hash__(self) -> int:
+        return int.from_bytes(self._uuid_bytes, 'little')
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (Entity, LazyEntity)):
+            return self._uuid_bytes == other._uuid_bytes
+        return False
+
+    def __ne__(self, other: Any) -> bool:
+        return not self.__eq__(other)
+
+def load_lazy_entity(
     name_db: Any,
     descriptor_db: Any,
     cursors: CursorDict,
     site_uuid: str,
     namespace: str,
-    /, *,
-    name: Optional[str] = None,
-    uuid: Optional[bytes] = None
-) -> Optional[Entity]:
-    if uuid is None:
-        if name is None:
-            raise ValueError()
-        cursor = cursors[name_db]
-        uuid = cursor.get(key = name.encode('utf-8'))
+    name: str
+) -> Optional[LazyEntity]:
+    uuid = cursors[name_db].get(key = name.encode('utf-8'))
     if uuid is not None:
-        cursor = cursors[descriptor_db]
-        data = cursor.get(key = uuid)
+        uuid = split_name_value(uuid)[0]
+        data = cursors[descriptor_db].get(key = uuid)
         if data is not None:
-            descriptor = orjson.loads(
-                bytes(data) if isinstance(data, memoryview) else data
+            return LazyEntity(
+                site_uuid, namespace, name, uuid,
+                orjson.loads(bytes(data) if isinstance(data, memoryview) else data)
             )
-            try:
-                assert name is not None
-                return create_class(descriptor['type'])(
-                    '/'.join([namespace, name]),
-                    site_uuid = site_uuid, create = False,
-                    bind = True
-                )
-            except AttributeError:
-                assert name is not None
-                return create_class('parkit.storage.entity.Entity')(
-                    namespace, name,
-                    site_uuid = site_uuid,
-                    create = False, bind = True
-                )
     return None
 
 def descriptor_iter(
@@ -71,7 +186,7 @@ def descriptor_iter(
             if include_hidden or not (name.startswith('__') and name.endswith('__')):
                 uuid = name_cursor.value()
                 assert uuid is not None
-                data = descriptor_cursor.get(uuid)
+                data = descriptor_cursor.get(split_name_value(uuid)[0])
                 assert data is not None
                 descriptor = orjson.loads(
                     bytes(data) if isinstance(data, memoryview) else data
@@ -103,17 +218,19 @@ def entity_iter(
     namespace: str,
     /, *,
     include_hidden: bool = False
-) -> Iterator[Entity]:
-    cursor = cursors[name_db]
-    if cursor.first():
+) -> Iterator[LazyEntity]:
+    name_cursor = cursors[name_db]
+    descriptor_cursor = cursors[descriptor_db]
+    if name_cursor.first():
         while True:
-            name = codecs.decode(cursor.key(), encoding = 'utf-8')
+            name = codecs.decode(name_cursor.key(), encoding = 'utf-8')
             if include_hidden or not (name.startswith('__') and name.endswith('__')):
-                entity = load_entity(
-                    name_db, descriptor_db, cursors, site_uuid, namespace,
-                    name = name, uuid = cursor.value()
-                )
-                if entity is not None:
-                    yield entity
-            if not cursor.next():
+                uuid = split_name_value(name_cursor.value())[0]
+                data = descriptor_cursor.get(uuid)
+                if data is not None:
+                    yield LazyEntity(
+                        site_uuid, namespace, name, uuid,
+                        orjson.loads(bytes(data) if isinstance(data, memoryview) else data)
+                    )
+            if not name_cursor.next():
                 break
@@ -3,17 +3,21 @@
 # reviewed: 6/16/21
 #
 import datetime
+import functools
 import logging
 import struct
 import uuid
 
 from typing import (
-    Any, Callable, Dict, List, Optional, Tuple
+    Any, Callable, Dict, FrozenSet, List, Optional, Tuple
 )
 
 import lmdb
 import orjson
 
+from cacheout.lru import LRUCache
+
+import parkit.constants as constants
 import parkit.storage.threadlocal as thread
 
 from parkit.exceptions import (
@@ -45,6 +49,48 @@ from parkit.utility import (
 
 logger = logging.getLogger(__name__)
 
+#
+# Process-wide bind cache. Maps (site uuid, namespace, encoded name) to the
+# object uuid, schema stamp, descriptor and user database handles resolved
+# the last time the object was bound. The database list in the descriptor
+# can change after creation (Dict indexes add and remove databases), so
+# every change to it must bump the schema stamp. The stamp is appended to
+# the object uuid in the name database, so the one read that finds the
+# object also validates the cache entry, and other processes see the
+# change on their next bind. LRUCache bounds the cache and locks it.
+#
+
+bind_cache: LRUCache = LRUCache(maxsize = constants.BIND_CACHE_MAXSIZE)
+
+def evict_bind_cache(site_uuid: str, namespace: str, encname: bytes):
+    bind_cache.delete((site_uuid, namespace, encname))
+
+def split_name_value(value: Any) -> Tuple[bytes, Optional[bytes]]:
+    value = bytes(value)
+    return (value[:16], value[16:] if len(value) > 16 else None)
+
+def get_schema_stamp(
+    txn: lmdb.Transaction,
+    name_db: Any,
+    encname: bytes
+) -> Optional[bytes]:
+    value = txn.get(key = encname, db = name_db)
+    return split_name_value(value)[1] if value is not None else None
+
+def bump_schema_stamp(
+    txn: lmdb.Transaction,
+    name_db: Any,
+    encname: bytes
+) -> bytes:
+    uuid_bytes, stamp = split_name_value(txn.get(key = encname, db = name_db))
+    stamp = struct.pack('>Q', struct.unpack('>Q', stamp)[0] + 1 if stamp else 1)
+    assert txn.put(key = encname, value = b''.join([uuid_bytes, stamp]), db = name_db)
+    return stamp
+
+@functools.lru_cache(None)
+def get_type_base_names(type_name: str) -> FrozenSet[str]:
+    return frozenset(get_qualified_base_names(create_class(type_name)))
+
 class Entity(metaclass = EntityMeta):
 
     __slots__ = {
@@ -129,7 +175,7 @@ class Entity(metaclass = EntityMeta):
         return not self.__eq__(other)
 
     def __eq__(self, other: Any) -> bool:
-        if isinstance(type(other), EntityMeta):
+        if isinstance(other, Entity):
             return self._uuid_bytes == other._uuid_bytes
         return False
 
@@ -153,18 +199,31 @@ class Entity(metaclass = EntityMeta):
         )
         self._userdb = []
         with transaction_context(self._env, write = False) as (txn, _, _):
-            self._uuid_bytes = txn.get(key = self._encname, db = self._namedb)
-            self._uuid_bytes = bytes(self._uuid_bytes) \
-            if isinstance(self._uuid_bytes, memoryview) else self._uuid_bytes
-            if self._uuid_bytes is None:
+            result = txn.get(key = self._encname, db = self._namedb)
+            if result is None:
                 raise ObjectNotFoundError()
-            result = txn.get(key = self._uuid_bytes, db = self._descdb)
-            result = bytes(result) if isinstance(result, memoryview) else result
-            descriptor = orjson.loads(result)
+            self._uuid_bytes, descriptor, userdb, stamp = \
+            self.__lookup_descriptor(txn, result)
             self._versioned = descriptor['versioned']
-        self.__bind_databases(descriptor = descriptor)
+        if userdb is not None:
+            self._userdb = userdb
+        else:
+            self.__bind_databases(descriptor = descriptor, stamp = stamp)
         self.__class__.__initialize_class__()
 
+    def __lookup_descriptor(
+        self,
+        txn: lmdb.Transaction,
+        name_value: Any
+    ) -> Tuple[bytes, Descriptor, Optional[List[Any]], Optional[bytes]]:
+        obj_uuid, stamp = split_name_value(name_value)
+        cached = bind_cache.get((self._site_uuid, self._namespace, self._encname))
+        if cached is not None and cached[0] == obj_uuid and cached[1] == stamp:
+            return (obj_uuid, cached[2], list(cached[3]), stamp)
+        result = txn.get(key = obj_uuid, db = self._descdb)
+        result = bytes(result) if isinstance(result, memoryview) else result
+        return (obj_uuid, orjson.loads(result), None, stamp)
+
     def __bind_or_create(
         self,
         *,
@@ -177,22 +236,23 @@ class Entity(metaclass = EntityMeta):
         with transaction_context(self._env, write = False) as (txn, _, _):
             result = txn.get(key = self._encname, db = self._namedb)
             if result:
-                obj_uuid = bytes(result) if isinstance(result, memoryview) else result
-                result = txn.get(key = obj_uuid, db = self._descdb)
-                result = bytes(result) if isinstance(result, memoryview) else result
-                descriptor = orjson.loads(result)
+                obj_uuid, descriptor, userdb, stamp = self.__lookup_descriptor(txn, result)
                 my_class_name = get_qualified_class_name(self)
                 if descriptor['type'] != my_class_name:
                     try:
-                        if my_class_name not in \
-                        get_qualified_base_names(create_class(descriptor['type'])):
+                        if my_class_name not in get_type_base_names(descriptor['type']):
                             raise TypeError()
                     except AttributeError as exc:
                         if my_class_name != 'parkit.storage.entity.Entity':
                             raise TypeError() from exc
                 self._uuid_bytes = obj_uuid
                 self._versioned = descriptor['versioned']
-                self.__bind_databases(descriptor = descriptor, on_init = on_init)
+                if userdb is not None:
+                    self._userdb = userdb
+                    if on_init:
+                        on_init(False)
+                else:
+                    self.__bind_databases(descriptor = descriptor, stamp = stamp, on_init = on_init)
                 return None
         if create:
             return self.__create_or_bind(
@@ -208,6 +268,7 @@ class Entity(metaclass = EntityMeta):
         self,
         *,
         descriptor: Descriptor,
+        stamp: Optional[bytes],
         on_init: Optional[Callable[[bool], None]] = None
     ):
         for dbuid, _ in descriptor['databases']:
@@ -224,6 +285,10 @@ class Entity(metaclass = EntityMeta):
         else:
             if on_init:
                 on_init(False)
+        bind_cache.set(
+            (self._site_uuid, self._namespace, self._encname),
+            (self._uuid_bytes, stamp, descriptor, list(self._userdb))
+        )
 
     def __create_or_bind(
         self,
@@ -273,18 +338,26 @@ class Entity(metaclass = EntityMeta):
                 )
             self._uuid_bytes = obj_uuid
             self._versioned = descriptor['versioned']
+            bind_cache.set(
+                (self._site_uuid, self._namespace, self._encname),
+                (obj_uuid, None, descriptor, list(self._userdb))
+            )
             if on_init:
                 self._create = True
                 on_init(True)
                 self._create = False
             return None
 
-    def _increment_version(self, cursors: thread.CursorDict):
+    def _increment_version(
+        self,
+        cursors: thread.CursorDict,
+        count: int = 1
+    ):
         if not self._versioned or self._create:
             return
         cursor = cursors[self._versdb]
         if cursor.set_key(self._uuid_bytes):
-            version = struct.pack('@N', struct.unpack('@N', cursor.value())[0] + 1)
+            version = struct.pack('@N', struct.unpack('@N', cursor.value())[0] + count)
             assert cursor.put(key = self._uuid_bytes, value = version)
         else:
             raise ObjectNotFoundError()
@@ -299,7 +372,7 @@ class Entity(metaclass = EntityMeta):
             try:
                 if isinstance(error, lmdb.Error):
                     obj_uuid = txn.get(key = self._encname, db = self._namedb)
-                    if obj_uuid != self._uuid_bytes:
+                    if obj_uuid is None or split_name_value(obj_uuid)[0] != self._uuid_bytes:
                         raise ObjectNotFoundError() from error
             finally:
                 if implicit:
@@ -408,7 +481,7 @@ class Entity(metaclass = EntityMeta):
             txn, _, _, implicit = \
             thread.local.context.get(self._env, write = False)
             obj_uuid = txn.get(key = self._encname, db = self._namedb)
-            result = obj_uuid == self._uuid_bytes
+            result = obj_uuid is not None and split_name_value(obj_uuid)[0] == self._uuid_bytes
             if implicit:
                 txn.commit()
         except BaseException as exc:
@@ -443,7 +516,8 @@ class Entity(metaclass = EntityMeta):
             thread.local.context.get(self._env, write = True, internal = True)
             cursor = cursors[self._attrdb]
             obj_uuid = txn.get(key = self._encname, db = self._namedb)
-            if obj_uuid == self._uuid_bytes:
+            if obj_uuid is not None and split_name_value(obj_uuid)[0] == self._uuid_bytes:
+                evict_bind_cache(self._site_uuid, self._namespace, self._encname)
                 for database in self._userdb:
                     txn.drop(database, delete = True)
                 assert txn.delete(key = self._encname, db = self._namedb)
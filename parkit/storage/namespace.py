@@ -16,7 +16,8 @@ from parkit.exceptions import (
 from parkit.storage.context import transaction_context
 from parkit.storage.entities import (
     descriptor_iter,
-    load_entity,
+    LazyEntity,
+    load_lazy_entity,
     name_iter,
     entity_iter
 )
@@ -97,17 +98,17 @@ class Namespace():
     def get(
         self,
         name: str
-    ):
+    ) -> Entity:
         _, env, name_db, _, _, descriptor_db = get_environment_threadsafe(
             self._storage_path, self._path, create = self._create
         )
         with transaction_context(env, write = False, iterator = True) as (_, cursors, _):
-            obj = load_entity(
+            obj = load_lazy_entity(
                 name_db, descriptor_db, cursors, self._site_uuid,
-                self._path, name = name
+                self._path, name
             )
             if obj is not None:
-                return obj
+                return obj.bind()
             raise ObjectNotFoundError()
 
     def metadata(
@@ -156,7 +157,7 @@ class Namespace():
         self,
         /, *,
         include_hidden: Optional[bool] = None
-    ) -> Iterator[Entity]:
+    ) -> Iterator[LazyEntity]:
         _, env, name_db, _, _, descriptor_db = get_environment_threadsafe(
             self._storage_path, self._path, create = self._create
         )
@@ -167,5 +168,5 @@ class Namespace():
                 if include_hidden is not None else self._include_hidden
             )
 
-    def __iter__(self) -> Iterator[Entity]:
+    def __iter__(self) -> Iterator[LazyEntity]:
         return self.entities()
@@ -148,4 +148,6 @@ class ThreadLocalVars(threading.local):
 
         self.default_site: Optional[Tuple[str, str]] = None
 
+        self.task: Optional[Any] = None
+
 local = ThreadLocalVars()
@@ -2,54 +2,38 @@
 import logging
 
 from typing import (
-    Any, Iterator
+    Any, Iterator, Union
 )
 
 from parkit.adapters.array import Array
+from parkit.adapters.vector import Vector
 from parkit.storage.context import transaction_context
 from parkit.storage.wait import wait
 
 logger = logging.getLogger(__name__)
 
 def stream(
-    source: Array,
+    source: Union[Array, Vector],
     /, *,
     batch: bool = False
 ) -> Iterator[Any]:
 
     with transaction_context(source._env, write = False):
         version = source.version
-        index = len(source)
+        _, position = source._extent()
 
     while True:
         wait(source, lambda: source.version > version)
         with transaction_context(source._env, write = False):
-            cache = []
-            n_new_entries = source.version - version
-            if source.maxsize is None:
-                for _ in range(n_new_entries):
-                    if batch:
-                        cache.append(source[index])
-                    else:
-                        yield source[index]
-                    index += 1
-                if batch and cache:
-                    yield cache
-            else:
-                while index < source.maxsize:
-                    if n_new_entries == 0:
-                        break
-                    if batch:
-                        cache.append(source[index])
-                    else:
-                        yield source[index]
-                    n_new_entries -= 1
-                    index += 1
-                for i in range(source.maxsize - n_new_entries, source.maxsize):
-                    if batch:
-                        cache.append(source[i])
-                    else:
-                        yield source[i]
-                if batch and cache:
-                    yield cache
             version = source.version
+            head, tail = source._extent()
+            if tail < position:
+                position = head
+            entries = source._scan(position, tail - position)
+            position = tail
+        if batch:
+            if entries:
+                yield [value for _, value in entries]
+        else:
+            for _, value in entries:
+                yield value
@@ -1,16 +1,21 @@
 # pylint: disable = unpacking-non-sequence, protected-access
 import logging
+import typing
 import uuid
 
 from typing import (
-    List, Optional
+    Any, List, Optional
 )
 
 import parkit.constants as constants
 import parkit.storage.threadlocal as thread
 
+from parkit.adapters.array import Array
 from parkit.adapters.dict import Dict
-from parkit.adapters.task import Task
+from parkit.adapters.task import (
+    get_task_status,
+    Task
+)
 from parkit.exceptions import SiteNotSpecifiedError
 from parkit.node import (
     launch_node,
@@ -51,6 +56,123 @@ def set_concurrency(
     )
     state['concurrency'] = value
 
+#
+# With autoscaling enabled the monitor keeps between min_workers and
+# max_workers workers running. It adds workers while the submit queue holds
+# more than queue_depth tasks per worker or the oldest task has waited longer
+# than wait_time seconds, unless cpu usage is at or above cpu_limit percent,
+# and removes one worker for every idle_time seconds the queue stays empty.
+#
+def get_autoscaling(*, site_uuid: Optional[str] = None) -> Optional[typing.Dict[str, Any]]:
+    state = Dict(
+        constants.CLUSTER_STATE_DICT_PATH, site_uuid = site_uuid,
+        create = True, bind = True
+    )
+    return state.get('autoscaling')
+
+def set_autoscaling(
+    *,
+    min_workers: int = 1,
+    max_workers: Optional[int] = None,
+    queue_depth: int = 1,
+    wait_time: float = 1.,
+    idle_time: float = 60.,
+    cpu_limit: float = 90.,
+    site_uuid: Optional[str] = None
+):
+    if max_workers is None:
+        max_workers = max(getenv(constants.CLUSTER_CONCURRENCY_ENVNAME, int), min_workers)
+    if min_workers < 1 or max_workers < min_workers or queue_depth < 1 or \
+    wait_time <= 0 or idle_time < 0 or not 0 < cpu_limit <= 100:
+        raise ValueError()
+    state = Dict(
+        constants.CLUSTER_STATE_DICT_PATH, site_uuid = site_uuid,
+        create = True, bind = True
+    )
+    state['autoscaling'] = dict(
+        min_workers = min_workers, max_workers = max_workers,
+        queue_depth = queue_depth, wait_time = wait_time,
+        idle_time = idle_time, cpu_limit = cpu_limit
+    )
+
+def disable_autoscaling(*, site_uuid: Optional[str] = None) -> bool:
+    state = Dict(
+        constants.CLUSTER_STATE_DICT_PATH, site_uuid = site_uuid,
+        create = True, bind = True
+    )
+    _, env, _, _, _, _ = get_environment_threadsafe(
+        state.storage_path, state.namespace, create = False
+    )
+    with transaction_context(env, write = True):
+        if 'autoscaling' in state:
+            del state['autoscaling']
+            if 'workers' in state:
+                del state['workers']
+            return True
+    return False
+
+def get_workers(*, site_uuid: Optional[str] = None) -> int:
+    state = Dict(
+        constants.CLUSTER_STATE_DICT_PATH, site_uuid = site_uuid,
+        create = True, bind = True
+    )
+    _, env, _, _, _, _ = get_environment_threadsafe(
+        state.storage_path, state.namespace, create = False
+    )
+    with transaction_context(env, write = False):
+        if 'autoscaling' in state:
+            return state.get('workers', state['autoscaling']['min_workers'])
+    return get_concurrency(site_uuid = site_uuid)
+
+def get_autoscaling_log(*, site_uuid: Optional[str] = None) -> Array:
+    return Array(
+        constants.AUTOSCALING_LOG_PATH, site_uuid = site_uuid,
+        maxsize = constants.MAX_AUTOSCALING_LOG_ENTRIES,
+        create = True, bind = True
+    )
+
+#
+# Workers are pinned either to the cpu sets in cpu_map, handed out in
+# turn, or to blocks of cpus_per_worker cpus cut from each NUMA node.
+# With blas_threads set, workers also get matching OMP and BLAS thread
+# count variables so pinned numerical code does not oversubscribe.
+#
+def get_placement(*, site_uuid: Optional[str] = None) -> Optional[typing.Dict[str, Any]]:
+    state = Dict(
+        constants.CLUSTER_STATE_DICT_PATH, site_uuid = site_uuid,
+        create = True, bind = True
+    )
+    return state.get('placement')
+
+def set_placement(
+    *,
+    cpu_map: Optional[List[List[int]]] = None,
+    cpus_per_worker: Optional[int] = None,
+    blas_threads: Optional[int] = None,
+    site_uuid: Optional[str] = None
+):
+    if cpu_map is not None and (not cpu_map or not all(cpu_map) or cpus_per_worker is not None):
+        raise ValueError()
+    if cpus_per_worker is not None and cpus_per_worker < 1 or \
+    blas_threads is not None and blas_threads < 1:
+        raise ValueError()
+    state = Dict(
+        constants.CLUSTER_STATE_DICT_PATH, site_uuid = site_uuid,
+        create = True, bind = True
+    )
+    state['placement'] = dict(
+        cpu_map = [sorted(cpus) for cpus in cpu_map] if cpu_map is not None else None,
+        cpus_per_worker = cpus_per_worker,
+        blas_threads = blas_threads
+    )
+
+def disable_placement(*, site_uuid: Optional[str] = None) -> bool:
+    state = Dict(
+        constants.CLUSTER_STATE_DICT_PATH, site_uuid = site_uuid,
+        create = True, bind = True
+    )
+    return state.pop('placement', None) is not None
+
 def enable_tasks(*, site_uuid: Optional[str] = None) -> bool:
     if site_uuid is None:
         if thread.local.default_site is not None:
@@ -118,6 +240,6 @@ def tasks(
         constants.TASK_NAMESPACE, site_uuid = site_uuid,
         create = True
     ):
-        if isinstance(obj, Task):
-            if status_filter is None or obj.status in status_filter:
-                yield obj
+        if issubclass(obj.type, Task):
+            if status_filter is None or get_task_status(obj) in status_filter:
+                yield obj.bind()
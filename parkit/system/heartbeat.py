@@ -0,0 +1,130 @@
+# pylint: disable = broad-except
+import atexit
+import logging
+import os
+import threading
+import time
+import typing
+
+from typing import (
+    Optional, Tuple
+)
+
+import psutil
+
+import parkit.constants as constants
+
+from parkit.adapters.dict import Dict
+from parkit.node import is_running
+from parkit.storage.context import transaction_context
+from parkit.storage.site import (
+    get_site_uuid,
+    import_site
+)
+from parkit.utility import (
+    envexists,
+    getenv
+)
+
+logger = logging.getLogger(__name__)
+
+import_site(getenv(constants.GLOBAL_SITE_STORAGE_PATH_ENVNAME, str), create = True)
+
+#
+# Every node writes (pid, timestamp ns, rss bytes) under its node uid at a
+# fixed interval. A node with a fresh heartbeat is taken to be alive; psutil is
+# only consulted when the heartbeat is missing or older than the timeout.
+#
+class HeartbeatTable(Dict):
+
+    _beat_thread: Optional[threading.Thread] = None
+
+    _beat_stopped: Optional[threading.Event] = None
+
+    def __init__(
+        self,
+        path: Optional[str] = constants.HEARTBEAT_DICT_PATH,
+        /, *,
+        site_uuid: Optional[str] = \
+        get_site_uuid(getenv(constants.GLOBAL_SITE_STORAGE_PATH_ENVNAME, str)),
+        create: bool = True,
+        bind: bool = True
+    ):
+        super().__init__(
+            path, site_uuid = site_uuid,
+            create = create, bind = bind
+        )
+
+    def beat(
+        self, *,
+        node_uid: str = getenv(constants.NODE_UID_ENVNAME, str) \
+        if envexists(constants.NODE_UID_ENVNAME) else '',
+        pid: int = os.getpid()
+    ):
+        if not node_uid:
+            raise ValueError()
+        try:
+            rss = psutil.Process(pid).memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            rss = None
+        self[node_uid] = (pid, time.time_ns(), rss)
+
+    def start(self):
+        if self._beat_thread is not None or not envexists(constants.NODE_UID_ENVNAME):
+            return
+
+        interval = getenv(constants.NODE_HEARTBEAT_INTERVAL_ENVNAME, float)
+        node_uid = getenv(constants.NODE_UID_ENVNAME, str)
+        stopped = threading.Event()
+
+        def run():
+            while True:
+                try:
+                    self.beat(node_uid = node_uid)
+                except Exception:
+                    logger.exception('heartbeat error on pid %i', os.getpid())
+                if stopped.wait(interval):
+                    return
+
+        self._beat_stopped = stopped
+        self._beat_thread = threading.Thread(target = run, daemon = True)
+        self._beat_thread.start()
+        #
+        # Registered after the environment module, so this runs before the
+        # environments are closed at exit.
+        #
+        atexit.register(self.stop)
+
+    def stop(self):
+        if self._beat_thread is not None and self._beat_stopped is not None:
+            self._beat_stopped.set()
+            self._beat_thread.join()
+
+    def is_alive(
+        self,
+        node_uid: str,
+        pid: Optional[int] = None
+    ) -> bool:
+        if not node_uid:
+            raise ValueError()
+        entry: Optional[Tuple[int, ...]] = self.get(node_uid)
+        if entry is not None and (pid is None or entry[0] == pid) and \
+        time.time_ns() - entry[1] <= \
+        getenv(constants.NODE_HEARTBEAT_TIMEOUT_ENVNAME, float) * 1e9:
+            return True
+        if is_running(node_uid, pid if pid is not None else entry[0] if entry else None):
+            return True
+        if entry is not None:
+            with transaction_context(self._env, write = True):
+                if self.get(node_uid) == entry:
+                    del self[node_uid]
+        return False
+
+    def get_rss(self, node_uid: str) -> Optional[int]:
+        entry = self.get(node_uid)
+        return entry[2] if entry is not None and len(entry) > 2 else None
+
+    def get_snapshot(self) -> typing.Dict[str, Tuple[int, ...]]:
+        return dict(self)
+
+heartbeat: HeartbeatTable = HeartbeatTable()
@@ -3,7 +3,7 @@ import os
 import typing
 
 from typing import (
-    Any, Optional, Union
+    Any, List, Optional, Union
 )
 
 import psutil
@@ -17,6 +17,7 @@ from parkit.storage.site import (
     get_site_uuid,
     import_site
 )
+from parkit.system.heartbeat import heartbeat
 from parkit.utility import (
     envexists,
     getenv
@@ -70,31 +71,31 @@ class PidTable(Dict):
         node_uid = getenv(constants.NODE_UID_ENVNAME, str) \
         if envexists(constants.NODE_UID_ENVNAME) else None,
         cluster_uid = getenv(constants.CLUSTER_UID_ENVNAME, str) \
-        if envexists(constants.CLUSTER_UID_ENVNAME) else None
+        if envexists(constants.CLUSTER_UID_ENVNAME) else None,
+        cpus: Optional[List[int]] = None
     ):
         self[pid] = dict(
             create_time = psutil.Process(pid).create_time(),
             process_uid = process_uid,
             node_uid = node_uid,
-            cluster_uid = cluster_uid
+            cluster_uid = cluster_uid,
+            cpus = cpus
         )
 
     def get_snapshot(self) -> \
-    typing.Dict[int, typing.Dict[str, Union[float, Optional[str]]]]:
+    typing.Dict[int, typing.Dict[str, Union[float, Optional[str], Optional[List[int]]]]]:
         with transaction_context(self._env, write = True):
-            active_pids = []
-            recorded_pids = list(self.keys())
-            for proc in psutil.process_iter(['create_time', 'pid']):
+            for pid, entry in list(self.items()):
+                if isinstance(entry['node_uid'], str) and \
+                heartbeat.is_alive(entry['node_uid'], pid):
+                    continue
                 try:
-                    pid = proc.info['pid']
-                    active_pids.append(pid)
-                    if pid in recorded_pids:
-                        create_time = self[pid]['create_time']
-                        if create_time < proc.info['create_time']:
-                            del self[pid]
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    if psutil.Process(pid).create_time() <= entry['create_time']:
+                        continue
+                except psutil.AccessDenied:
+                    continue
+                except psutil.NoSuchProcess:
                     pass
-            for pid in set(recorded_pids).difference(set(active_pids)):
                 del self[pid]
             return dict(self)
 
@@ -0,0 +1,93 @@
+import glob
+import logging
+import os
+import re
+
+from typing import (
+    Iterable, List, Optional
+)
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+blas_envnames = [
+    'OMP_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS',
+    'NUMEXPR_NUM_THREADS'
+]
+
+def parse_cpu_list(text: str) -> List[int]:
+    cpus: List[int] = []
+    for part in text.strip().split(','):
+        if not part:
+            continue
+        if '-' in part:
+            first, last = part.split('-', 1)
+            cpus.extend(range(int(first), int(last) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+def format_cpu_list(cpus: Iterable[int]) -> str:
+    return ','.join([str(cpu) for cpu in sorted(cpus)])
+
+def get_available_cpus() -> List[int]:
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    if hasattr(psutil.Process, 'cpu_affinity'):
+        return sorted(psutil.Process().cpu_affinity())
+    return list(range(psutil.cpu_count() or 1))
+
+def get_numa_nodes() -> List[List[int]]:
+    available = set(get_available_cpus())
+    nodes = []
+    for path in sorted(
+        glob.glob('/sys/devices/system/node/node[0-9]*/cpulist'),
+        key = lambda path: int(re.findall(r'node(\d+)', path)[-1])
+    ):
+        with open(path, 'r', encoding = 'ascii') as file:
+            cpus = [cpu for cpu in parse_cpu_list(file.read()) if cpu in available]
+        if cpus:
+            nodes.append(cpus)
+    return nodes if nodes else [sorted(available)]
+
+#
+# Each NUMA node is cut into blocks of cpus_per_worker cpus, so no block
+# crosses a socket, and the blocks are interleaved across nodes so
+# consecutive workers land on different sockets.
+#
+def get_cpu_sets(
+    workers: int,
+    /, *,
+    cpus_per_worker: Optional[int] = None
+) -> List[List[int]]:
+    if workers < 1 or cpus_per_worker is not None and cpus_per_worker < 1:
+        raise ValueError()
+    nodes = get_numa_nodes()
+    if cpus_per_worker is None:
+        cpus_per_worker = max(1, sum(len(node) for node in nodes) // workers)
+    blocks = [
+        [
+            node[start:start + cpus_per_worker]
+            for start in range(0, max(len(node) - cpus_per_worker, 0) + 1, cpus_per_worker)
+        ]
+        for node in nodes
+    ]
+    cpu_sets = []
+    for index in range(max(len(node_blocks) for node_blocks in blocks)):
+        for node_blocks in blocks:
+            if index < len(node_blocks):
+                cpu_sets.append(node_blocks[index])
+    return cpu_sets
+
+def set_affinity(cpus: Iterable[int]):
+    cpus = list(cpus)
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpus)
+    elif hasattr(psutil.Process, 'cpu_affinity'):
+        psutil.Process().cpu_affinity(cpus)
+    else:
+        raise NotImplementedError()
@@ -1,29 +1,392 @@
+# pylint: disable = broad-except
+import atexit
+import datetime
+import fnmatch
 import logging
+import os
+import queue
+import struct
+import sys
+import threading
+import traceback
 
-from typing import Any
+from typing import (
+    Any, Iterable, List, Optional, Set, Tuple, Union
+)
+
+import lmdb
 
 import parkit.constants as constants
 
 from parkit.adapters.array import Array
+from parkit.storage.context import transaction_context
 from parkit.storage.site import (
     get_site_uuid,
     import_site
 )
-from parkit.utility import getenv
+from parkit.utility import (
+    envexists,
+    getenv
+)
 
 import_site(getenv(constants.GLOBAL_SITE_STORAGE_PATH_ENVNAME, str), create = True)
 
-syslog: Array = Array(
-    constants.SYSLOG_PATH,
-    maxsize = getenv(constants.MAX_SYSLOG_ENTRIES_ENVNAME, int),
-    site_uuid = get_site_uuid(getenv(constants.GLOBAL_SITE_STORAGE_PATH_ENVNAME, str)),
-    create = True, bind = True
-)
+Record = Tuple[int, str, str, int, Optional[str], str]
+
+def format_record(record: Union[str, Record]) -> str:
+    if isinstance(record, str):
+        return record
+    timestamp, level, name, _, _, message = record
+    return '{0},{1:03d} {2}@{3} : {4}'.format(
+        datetime.datetime.fromtimestamp(timestamp // 10**9).strftime('%Y-%m-%d %H:%M:%S'),
+        timestamp // 10**6 % 1000, level, name, message
+    )
+
+#
+# Records are (timestamp ns, level, logger name, pid, node uid, message)
+# tuples. Besides the two Array databases there is a level index and a node
+# index (dupsort, key -> position) and a time index (timestamp + position).
+# Records about to rotate out of the ring are read before the write, and
+# their exact index entries deleted, so pruning does not depend on the order
+# of timestamps. Entries past the head are also ignored on read.
+#
+class SysLog(Array):
+
+    def __init__(
+        self,
+        path: Optional[str] = constants.SYSLOG_PATH,
+        /, *,
+        site_uuid: Optional[str] = \
+        get_site_uuid(getenv(constants.GLOBAL_SITE_STORAGE_PATH_ENVNAME, str)),
+        maxsize: int = getenv(constants.MAX_SYSLOG_ENTRIES_ENVNAME, int),
+        create: bool = True,
+        bind: bool = True
+    ):
+        super().__init__(
+            path, db_properties = [
+                {'integerkey': True}, {'integerkey': True},
+                {'dupsort': True}, {'dupsort': True}, {}
+            ],
+            site_uuid = site_uuid, maxsize = maxsize,
+            create = create, bind = bind
+        )
+
+    @property
+    def indexed(self) -> bool:
+        return len(self._userdb) == 5
+
+    def __prune(
+        self,
+        txn: lmdb.Transaction,
+        evicted: List[Tuple[int, Union[str, Record]]]
+    ):
+        for position, record in evicted:
+            if isinstance(record, str):
+                continue
+            timestamp, level, _, _, node_uid, _ = record
+            value = struct.pack('>Q', position)
+            txn.delete(key = level.encode('utf-8'), value = value, db = self._userdb[2])
+            if node_uid:
+                txn.delete(key = node_uid.encode('utf-8'), value = value, db = self._userdb[3])
+            txn.delete(
+                key = b''.join([struct.pack('>Q', timestamp), value]), db = self._userdb[4]
+            )
+
+    def extend(
+        self,
+        items: Iterable[Any],
+        /
+    ):
+        items = list(items)
+        if not self.indexed:
+            super().extend(items)
+            return
+        with transaction_context(self._env, write = True) as (txn, _, _):
+            head, tail = self._extent()
+            excess = tail - head + len(items) - self._maxsize_cached
+            evicted = self._scan(head, int(min(tail - head, excess))) if excess > 0 else []
+            super().extend(items)
+            head, tail = self._extent()
+            count = min(len(items), tail - head)
+            for position, record in zip(range(tail - count, tail), items[len(items) - count:]):
+                if isinstance(record, str):
+                    continue
+                timestamp, level, _, _, node_uid, _ = record
+                value = struct.pack('>Q', position)
+                assert txn.put(key = level.encode('utf-8'), value = value, db = self._userdb[2])
+                if node_uid:
+                    assert txn.put(
+                        key = node_uid.encode('utf-8'), value = value, db = self._userdb[3]
+                    )
+                assert txn.put(
+                    key = b''.join([struct.pack('>Q', timestamp), value]), value = b'',
+                    db = self._userdb[4]
+                )
+            self.__prune(txn, evicted)
+
+    def append(
+        self,
+        item: Any,
+        /
+    ):
+        self.extend([item])
+
+    def __positions(
+        self,
+        txn: lmdb.Transaction,
+        database: Any,
+        keys: Iterable[bytes],
+        start: int
+    ) -> Set[int]:
+        positions = set()
+        cursor = txn.cursor(db = database)
+        for key in keys:
+            if cursor.set_range_dup(key, struct.pack('>Q', start)):
+                while True:
+                    positions.add(struct.unpack('>Q', cursor.value())[0])
+                    if not cursor.next_dup():
+                        break
+        cursor.close()
+        return positions
+
+    def __node_keys(
+        self,
+        txn: lmdb.Transaction,
+        pattern: str
+    ) -> List[bytes]:
+        keys = []
+        cursor = txn.cursor(db = self._userdb[3])
+        if cursor.first():
+            while True:
+                key = bytes(cursor.key())
+                if fnmatch.fnmatchcase(key.decode('utf-8'), pattern):
+                    keys.append(key)
+                if not cursor.next_nodup():
+                    break
+        cursor.close()
+        return keys
+
+    @staticmethod
+    def __match(
+        record: Union[str, Record],
+        levels: Optional[List[str]],
+        since: Optional[int],
+        node: Optional[str]
+    ) -> bool:
+        if isinstance(record, str):
+            return since is None and node is None and (
+                levels is None or any(''.join([level, '@']) in record for level in levels)
+            )
+        return (levels is None or record[1] in levels) and \
+        (since is None or record[0] >= since) and \
+        (node is None or bool(record[4]) and fnmatch.fnmatchcase(record[4], node))
 
-class LogHandler(logging.StreamHandler):
+    def query(
+        self,
+        *,
+        levels: Optional[List[str]] = None,
+        since: Optional[int] = None,
+        node: Optional[str] = None,
+        start: int = 0
+    ) -> List[Tuple[int, Union[str, Record]]]:
+        with transaction_context(self._env, write = False) as (txn, _, _):
+            head, tail = self._extent()
+            start = max(start, head)
+            if not self.indexed:
+                return [
+                    (position, record) for position, record in self._scan(start, tail - start)
+                    if self.__match(record, levels, since, node)
+                ]
+            candidates: Optional[Set[int]] = None
+            if levels is not None:
+                candidates = self.__positions(
+                    txn, self._userdb[2], [level.encode('utf-8') for level in levels], start
+                )
+            if node is not None:
+                positions = self.__positions(
+                    txn, self._userdb[3], self.__node_keys(txn, node), start
+                )
+                candidates = positions if candidates is None else candidates & positions
+            if since is not None:
+                positions = set()
+                cursor = txn.cursor(db = self._userdb[4])
+                if cursor.set_range(struct.pack('>Q', since)):
+                    while True:
+                        position = struct.unpack('>Q', bytes(cursor.key())[8:])[0]
+                        if position >= start:
+                            positions.add(position)
+                        if not cursor.next():
+                            break
+                cursor.close()
+                candidates = positions if candidates is None else candidates & positions
+            if candidates is None:
+                return self._scan(start, tail - start)
+            results = []
+            for position in sorted(candidates):
+                if position < tail:
+                    entries = self._scan(position, 1)
+                    if entries and entries[0][0] == position:
+                        results.append(entries[0])
+            return results
+
+syslog: SysLog = SysLog()
+
+#
+# Records are built on the calling thread and queued. A flusher thread
+# writes whatever has accumulated with a single extend, so a burst of log
+# calls costs one write transaction. When the queue is full, records are
+# either dropped and counted or the caller blocks until there is room.
+# Records logged by the flusher itself are never blocked on, since only
+# the flusher can make room. The first batch that fails to write is
+# reported on stderr, and the number lost once writes succeed again.
+#
+class LogHandler(logging.Handler):
+
+    def __init__(
+        self,
+        *,
+        buffer_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        policy: Optional[str] = None
+    ):
+        super().__init__()
+        self._policy = policy if policy else \
+        getenv(constants.SYSLOG_OVERFLOW_POLICY_ENVNAME, str)
+        if self._policy not in ('drop', 'block'):
+            raise ValueError()
+        self._flush_interval = flush_interval if flush_interval is not None else \
+        getenv(constants.SYSLOG_FLUSH_INTERVAL_ENVNAME, float)
+        self._queue: queue.Queue = queue.Queue(
+            maxsize = buffer_size if buffer_size is not None else \
+            getenv(constants.SYSLOG_BUFFER_SIZE_ENVNAME, int)
+        )
+        self._dropped = 0
+        self._lost = 0
+        self._write_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        atexit.register(self.close)
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    def __start(self):
+        if self._pid != os.getpid():
+            with self.lock:
+                if self._pid != os.getpid():
+                    self._pid = os.getpid()
+                    self._flusher = threading.Thread(target = self.__run, daemon = True)
+                    self._flusher.start()
+
+    def __drain(self) -> List[Record]:
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    @staticmethod
+    def __record(
+        timestamp: int,
+        level: str,
+        name: str,
+        message: str
+    ) -> Record:
+        return (
+            timestamp, level, name, os.getpid(),
+            getenv(constants.NODE_UID_ENVNAME, str) \
+            if envexists(constants.NODE_UID_ENVNAME) else None,
+            message
+        )
+
+    def __write(self, batch: List[Record]):
+        with self._write_lock:
+            if self._dropped:
+                dropped, self._dropped = self._dropped, 0
+                batch.append(self.__record(
+                    int(datetime.datetime.now().timestamp() * 1e9), 'WARNING', __name__,
+                    'syslog dropped {0} records'.format(dropped)
+                ))
+            if batch:
+                syslog.extend(batch)
+
+    def __report(self, lost: int):
+        self._lost += lost
+        if self._lost == lost and logging.raiseExceptions and sys.stderr:
+            sys.stderr.write('syslog failed to write {0} records\n'.format(lost))
+            traceback.print_exc(file = sys.stderr)
+
+    def __recover(self):
+        if self._lost:
+            lost, self._lost = self._lost, 0
+            if logging.raiseExceptions and sys.stderr:
+                sys.stderr.write('syslog recovered, {0} records lost\n'.format(lost))
+
+    def __run(self):
+        while not self._stopped.is_set():
+            try:
+                batch = [self._queue.get(timeout = self._flush_interval)]
+            except queue.Empty:
+                batch = []
+            batch.extend(self.__drain())
+            try:
+                self.__write(batch)
+                self.__recover()
+            except Exception:
+                self.__report(len(batch))
+
+    #
+    # emit is thread-safe, and a blocking put must not hold the handler lock
+    # the flusher needs to log.
+    #
+    def handle(self, record: Any) -> bool:
+        allowed = bool(self.filter(record))
+        if allowed:
+            self.emit(record)
+        return allowed
 
     def emit(self, record: Any):
-        syslog.append(self.format(record))
+        try:
+            message = record.getMessage()
+            if record.exc_info:
+                message = '\n'.join([
+                    message, logging.Formatter().formatException(record.exc_info)
+                ])
+            entry = self.__record(
+                int(record.created * 1e9), record.levelname, record.name, message
+            )
+        except Exception:
+            self.handleError(record)
+            return
+        if self._stopped.is_set():
+            self.__write([entry])
+            return
+        self.__start()
+        if self._policy == 'block' and threading.current_thread() is not self._flusher:
+            self._queue.put(entry)
+        else:
+            try:
+                self._queue.put_nowait(entry)
+            except queue.Full:
+                self._dropped += 1
+
+    def flush(self):
+        batch = self.__drain()
+        try:
+            self.__write(batch)
+            self.__recover()
+        except Exception:
+            self.__report(len(batch))
+
+    def close(self):
+        self._stopped.set()
+        if self._flusher is not None and self._pid == os.getpid():
+            self._flusher.join()
+        self.flush()
+        super().close()
 
 logging.basicConfig(
     format = '%(asctime)s %(levelname)s@%(name)s : %(message)s',
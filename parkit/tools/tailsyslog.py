@@ -1,10 +1,18 @@
+# pylint: disable = protected-access
 import argparse
+import re
+import time
+
+import dateparser
 
 import parkit.constants as constants
 
 from parkit.storage.transaction import snapshot
 from parkit.storage.wait import wait
-from parkit.system.syslog import syslog
+from parkit.system.syslog import (
+    format_record,
+    syslog
+)
 from parkit.utility import getenv
 
 if __name__ == '__main__':
@@ -13,16 +21,30 @@ if __name__ == '__main__':
 
     parser.add_argument('--level')
 
+    parser.add_argument('--since')
+
+    parser.add_argument('--node')
+
     args = parser.parse_args()
 
     levels = ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']
 
     if args.level is not None:
-        levels = levels[levels.index(args.level):]
+        levels = levels[levels.index(args.level.upper()):]
+
+    since = None
+    if args.since is not None:
+        match = re.fullmatch(r'(\d+(?:\.\d+)?)([smhd])', args.since)
+        if match:
+            since = time.time_ns() - int(
+                float(match.group(1)) * dict(s = 1, m = 60, h = 3600, d = 86400)[match.group(2)] * 1e9
+            )
+        else:
+            since = int(dateparser.parse(args.since).timestamp() * 1e9)
 
     with snapshot(syslog):
         version = syslog.version
-        index = len(syslog)
+        head, position = syslog._extent()
 
     print('welcome to syslog')
     print('installation path:', getenv(constants.GLOBAL_SITE_STORAGE_PATH_ENVNAME, str))
@@ -30,27 +52,16 @@ if __name__ == '__main__':
         print('syslog length is unbounded')
     else:
         print('syslog holds a maximum of', syslog.maxsize, 'entries')
+    if since is not None:
+        position = head
     while True:
-        wait(syslog, lambda: syslog.version > version)
         with snapshot(syslog):
-            n_new_entries = syslog.version - version
-            if syslog.maxsize is None:
-                for _ in range(n_new_entries):
-                    record = syslog[index]
-                    index += 1
-                    if any(''.join([level, '@']) in record for level in levels):
-                        print(record)
-            else:
-                while index < syslog.maxsize:
-                    if n_new_entries == 0:
-                        break
-                    record = syslog[index]
-                    n_new_entries -= 1
-                    index += 1
-                    if any(''.join([level, '@']) in record for level in levels):
-                        print(record)
-                for i in range(syslog.maxsize - n_new_entries, syslog.maxsize):
-                    record = syslog[i]
-                    if any(''.join([level, '@']) in record for level in levels):
-                        print(record)
             version = syslog.version
+            records = syslog.query(
+                levels = levels if args.level is not None else None,
+                since = since, node = args.node, start = position
+            )
+            _, position = syslog._extent()
+        for _, record in records:
+            print(format_record(record))
+        wait(syslog, lambda: syslog.version > version)
@@ -0,0 +1,21 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+import pytest
+
+os.environ.setdefault(
+    'PARKIT_GLOBAL_SITE_STORAGE_PATH',
+    tempfile.mkdtemp(prefix = 'parkit-global-')
+)
+atexit.register(
+    shutil.rmtree, os.environ['PARKIT_GLOBAL_SITE_STORAGE_PATH'], ignore_errors = True
+)
+
+import parkit as p # pylint: disable = wrong-import-position
+
+@pytest.fixture
+def site(tmp_path):
+    p.set_default_site(str(tmp_path), create = True)
+    return tmp_path
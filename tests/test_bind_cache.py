@@ -0,0 +1,45 @@
+import parkit as p
+import parkit.constants as constants
+
+from parkit.storage.context import transaction_context
+from parkit.storage.entity import (
+    bind_cache,
+    get_schema_stamp,
+    split_name_value
+)
+
+def test_bind_cache_is_bounded():
+    assert bind_cache.maxsize == constants.BIND_CACHE_MAXSIZE
+
+def test_stamp_is_kept_in_name_value(site):
+    d = p.Dict('cache/d', create = True)
+    with transaction_context(d._env, write = False) as (txn, _, _):
+        value = txn.get(key = d._encname, db = d._namedb)
+        assert split_name_value(value) == (d._uuid_bytes, None)
+    d.create_index('upper', lambda value: value.upper())
+    with transaction_context(d._env, write = False) as (txn, _, _):
+        value = txn.get(key = d._encname, db = d._namedb)
+        uuid_bytes, stamp = split_name_value(value)
+        assert uuid_bytes == d._uuid_bytes
+        assert stamp is not None
+        assert get_schema_stamp(txn, d._namedb, d._encname) == stamp
+
+def test_rebind_sees_schema_change_from_other_handle(site):
+    first = p.Dict('cache/d', create = True)
+    first['a'] = 'x'
+    base = len(p.Dict('cache/d')._userdb)
+    first.create_index('upper', lambda value: value.upper())
+    second = p.Dict('cache/d')
+    assert len(second._userdb) == base + 1
+    assert second.indexes == ['upper']
+    first.drop_index('upper')
+    assert len(p.Dict('cache/d')._userdb) == base
+
+def test_rebind_hits_cache(site):
+    d = p.Dict('cache/d', create = True)
+    key = (d._site_uuid, d._namespace, d._encname)
+    cached = bind_cache.get(key)
+    assert cached is not None and cached[0] == d._uuid_bytes
+    assert p.Dict('cache/d')._uuid_bytes == d._uuid_bytes
+    d.drop()
+    assert bind_cache.get(key) is None
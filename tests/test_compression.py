@@ -0,0 +1,41 @@
+import pytest
+
+import parkit as p
+
+from parkit.compression import Codec
+
+pytest.importorskip('zstandard')
+pytest.importorskip('lz4')
+
+payload = b'the quick brown fox jumps over the lazy dog ' * 64
+
+@pytest.mark.parametrize('codec', ['zstd', 'lz4'])
+def test_round_trip(codec):
+    instance = Codec(codec)
+    compressed = instance.compress(payload)
+    assert len(compressed) < len(payload)
+    assert instance.decompress(compressed) == payload
+
+def test_small_values_stored_raw():
+    instance = Codec('zstd', threshold = 64)
+    assert instance.compress(b'short') == b'\x00short'
+    assert instance.decompress(b'\x00short') == b'short'
+
+def test_decodes_across_codec_change():
+    compressed = Codec('lz4').compress(payload)
+    assert Codec('zstd').decompress(compressed) == payload
+
+def test_dictionary_round_trip():
+    samples = [('record %i: ' % i).encode() + payload[:i % 200] for i in range(500)]
+    dictionary = p.compression.train_dictionary(samples, size = 1024)
+    instance = Codec('zstd', dictionary = dictionary, threshold = 0)
+    compressed = instance.compress(samples[42])
+    assert instance.decompress(compressed) == samples[42]
+    with pytest.raises(ValueError):
+        Codec('zstd').decompress(compressed)
+
+def test_compressed_dict(site):
+    d = p.Dict('compressed/zstd', create = True, compression = 'zstd')
+    d['key'] = payload
+    assert d['key'] == payload
+    assert p.Dict('compressed/zstd')['key'] == payload
@@ -0,0 +1,54 @@
+import time
+
+import parkit as p
+
+def test_commit_advances_offset(site):
+    array = p.Array('streams/commit', create = True)
+    array.extend(range(10))
+    consumer = array.consumer('group', 'one', auto_commit = False, batch_size = 4)
+    assert consumer.poll() == [0, 1, 2, 3]
+    assert consumer.offset == 0
+    consumer.commit()
+    assert consumer.offset == 4
+    assert consumer.lag == 6
+
+def test_uncommitted_batch_is_replayed(site):
+    array = p.Array('streams/replay', create = True)
+    array.extend(range(6))
+    consumer = array.consumer('group', 'one', auto_commit = False, batch_size = 3)
+    assert consumer.poll() == [0, 1, 2]
+    restarted = array.consumer('group', 'one', auto_commit = False, batch_size = 3)
+    assert restarted.poll() == [0, 1, 2]
+    restarted.commit()
+    assert restarted.poll() == [3, 4, 5]
+
+def test_expired_lease_moves_to_other_member(site):
+    array = p.Array('streams/lease', create = True)
+    array.extend(range(4))
+    first = array.consumer('group', 'first', auto_commit = False, batch_size = 2, lease = 0.01)
+    second = array.consumer('group', 'second', auto_commit = False, batch_size = 2)
+    assert first.poll() == [0, 1]
+    time.sleep(0.05)
+    assert second.poll() == [0, 1]
+
+def test_groups_are_independent_and_seek(site):
+    array = p.Array('streams/groups', create = True)
+    array.extend(range(3))
+    a = array.consumer('a', 'one', batch_size = 10)
+    b = array.consumer('b', 'one', batch_size = 10)
+    assert a.poll() == [0, 1, 2]
+    assert b.poll() == [0, 1, 2]
+    a.commit()
+    assert a.poll() == []
+    a.seek(1)
+    assert a.poll() == [1, 2]
+
+def test_state_resets_when_source_is_cleared(site):
+    array = p.Array('streams/reset', create = True)
+    array.extend(range(3))
+    consumer = array.consumer('group', 'one', batch_size = 10)
+    assert consumer.poll() == [0, 1, 2]
+    consumer.commit()
+    array.clear()
+    array.extend(['x'])
+    assert consumer.poll() == ['x']
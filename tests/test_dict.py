@@ -0,0 +1,136 @@
+import time
+
+import pytest
+
+import parkit as p
+
+from parkit.adapters.dict import pending_touches
+
+def test_index_maintained_across_handles(site):
+    first = p.Dict('records/people', create = True)
+    second = p.Dict('records/people')
+    first.create_index('city', lambda value: value['city'])
+    second['ann'] = dict(city = 'paris')
+    second['bob'] = dict(city = 'rome')
+    first['cat'] = dict(city = 'paris')
+    assert sorted(first.index('city').get('paris')) == ['ann', 'cat']
+    second['ann'] = dict(city = 'rome')
+    del first['bob']
+    assert second.index('city').get('paris') == ['cat']
+    assert second.index('city').get('rome') == ['ann']
+    assert 'city' in second.indexes
+    second.drop_index('city')
+    assert 'city' not in first.indexes
+
+def test_index_backfills_existing_entries(site):
+    d = p.Dict('records/backfill', create = True)
+    d['ann'] = dict(city = 'paris')
+    d['bob'] = dict(city = 'rome')
+    index = d.create_index('city', lambda value: value['city'])
+    assert index.get('rome') == ['bob']
+
+def test_ttl_expiry_and_sweep(site):
+    d = p.ExpiringDict('cache/ttl', create = True, ttl = 60)
+    d.set('short', 1, ttl = 0.05)
+    d['long'] = 2
+    assert d['short'] == 1
+    time.sleep(0.1)
+    assert 'short' not in d
+    assert d.get('short') is None
+    assert d['long'] == 2
+    assert d.sweep() == 1
+    assert len(d) == 1
+
+def test_len_sweeps_expired_entries(site):
+    d = p.ExpiringDict('cache/ttl_len', create = True)
+    d.set('a', 1, ttl = 0.05)
+    d.set('b', 2, ttl = 0.05)
+    d['c'] = 3
+    time.sleep(0.1)
+    assert len(d) == 1
+    assert d.sweep() == 0
+    assert list(d.keys()) == ['c']
+
+def test_lru_evicts_least_recently_used(site):
+    d = p.Dict('cache/lru', create = True, maxsize = 3, policy = 'lru')
+    d['a'] = 1
+    d['b'] = 2
+    d['c'] = 3
+    assert d['a'] == 1
+    d['d'] = 4
+    assert len(d) == 3
+    assert 'b' not in d
+    assert set(d.keys()) == {'a', 'c', 'd'}
+
+def test_lru_touch_inside_write_transaction(site):
+    d = p.Dict('cache/lru_txn', create = True, maxsize = 2, policy = 'lru')
+    d['a'] = 1
+    d['b'] = 2
+    with p.transaction(d):
+        assert d['a'] == 1
+        d['c'] = 3
+    assert set(d.keys()) == {'a', 'c'}
+
+def test_lru_touch_flushed_by_write_through_other_handle(site):
+    reader = p.Dict('cache/lru_shared', create = True, maxsize = 2, policy = 'lru')
+    writer = p.Dict('cache/lru_shared', maxsize = 2, policy = 'lru')
+    writer['a'] = 1
+    writer['b'] = 2
+    assert reader['a'] == 1
+    assert (reader._site_uuid, reader._uuid_bytes) in pending_touches
+    writer['c'] = 3
+    assert (reader._site_uuid, reader._uuid_bytes) not in pending_touches
+    assert set(reader.keys()) == {'a', 'c'}
+
+def test_fifo_ignores_reads(site):
+    d = p.Dict('cache/fifo', create = True, maxsize = 2, policy = 'fifo')
+    d['a'] = 1
+    d['b'] = 2
+    assert d['a'] == 1
+    d['c'] = 3
+    assert set(d.keys()) == {'b', 'c'}
+
+def test_bounds_mismatch_raises(site):
+    p.Dict('cache/bounds', create = True, maxsize = 2, policy = 'lru')
+    with pytest.raises(ValueError):
+        p.Dict('cache/bounds', create = True, maxsize = 5, policy = 'lru')
+
+def test_get_contains_delete_many(site):
+    d = p.Dict('batch/d', create = True)
+    d.update({'a': 1, 'b': 2, 'c': 3})
+    assert d.get_many(['c', 'x', 'a']) == [3, None, 1]
+    assert d.get_many(['x'], default = 0) == [0]
+    assert d.contains_many(['b', 'x', 'c']) == [True, False, True]
+    assert d.delete_many(['a', 'x', 'a', 'c']) == 2
+    assert list(d.keys()) == ['b']
+
+def test_many_hides_expired_keys(site):
+    d = p.ExpiringDict('batch/ttl', create = True)
+    d.set('short', 1, ttl = 0.05)
+    d['long'] = 2
+    time.sleep(0.1)
+    assert d.get_many(['short', 'long']) == [None, 2]
+    assert d.contains_many(['short', 'long']) == [False, True]
+
+def failing_items(count):
+    for position in range(count):
+        yield (position, position)
+    raise RuntimeError()
+
+def test_update_commits_chunks_as_it_goes(site):
+    d = p.Dict('batch/update', create = True)
+    with pytest.raises(RuntimeError):
+        d.update(failing_items(5), chunk_size = 2)
+    assert sorted(d.keys()) == [0, 1, 2, 3]
+
+def test_update_atomic_rolls_back(site):
+    d = p.Dict('batch/atomic', create = True)
+    with pytest.raises(RuntimeError):
+        d.update(failing_items(5), chunk_size = 2, atomic = True)
+    assert len(d) == 0
+    d.update(((key, key * 2) for key in range(5)), chunk_size = 2, atomic = True)
+    assert d.get_many(range(5)) == [0, 2, 4, 6, 8]
+
+def test_update_rejects_bad_chunk_size(site):
+    with pytest.raises(ValueError):
+        p.Dict('batch/chunk', create = True).update({}, chunk_size = 0)
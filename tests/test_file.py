@@ -0,0 +1,166 @@
+import struct
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import parkit as p
+
+from parkit.storage.context import transaction_context
+from parkit.storage.entity import Entity
+
+def write(f, mode, data):
+    f.mode = mode
+    with f:
+        f.write(data)
+
+def read(f):
+    f.mode = 'rb'
+    with f:
+        return bytes(f.read())
+
+def test_chunked_write_read_append(site):
+    f = p.FileIO('files/chunked', create = True, chunk_size = 8)
+    write(f, 'wb', b'0123456789abcdefghij')
+    assert f.size == 20
+    assert read(f) == b'0123456789abcdefghij'
+    write(f, 'ab', b'KLMNOP')
+    assert f.size == 26
+    assert read(f) == b'0123456789abcdefghijKLMNOP'
+    f.mode = 'rb'
+    with f:
+        f.seek(6)
+        assert bytes(f.read(5)) == b'6789a'
+    write(f, 'wb', b'xy')
+    assert read(f) == b'xy'
+
+def test_chunked_read_inside_transaction(site):
+    f = p.FileIO('files/chunked_txn', create = True, chunk_size = 8)
+    write(f, 'wb', b'0123456789abcdef')
+    with p.transaction(f):
+        f.mode = 'rb'
+        with f:
+            assert bytes(f.read()) == b'0123456789abcdef'
+
+def test_file_content_round_trip(site):
+    f = p.File('files/content', create = True, chunk_size = 4)
+    f.set_content(dict(a = 1))
+    assert f.get_content() == dict(a = 1)
+
+def test_mmap_readlines_bounded(site):
+    f = p.FileIO('files/lines', create = True, bufsize = 1 << 20)
+    write(f, 'wb', b'one\ntwo\nthree')
+    f.mode = 'rb'
+    with f:
+        assert [bytes(line) for line in f.readlines()] == [b'one\n', b'two\n', b'three']
+
+def test_records_delimited(site):
+    f = p.FileIO('files/records', create = True, chunk_size = 5)
+    write(f, 'wb', b'alpha|beta|gamma')
+    f.mode = 'rb'
+    with f:
+        assert [bytes(record) for record in f.records(b'|')] == [b'alpha', b'beta', b'gamma']
+
+def test_records_length_prefixed(site):
+    f = p.FileIO('files/prefixed', create = True, chunk_size = 3)
+    payloads = [b'a', b'', b'longer record']
+    write(f, 'wb', b''.join(struct.pack('>I', len(data)) + data for data in payloads))
+    f.mode = 'rb'
+    with f:
+        assert [bytes(record) for record in f.records(length_prefix = '>I')] == payloads
+
+def test_get_array_rows_and_columns(site):
+    f = p.File('files/array', create = True)
+    f.set_content(np.arange(20, dtype = 'int32').reshape(5, 4))
+    assert np.array_equal(f.get_array(1), np.arange(4, 8, dtype = 'int32'))
+    assert np.array_equal(f.get_array(slice(1, 4, 2)), np.arange(20).reshape(5, 4)[1:4:2])
+    assert np.array_equal(f.get_array((slice(None), 2)), np.arange(2, 20, 4))
+    with pytest.raises(IndexError):
+        f.get_array(5)
+
+def test_update_array_in_place(site):
+    f = p.File('files/array_update', create = True)
+    f.set_content(np.zeros((4, 3)))
+    f.update_array(slice(1, 3), np.ones((2, 3)))
+    f.update_array(-1, [7.0, 8.0, 9.0])
+    expected = np.zeros((4, 3))
+    expected[1:3] = 1.0
+    expected[3] = [7.0, 8.0, 9.0]
+    assert np.array_equal(f.get_content(), expected)
+
+def test_update_array_compressed_keeps_metadata(site):
+    f = p.File('files/array_compressed', create = True)
+    f.set_content(np.zeros((4, 2)), compression = 'zstd')
+    f.metadata = dict(owner = 'ann')
+    before = f.metadata
+    f.update_array(2, [5.0, 6.0])
+    after = f.metadata
+    assert after['owner'] == 'ann'
+    assert after['content-encoding'] == 'zstd'
+    assert after['content-properties'] == before['content-properties']
+    assert after['last-modified'] >= before['last-modified']
+    assert np.array_equal(f.get_array(2), np.array([5.0, 6.0]))
+
+def test_arrow_round_trip(site):
+    pa = pytest.importorskip('pyarrow')
+    table = pa.table(dict(a = [1, 2, 3], b = ['x', 'y', 'z']))
+    f = p.File('files/arrow', create = True)
+    f.set_content(table)
+    assert f.metadata['content-type'] == 'application/vnd.apache.arrow.file'
+    assert f.get_content().equals(table)
+    assert f.get_content(columns = ['b']).column_names == ['b']
+
+def test_parquet_round_trip_from_dataframe(site):
+    pytest.importorskip('pyarrow')
+    frame = pd.DataFrame(dict(a = [1, 2, 3], b = [0.5, 1.5, 2.5]))
+    f = p.File('files/parquet', create = True)
+    f.set_content(frame, content_type = 'application/vnd.apache.parquet', compression = 'lz4')
+    assert f.metadata['content-properties']['nrows'] == 3
+    assert f.get_content().to_pandas().equals(frame)
+    assert f.get_content(columns = ['a'], row_groups = [0]).column_names == ['a']
+
+def test_unknown_content_type_rejected(site):
+    with pytest.raises(ValueError):
+        p.File('files/unknown', create = True).set_content(
+            pd.DataFrame(), content_type = 'text/csv'
+        )
+
+def test_chunked_deduplicate(site):
+    f = p.FileIO('files/dedup', create = True, chunk_size = 4, deduplicate = True)
+    write(f, 'wb', b'abcdabcdabcd')
+    assert read(f) == b'abcdabcdabcd'
+
+def blob_keys(f):
+    with transaction_context(f._env, write = False) as (txn, _, _):
+        cursor = txn.cursor(db = f._blobdb)
+        keys = [bytes(key) for key in cursor.iternext(keys = True, values = False)]
+        cursor.close()
+    return keys
+
+def test_deduplicated_chunks_are_shared_and_released(site):
+    first = p.FileIO('files/shared1', create = True, chunk_size = 4, deduplicate = True)
+    second = p.FileIO('files/shared2', create = True, chunk_size = 4, deduplicate = True)
+    write(first, 'wb', b'abcdefgh')
+    write(second, 'wb', b'efghabcd')
+    keys = blob_keys(first)
+    assert len(keys) == 4
+    assert all(len(key) == 33 for key in keys)
+    first.drop()
+    assert read(second) == b'efghabcd'
+    assert len(blob_keys(second)) == 4
+    second.drop()
+    assert blob_keys(second) == []
+
+def test_compactify_sweeps_orphaned_blobs(site):
+    kept = p.FileIO('files/kept', create = True, chunk_size = 4, deduplicate = True)
+    orphan = p.FileIO('files/orphan', create = True, chunk_size = 4, deduplicate = True)
+    write(kept, 'wb', b'abcd')
+    write(orphan, 'wb', b'abcdwxyz')
+    Entity.drop(orphan)
+    assert len(blob_keys(kept)) == 4
+    p.compactify()
+    assert len(blob_keys(kept)) == 2
+    assert read(kept) == b'abcd'
+    kept.drop()
+    p.compactify()
+    assert blob_keys(kept) == []
@@ -0,0 +1,40 @@
+import os
+import time
+
+import parkit as p
+import parkit.constants as constants
+
+from parkit.system.heartbeat import HeartbeatTable
+
+def make_table():
+    return HeartbeatTable(
+        'nodes/heartbeat', site_uuid = p.get_default_site()[1], create = True
+    )
+
+def test_fresh_beat_is_alive(site):
+    table = make_table()
+    table.beat(node_uid = 'node-a', pid = os.getpid())
+    assert table.is_alive('node-a')
+    assert table.is_alive('node-a', os.getpid())
+    assert table.get_rss('node-a') > 0
+    assert set(table.get_snapshot()) == {'node-a'}
+
+def test_stale_beat_is_removed(site):
+    table = make_table()
+    table['node-gone'] = (os.getpid(), time.time_ns() - 3600 * 10**9, None)
+    assert not table.is_alive('node-gone')
+    assert 'node-gone' not in table
+
+def test_start_beats_until_stopped(site, monkeypatch):
+    monkeypatch.setenv(constants.NODE_UID_ENVNAME, 'node-thread')
+    monkeypatch.setenv(constants.NODE_HEARTBEAT_INTERVAL_ENVNAME, '0.01')
+    table = make_table()
+    table.start()
+    try:
+        time.sleep(0.05)
+        first = table['node-thread'][1]
+        time.sleep(0.05)
+        assert table['node-thread'][1] > first
+    finally:
+        table.stop()
+    assert not table._beat_thread.is_alive()
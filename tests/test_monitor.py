@@ -0,0 +1,42 @@
+import pytest
+
+import parkit as p
+
+from parkit.daemons.monitor import autoscale
+from parkit.system.cluster import (
+    disable_autoscaling,
+    get_autoscaling,
+    get_workers,
+    set_autoscaling
+)
+
+config = dict(
+    min_workers = 1, max_workers = 4, queue_depth = 2,
+    wait_time = 5., idle_time = 60., cpu_limit = 90.
+)
+
+@pytest.mark.parametrize('workers, depth, waited, cpu, idle, expected', [
+    (0, 0, 0., 0., 0., (1, 'up', 'minimum')),
+    (6, 0, 0., 0., 0., (4, 'down', 'maximum')),
+    (1, 5, 0., 10., 0., (3, 'up', 'queue depth')),
+    (2, 9, 0., 10., 0., (4, 'up', 'queue depth')),
+    (2, 1, 6., 10., 0., (3, 'up', 'wait time')),
+    (4, 20, 0., 10., 0., (4, 'hold', 'maximum')),
+    (2, 9, 0., 95., 0., (2, 'hold', 'cpu limit')),
+    (3, 0, 0., 10., 61., (2, 'down', 'idle')),
+    (1, 0, 0., 10., 61., (1, None, '')),
+    (2, 2, 1., 10., 0., (2, None, ''))
+])
+def test_autoscale_decisions(workers, depth, waited, cpu, idle, expected):
+    assert autoscale(config, workers, depth, waited, cpu, idle) == expected
+
+def test_autoscaling_settings(site):
+    assert get_autoscaling() is None
+    set_autoscaling(min_workers = 2, max_workers = 3)
+    assert get_autoscaling()['max_workers'] == 3
+    assert get_workers() == 2
+    assert disable_autoscaling()
+    assert not disable_autoscaling()
+    assert get_workers() == p.get_concurrency()
+    with pytest.raises(ValueError):
+        set_autoscaling(min_workers = 3, max_workers = 2)
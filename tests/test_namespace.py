@@ -0,0 +1,44 @@
+import parkit as p
+
+from parkit.storage.entities import LazyEntity
+from parkit.storage.namespace import Namespace
+
+def test_iteration_yields_unbound_handles(site):
+    p.Dict('lazy/d', create = True)['key'] = 'value'
+    p.Queue('lazy/q', create = True)
+    handles = {handle.name: handle for handle in Namespace('lazy')}
+    assert set(handles) == {'d', 'q'}
+    assert all(isinstance(handle, LazyEntity) for handle in handles.values())
+    assert not any(handle.bound for handle in handles.values())
+    assert handles['d'].type is p.Dict
+    assert handles['q'].type is p.Queue
+    assert handles['d'].path == 'lazy/d'
+    assert not handles['d'].bound
+
+def test_bind_returns_real_entity(site):
+    d = p.Dict('lazy/d', create = True)
+    d['key'] = 'value'
+    handle = next(iter(Namespace('lazy')))
+    entity = handle.bind()
+    assert type(entity) is p.Dict
+    assert entity['key'] == 'value'
+    assert handle.bound and handle.bind() is entity
+    assert handle == d
+
+def test_peek_reads_attribute_without_binding(site):
+    p.Dict('lazy/bounded', create = True, maxsize = 7)
+    handle = next(iter(Namespace('lazy')))
+    assert handle.peek('_Dict__bounds') == (7, 'lru')
+    assert not handle.bound
+
+def test_get_returns_bound_entity(site):
+    p.Dict('lazy/d', create = True)['key'] = 'value'
+    namespace = Namespace('lazy')
+    assert type(namespace.get('d')) is p.Dict
+    assert type(namespace['d']) is p.Dict
+    assert namespace['d']['key'] == 'value'
+
+def test_directory_objects_are_bound(site):
+    p.Dict('lazy/d', create = True)
+    objects = list(p.Directory('lazy').objects())
+    assert [type(obj) for obj in objects] == [p.Dict]
@@ -0,0 +1,40 @@
+import pytest
+
+from parkit.system.placement import (
+    format_cpu_list,
+    get_available_cpus,
+    get_cpu_sets,
+    parse_cpu_list
+)
+
+@pytest.mark.parametrize('text, expected', [
+    ('0', [0]),
+    ('0-3', [0, 1, 2, 3]),
+    ('0-1,4,6-7\n', [0, 1, 4, 6, 7]),
+    ('2,,3', [2, 3]),
+    ('', [])
+])
+def test_parse_cpu_list(text, expected):
+    assert parse_cpu_list(text) == expected
+
+def test_format_round_trip():
+    assert format_cpu_list([3, 1, 2]) == '1,2,3'
+    assert parse_cpu_list(format_cpu_list([5, 0, 9])) == [0, 5, 9]
+
+def test_cpu_sets_partition_available_cpus():
+    available = get_available_cpus()
+    cpu_sets = get_cpu_sets(len(available), cpus_per_worker = 1)
+    assert sorted(cpu for cpu_set in cpu_sets for cpu in cpu_set) == available
+    assert all(len(cpu_set) == 1 for cpu_set in cpu_sets)
+
+def test_cpu_sets_are_disjoint_blocks():
+    cpu_sets = get_cpu_sets(1)
+    cpus = [cpu for cpu_set in cpu_sets for cpu in cpu_set]
+    assert len(cpus) == len(set(cpus))
+    assert set(cpus) <= set(get_available_cpus())
+    assert len({len(cpu_set) for cpu_set in cpu_sets}) == 1
+
+@pytest.mark.parametrize('workers, cpus_per_worker', [(0, None), (1, 0)])
+def test_cpu_sets_reject_bad_arguments(workers, cpus_per_worker):
+    with pytest.raises(ValueError):
+        get_cpu_sets(workers, cpus_per_worker = cpus_per_worker)
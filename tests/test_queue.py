@@ -0,0 +1,31 @@
+import queue
+
+import pytest
+
+import parkit as p
+
+def noop():
+    return None
+
+def test_remove_takes_entries_out_of_order(site):
+    q = p.Queue('queues/claim', create = True)
+    for item in 'abcd':
+        q.put(item)
+    head, _ = q._extent()
+    assert q._remove(head + 2)
+    assert not q._remove(head + 2)
+    assert q.qsize() == 3
+    q.put('e')
+    assert [q.get() for _ in range(4)] == ['a', 'b', 'd', 'e']
+    with pytest.raises(queue.Empty):
+        q.get()
+
+def test_arrays_keep_contiguous_positions(site):
+    assert not hasattr(p.Array, '_remove')
+
+def test_thread_executor_options(site):
+    threaded = p.asyncable(noop, executor = 'thread', max_threads = 3)
+    assert threaded.executor == 'thread'
+    assert threaded.max_threads == 3
+    with pytest.raises(ValueError):
+        p.asyncable(noop, executor = 'fiber')
@@ -0,0 +1,91 @@
+import datetime
+import time
+
+import pytest
+
+import parkit as p
+
+from parkit.adapters.scheduler import (
+    get_due_schedules,
+    get_schedule_index,
+    Periodic
+)
+from parkit.cron import CronExpression
+
+def noop():
+    return None
+
+def due_entries(scheduler):
+    index = get_schedule_index(scheduler._env, scheduler._site_uuid)
+    return get_due_schedules(scheduler._env, index, time.time_ns())
+
+def test_index_returns_only_due_schedules(site):
+    now = datetime.datetime.now()
+    due = Periodic(
+        '__sched__/due', asyncable = p.asyncable(noop),
+        frequency = p.Frequency.HOUR, start = now - datetime.timedelta(seconds = 1),
+        max_times = 1, create = True, bind = False
+    )
+    later = Periodic(
+        '__sched__/later', asyncable = p.asyncable(noop),
+        frequency = p.Frequency.HOUR, start = now + datetime.timedelta(hours = 1),
+        create = True, bind = False
+    )
+    entries, next_ns = due_entries(due)
+    assert [name for _, name in entries] == ['due']
+    assert abs(next_ns - later.next_run.timestamp() * 1e9) < 1e4
+    assert due.is_scheduled()
+    entries, next_ns = due_entries(due)
+    assert entries == []
+    assert next_ns is not None
+    later.cancel()
+    assert due_entries(due) == ([], None)
+
+@pytest.mark.parametrize('expression, after, expected', [
+    ('*/15 * * * *', datetime.datetime(2024, 1, 1, 10, 7), datetime.datetime(2024, 1, 1, 10, 15)),
+    ('0 9 * * 1-5', datetime.datetime(2024, 1, 5, 9, 0), datetime.datetime(2024, 1, 8, 9, 0)),
+    ('30 2 1 * *', datetime.datetime(2024, 1, 31, 0, 0), datetime.datetime(2024, 2, 1, 2, 30)),
+    ('@daily', datetime.datetime(2024, 2, 28, 12, 0), datetime.datetime(2024, 2, 29, 0, 0)),
+    ('0 0 29 2 *', datetime.datetime(2024, 3, 1), datetime.datetime(2028, 2, 29, 0, 0))
+])
+def test_cron_next_after(expression, after, expected):
+    assert CronExpression(expression).next_after(after) == expected
+
+@pytest.mark.parametrize('expression', [
+    '* * * *', '60 * * * *', '* 24 * * *', '*/0 * * * *', 'a * * * *', '@sometimes'
+])
+def test_cron_rejects_invalid(expression):
+    with pytest.raises(ValueError):
+        CronExpression(expression)
+
+def periodic(name, misfire):
+    return Periodic(
+        '/'.join(['__sched__', name]), asyncable = p.asyncable(noop),
+        frequency = p.Frequency.SECOND, period = 1,
+        start = datetime.datetime.now() - datetime.timedelta(seconds = 10.5),
+        misfire = misfire, create = True, bind = False
+    )
+
+def test_misfire_coalesce(site):
+    scheduler = periodic('coalesce', 'coalesce')
+    assert scheduler.is_scheduled()
+    assert not scheduler.is_scheduled()
+    assert scheduler.count == 1
+
+def test_misfire_fire_all(site):
+    scheduler = periodic('fire_all', 'fire_all')
+    fired = 0
+    while scheduler.is_scheduled():
+        fired += 1
+    assert fired == 11
+    assert scheduler.count == 11
+
+def test_misfire_skip(site):
+    scheduler = periodic('skip', 'skip')
+    assert not scheduler.is_scheduled()
+    assert scheduler.count == 0
+    assert scheduler.next_run > datetime.datetime.now()
+
+def test_invalid_misfire_policy(site):
+    with pytest.raises(ValueError):
+        periodic('invalid', 'sometimes')
@@ -0,0 +1,113 @@
+import logging
+import os
+import time
+
+import parkit as p
+
+from parkit.storage.context import transaction_context
+from parkit.system.syslog import (
+    LogHandler,
+    SysLog,
+    syslog
+)
+
+def logged_since(timestamp, name):
+    return [
+        record for _, record in syslog.query(since = timestamp)
+        if not isinstance(record, str) and record[2] == name
+    ]
+
+def test_handler_batches_records_on_close():
+    since = time.time_ns()
+    handler = LogHandler(flush_interval = 0.01, policy = 'drop')
+    logger = logging.getLogger('tests.handler.batch')
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        logger.warning('first')
+        logger.error('second')
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+    records = logged_since(since, 'tests.handler.batch')
+    assert [(record[1], record[5]) for record in records] == \
+    [('WARNING', 'first'), ('ERROR', 'second')]
+    assert records[0][3] == os.getpid()
+
+def test_handler_counts_and_reports_dropped_records():
+    since = time.time_ns()
+    handler = LogHandler(buffer_size = 2, policy = 'drop')
+    #
+    # Marking the handler as started keeps the flusher thread from draining
+    # the queue, so the overflow is deterministic.
+    #
+    handler._pid = os.getpid()
+    logger = logging.getLogger('tests.handler.drop')
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        for message in ('one', 'two', 'three'):
+            logger.info(message)
+        assert handler.dropped == 1
+        handler.flush()
+        assert handler.dropped == 0
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+    assert [record[5] for record in logged_since(since, 'tests.handler.drop')] == ['one', 'two']
+    assert any(
+        record[5] == 'syslog dropped 1 records'
+        for record in logged_since(since, 'parkit.system.syslog')
+    )
+
+def record(timestamp, level, node_uid, message):
+    return (timestamp, level, 'tests', 1, node_uid, message)
+
+def make_syslog(maxsize = 100):
+    return SysLog(
+        'logs/syslog', site_uuid = p.get_default_site()[1],
+        maxsize = maxsize, create = True
+    )
+
+def messages(results):
+    return [entry[1][5] for entry in results]
+
+def test_query_by_level_node_and_since(site):
+    log = make_syslog()
+    log.extend([
+        record(100, 'INFO', 'node-a', 'one'),
+        record(200, 'ERROR', 'node-b', 'two'),
+        record(300, 'ERROR', 'node-a', 'three'),
+        record(400, 'WARNING', '', 'four')
+    ])
+    assert messages(log.query(levels = ['ERROR'])) == ['two', 'three']
+    assert messages(log.query(node = 'node-a')) == ['one', 'three']
+    assert messages(log.query(node = 'node-*', levels = ['ERROR'])) == ['two', 'three']
+    assert messages(log.query(since = 250)) == ['three', 'four']
+    assert messages(log.query(start = 2)) == ['three', 'four']
+    assert len(log.query()) == 4
+
+def test_query_after_rollover(site):
+    log = make_syslog(maxsize = 3)
+    log.extend([record(i, 'INFO', 'node-a', str(i)) for i in range(5)])
+    log.append(record(5, 'ERROR', 'node-a', '5'))
+    assert messages(log.query()) == ['3', '4', '5']
+    assert messages(log.query(levels = ['INFO'])) == ['3', '4']
+    assert messages(log.query(since = 0, node = 'node-a')) == ['3', '4', '5']
+
+def index_sizes(log):
+    with transaction_context(log._env, write = False) as (txn, _, _):
+        return [txn.stat(database)['entries'] for database in log._userdb[2:5]]
+
+def test_prune_with_out_of_order_timestamps(site):
+    log = make_syslog(maxsize = 3)
+    log.extend([
+        record(500, 'INFO', 'node-a', 'late'),
+        record(100, 'INFO', 'node-b', 'early'),
+        record(300, 'ERROR', 'node-a', 'middle')
+    ])
+    log.extend([record(50, 'INFO', 'node-a', 'x'), record(900, 'ERROR', '', 'y')])
+    assert messages(log.query()) == ['middle', 'x', 'y']
+    assert index_sizes(log) == [3, 2, 3]
+    assert messages(log.query(since = 0)) == ['middle', 'x', 'y']
+    assert messages(log.query(node = 'node-*')) == ['middle', 'x']
@@ -0,0 +1,54 @@
+import parkit as p
+import parkit.constants as constants
+
+from parkit.adapters.task import (
+    clear_metrics,
+    get_metrics_database,
+    load_metrics,
+    record_metrics,
+    sizes,
+    stages,
+    summarize_histogram
+)
+from parkit.storage.context import transaction_context
+from parkit.storage.environment import get_environment_threadsafe
+
+def metrics_database():
+    storage_path, site_uuid = p.get_default_site()
+    _, env, _, _, _, _ = get_environment_threadsafe(storage_path, constants.TASK_NAMESPACE)
+    return env, get_metrics_database(env, site_uuid)
+
+def test_record_and_load_metrics(site):
+    env, database = metrics_database()
+    with transaction_context(env, write = True) as (txn, _, _):
+        record_metrics(txn, database, 'asyncable-a', (1, 2, 3, 4, 5, 6, 7, 100, 0))
+        record_metrics(txn, database, 'asyncable-a', (3, 2, 3, 4, 5, 6, 7, 300, 0))
+        record_metrics(txn, database, 'asyncable-b', (9, 9, 9, 9, 9, 9, 9, 9, 9))
+    with transaction_context(env, write = False) as (txn, _, _):
+        histograms = load_metrics(txn, database, 'asyncable-a')
+    assert set(histograms) == set(stages + sizes)
+    queued = histograms['queued']
+    assert (queued['count'], queued['total'], queued['min'], queued['max']) == (2, 4, 1, 3)
+    assert queued['buckets'][1] == 1 and queued['buckets'][2] == 1
+    assert histograms['result_size']['buckets'][0] == 2
+    with transaction_context(env, write = True) as (txn, _, _):
+        clear_metrics(txn, database, 'asyncable-a')
+        assert load_metrics(txn, database, 'asyncable-a') == {}
+        assert load_metrics(txn, database, 'asyncable-b')['queued']['total'] == 9
+
+def test_summarize_histogram():
+    buckets = [0] * 64
+    buckets[1] = 1
+    buckets[2] = 1
+    summary = summarize_histogram(
+        dict(count = 2, total = 4, min = 1, max = 3, buckets = buckets),
+        percentiles = (50., 99.)
+    )
+    assert summary['mean'] == 2.
+    assert summary['histogram'] == [(1, 1), (3, 1)]
+    assert (summary['p50'], summary['p99']) == (1, 3)
+
+def test_summarize_empty_histogram():
+    summary = summarize_histogram(dict(count = 0, total = 0, min = None, max = None, buckets = [0] * 64))
+    assert summary['mean'] is None
+    assert summary['p50'] is None and summary['histogram'] == []
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+import parkit as p
+
+def test_append_spans_blocks(site):
+    v = p.Vector('columns/v', create = True, dtype = 'int64', block_size = 4)
+    v.append(np.arange(6))
+    v.extend([6, 7, 8])
+    assert len(v) == 9
+    assert v[0] == 0 and v[-1] == 8
+    assert list(v) == list(range(9))
+    with pytest.raises(IndexError):
+        v[9]
+
+def test_slices_match_numpy(site):
+    v = p.Vector('columns/slices', create = True, dtype = 'int64', block_size = 3)
+    v.append(np.arange(10))
+    expected = np.arange(10)
+    for key in (slice(2, 7), slice(None, None, 3), slice(8, 1, -2), slice(-4, None), slice(5, 5)):
+        assert np.array_equal(v[key], expected[key])
+
+def test_ring_drops_oldest_elements(site):
+    v = p.Vector('columns/ring', create = True, dtype = 'float32', block_size = 4, maxsize = 6)
+    v.append(np.arange(5, dtype = 'float32'))
+    v.append(np.arange(5, 10, dtype = 'float32'))
+    assert len(v) == 6
+    assert v.maxsize == 6
+    assert list(v) == [4.0, 5.0, 6.0, 7.0, 8.0, 9.0]
+    assert np.array_equal(v[1:3], np.array([5.0, 6.0], dtype = 'float32'))
+
+def test_object_dtype_rejected(site):
+    with pytest.raises(ValueError):
+        p.Vector('columns/objects', create = True, dtype = object)
@@ -0,0 +1,32 @@
+import pytest
+
+import parkit.constants as constants
+
+from parkit.daemons.worker import get_retirement_reason
+
+@pytest.fixture
+def limits(monkeypatch):
+    def set_limits(max_tasks = 0, max_rss_bytes = 0, max_idle_seconds = 0.):
+        monkeypatch.setenv(constants.WORKER_MAX_TASKS_ENVNAME, str(max_tasks))
+        monkeypatch.setenv(constants.WORKER_MAX_RSS_BYTES_ENVNAME, str(max_rss_bytes))
+        monkeypatch.setenv(constants.WORKER_MAX_IDLE_SECONDS_ENVNAME, str(max_idle_seconds))
+    return set_limits
+
+def test_no_limits_never_retire(limits):
+    limits()
+    assert get_retirement_reason(10**6, 10**6) is None
+
+def test_task_count(limits):
+    limits(max_tasks = 3)
+    assert get_retirement_reason(2, None) is None
+    assert get_retirement_reason(3, None) == 'task count'
+
+def test_rss(limits):
+    limits(max_rss_bytes = 1)
+    assert get_retirement_reason(0, None) == 'rss'
+
+def test_idle_time_only_when_idle(limits):
+    limits(max_idle_seconds = 5.)
+    assert get_retirement_reason(0, None) is None
+    assert get_retirement_reason(0, 1.) is None
+    assert get_retirement_reason(0, 5.) == 'idle time'